@@ -1,53 +1,147 @@
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+from backend.startup import startup_report, ChatBotLoader
+
+with startup_report.phase('import flask'):
+    from flask import Flask, request, jsonify, Response, stream_with_context, g
+    from flask_cors import CORS
+from backend.metrics import metrics, request_seconds
+from backend.session_store import parse_session_id
+from backend.tenants import TenantRegistry, UnknownTenantError
+from backend.admission import AdmissionError, TokenBucketQuota, client_id
+from backend.conversation_log import create_conversation_log
 from dotenv import load_dotenv
 import os
+import json
+import time
+import itertools
 
 # Load environment variables
 load_dotenv()
 
 from config.configuration import load_config
-from backend.chatbot import ChatBot
 
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Next.js frontend
 
 # Load configuration
-parameters = load_config()
+with startup_report.phase('load_config'):
+    parameters = load_config()
+
+# Initialize chatbot (at startup, in a background warmup thread or on first request, see STARTUP_MODE)
+chatbot_loader = ChatBotLoader(parameters)
+chatbot_loader.start()
+
+# Chatbots of the tenants served on /t/<tenant>/..., built on first request on top of the default one
+tenant_registry = TenantRegistry(parameters, chatbot_loader, max_tenants=parameters['max_loaded_tenants'])
+
+def get_chatbot(tenant=None):
+    """Returns the default chatbot, or the chatbot of a tenant (raises UnknownTenantError)"""
+    return chatbot_loader.get() if tenant is None else tenant_registry.get(tenant)
+
+# Per-client question quotas (RATE_LIMIT_PER_MINUTE)
+client_quota = None
+if parameters['rate_limit_per_minute'] > 0:
+    client_quota = TokenBucketQuota(parameters['rate_limit_per_minute'], burst=parameters['rate_limit_burst'])
 
-# Initialize chatbot
-chatbot = ChatBot(parameters)
+# Write-behind log of every question and answer, flushed in batches by a background thread
+conversation_log = create_conversation_log(parameters)
+
+def request_client():
+    """Returns the ID of the requesting client (see client_id)"""
+    return client_id(request.headers.get("X-Forwarded-For"), request.remote_addr, parameters['trust_proxy_headers'])
+
+def check_quota(cost=1):
+    """Takes `cost` questions from the quota of the requesting client (raises QuotaExceededError)"""
+    if client_quota is not None:
+        client_quota.consume(request_client(), cost)
+
+def read_question(data):
+    """Returns the stripped question of a parsed JSON request body, or an empty string (also for a missing body, a
+    body that is not an object or a question that is not a string)"""
+    question = data.get("question") if isinstance(data, dict) else None
+    return question.strip() if isinstance(question, str) else ""
+
+def log_conversation(question, answer, client, tenant=None, session_id=None, cache_hit=None, prompt_tokens=None):
+    """Queues a question and its answer in the conversation log (never blocks)"""
+    if conversation_log is not None:
+        conversation_log.record(question, answer, client=client, tenant=tenant, session_id=session_id,
+                                cache_hit=cache_hit, prompt_tokens=prompt_tokens)
+
+@app.errorhandler(UnknownTenantError)
+def unknown_tenant(error):
+    return jsonify({
+        "error": str(error),
+        "status": "error"
+    }), 404
+
+@app.errorhandler(AdmissionError)
+def not_admitted(error):
+    """429 when a client exceeds its quota, 503 when the providers are saturated, both with Retry-After"""
+    response = jsonify({
+        "error": str(error),
+        "status": "error"
+    })
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, error.status_code
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_duration(response):
+    """Records the request duration (to the first byte for streamed responses)"""
+    if request.endpoint != "metrics_endpoint" and "request_start" in g:
+        route = request.url_rule.rule if request.url_rule is not None else "other"
+        request_seconds.observe(time.perf_counter() - g.request_start, route, request.method, str(response.status_code))
+    return response
 
 @app.route("/", methods=["GET"])
 def home():
-    """Health check endpoint"""
+    """Health check endpoint (never builds the chatbot)"""
+    chatbot = chatbot_loader.get_if_ready()
     return jsonify({
         "status": "ok",
         "message": f"Resume Chatbot API for {parameters['resume_owner_name']}",
-        "version": "2.0-simplified"
+        "version": "2.0-simplified",
+        "ready": chatbot is not None,
+        "embedding_cache": chatbot.retriever.embeddings.stats() if chatbot else None,
+        "answer_cache": chatbot.answer_cache.stats() if chatbot and chatbot.answer_cache else None,
+        "sessions": chatbot.session_memory.stats() if chatbot else None,
+        "admission": chatbot.admission_stats() if chatbot else None,
+        "conversation_log": conversation_log.stats() if conversation_log else None,
+        "tenants": tenant_registry.stats(),
+        "startup": startup_report.report()
     })
 
 @app.route("/ask", methods=["POST"])
-def ask():
+@app.route("/t/<tenant>/ask", methods=["POST"])
+def ask(tenant=None):
     """
-    Main endpoint to ask questions about the resume.
+    Main endpoint to ask questions about the resume (about the resume of a tenant on /t/<tenant>/ask).
     
     Request body:
     {
-        "question": "Your question here"
+        "question": "Your question here",
+        "session_id": "optional-conversation-id"
     }
     
+    Without "session_id" every question is answered on its own (stateless). With it, the server keeps the
+    conversation: the previous turns (or a summary of the oldest ones) are part of the context.
+    
     Response:
     {
         "answer": "The chatbot's response",
+        "cache_hit": false,
+        "prompt_tokens": 1234,
+        "session_id": "optional-conversation-id",
         "status": "success"
     }
     """
     try:
         # Get question from request
-        data = request.json
-        question = data.get("question", "").strip()
+        data = request.get_json(silent=True)
+        question = read_question(data)
         
         # Validate question
         if not question:
@@ -55,26 +149,179 @@ def ask():
                 "error": "No question provided",
                 "status": "error"
             }), 400
+        try:
+            session_id = parse_session_id(data.get("session_id"))
+        except ValueError as e:
+            return jsonify({
+                "error": str(e),
+                "status": "error"
+            }), 400
+        check_quota()
         
         # Generate response using chatbot
-        # Note: conversation=[] means no history (stateless)
-        response = chatbot.answer(
+        # Note: conversation=[] means no client-side history, the session (if any) provides it
+        response = get_chatbot(tenant).answer(
             query=question,
             conversation=[],
-            fake_conversation=False
+            fake_conversation=False,
+            session_id=session_id
         )
+        log_conversation(question, response["answer"], request_client(), tenant, session_id,
+                         response.get("cache_hit"), response.get("prompt_tokens"))
         
         return jsonify({
             "answer": response["answer"],
+            "cache_hit": response.get("cache_hit") is not None,
+            "prompt_tokens": response.get("prompt_tokens"),
+            "session_id": session_id,
             "status": "success"
         })
         
+    except (UnknownTenantError, AdmissionError):
+        raise
     except Exception as e:
         return jsonify({
             "error": str(e),
             "status": "error"
         }), 500
 
+@app.route("/ask/batch", methods=["POST"])
+@app.route("/t/<tenant>/ask/batch", methods=["POST"])
+def ask_batch(tenant=None):
+    """
+    Answers several questions in one request (e.g. to preload the suggested questions).
+    
+    Request body:
+    {
+        "questions": ["First question", "Second question"]
+    }
+    
+    Response (answers in input order, each with its own status):
+    {
+        "answers": [
+            {"question": "First question", "answer": "...", "cache_hit": false, "status": "success"},
+            {"question": "", "answer": null, "cache_hit": false, "status": "error", "error": "No question provided"}
+        ],
+        "status": "success"
+    }
+    """
+    try:
+        data = request.json or {}
+        questions = data.get("questions")
+        
+        # Validate questions
+        if not isinstance(questions, list) or not questions:
+            return jsonify({
+                "error": "No questions provided",
+                "status": "error"
+            }), 400
+        if len(questions) > parameters['batch_max_questions']:
+            return jsonify({
+                "error": f"Too many questions (maximum {parameters['batch_max_questions']})",
+                "status": "error"
+            }), 400
+        
+        questions = [question.strip() if isinstance(question, str) else "" for question in questions]
+        check_quota(sum(1 for question in questions if question))
+        results = get_chatbot(tenant).answer_batch(questions)
+        client = request_client()
+        for result in results:
+            if result["status"] == "success":
+                log_conversation(result["question"], result["answer"], client, tenant, cache_hit=result["cache_hit"])
+        
+        return jsonify({
+            "answers": [dict(result, cache_hit=result["cache_hit"] is not None) for result in results],
+            "status": "success"
+        })
+        
+    except (UnknownTenantError, AdmissionError):
+        raise
+    except Exception as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 500
+
+@app.route("/ask/stream", methods=["POST"])
+@app.route("/t/<tenant>/ask/stream", methods=["POST"])
+def ask_stream(tenant=None):
+    """
+    Streaming variant of /ask using server-sent events.
+    
+    Request body:
+    {
+        "question": "Your question here",
+        "session_id": "optional-conversation-id"
+    }
+    
+    Response (text/event-stream), one event per piece of the answer, then a final "done" event:
+        data: {"token": "..."}
+        
+        event: done
+        data: {"status": "success"}
+    
+    When the answer fails once the stream has started, the apology message is sent as the last token and the "done"
+    event has the status "error" (the failed answer is not logged).
+    """
+    data = request.get_json(silent=True)
+    question = read_question(data)
+    
+    # Validate question
+    if not question:
+        return jsonify({
+            "error": "No question provided",
+            "status": "error"
+        }), 400
+    try:
+        session_id = parse_session_id(data.get("session_id"))
+    except ValueError as e:
+        return jsonify({
+            "error": str(e),
+            "status": "error"
+        }), 400
+    check_quota()
+    
+    chatbot = get_chatbot(tenant)
+    chatbot.llm_limiter.check()  # Shed now, before spending an embedding call on the cache lookup
+    client = request_client()
+    from backend.chatbot import StreamError  # Already imported with the chatbot
+    
+    # Wait for the first piece before sending the headers, so an admission failure is still an HTTP 503
+    pieces = chatbot.answer_stream(query=question, conversation=[], session_id=session_id)
+    first = next(pieces, None)
+    
+    def generate():
+        tokens = []
+        status = 'success'
+        for token in itertools.chain([first] if first is not None else [], pieces):
+            if isinstance(token, StreamError):
+                status = 'error'
+            else:
+                tokens.append(token)
+            yield f"data: {json.dumps({'token': token})}\n\n"
+        if status == 'success':
+            log_conversation(question, "".join(tokens), client, tenant, session_id)
+        yield f"event: done\ndata: {json.dumps({'status': status})}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens reach the client immediately
+        }
+    )
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Prometheus metrics: per-stage latency histograms, LLM token usage, cache and error counters"""
+    if not parameters['metrics_enabled']:
+        return jsonify({
+            "error": "Metrics are disabled",
+            "status": "error"
+        }), 404
+    return Response(metrics.render(), content_type=metrics.content_type)
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     app.run(host="0.0.0.0", port=port, debug=False)
@@ -0,0 +1,356 @@
+"""
+Async (ASGI) serving mode of the Resume Chatbot API.
+
+Exposes the same routes as app.py, but the embedding, vector search and LLM calls are awaited instead of
+blocking a worker, so a single process can hold hundreds of concurrent conversations.
+
+Usage:
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+    # In production (e.g. in the Procfile):
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT
+"""
+
+from backend.startup import startup_report, ChatBotLoader
+
+import os
+import json
+import time
+from dotenv import load_dotenv
+from backend.metrics import metrics, request_seconds
+from backend.session_store import parse_session_id
+from backend.tenants import TenantRegistry, UnknownTenantError
+from backend.admission import AdmissionError, TokenBucketQuota, client_id
+from backend.conversation_log import create_conversation_log
+with startup_report.phase('import starlette'):
+    from starlette.applications import Starlette
+    from starlette.concurrency import run_in_threadpool
+    from starlette.middleware import Middleware
+    from starlette.middleware.cors import CORSMiddleware
+    from starlette.responses import JSONResponse, StreamingResponse, Response
+    from starlette.routing import Route, Match
+
+# Load environment variables
+load_dotenv()
+
+from config.configuration import load_config
+
+# Load configuration
+with startup_report.phase('load_config'):
+    parameters = load_config()
+
+# Initialize chatbot (at startup, in a background warmup thread or on first request, see STARTUP_MODE)
+chatbot_loader = ChatBotLoader(parameters)
+chatbot_loader.start()
+
+# Chatbots of the tenants served on /t/{tenant}/..., built on first request on top of the default one
+tenant_registry = TenantRegistry(parameters, chatbot_loader, max_tenants=parameters['max_loaded_tenants'])
+
+# Per-client question quotas (RATE_LIMIT_PER_MINUTE)
+client_quota = None
+if parameters['rate_limit_per_minute'] > 0:
+    client_quota = TokenBucketQuota(parameters['rate_limit_per_minute'], burst=parameters['rate_limit_burst'])
+
+
+# Write-behind log of every question and answer, flushed in batches by a background thread
+conversation_log = create_conversation_log(parameters)
+
+
+def request_client(request):
+    """Returns the ID of the requesting client (see client_id)"""
+    return client_id(request.headers.get("x-forwarded-for"), request.client.host if request.client else None,
+                     parameters['trust_proxy_headers'])
+
+
+def check_quota(request, cost=1):
+    """Takes `cost` questions from the quota of the requesting client (raises QuotaExceededError)"""
+    if client_quota is not None:
+        client_quota.consume(request_client(request), cost)
+
+
+def log_conversation(question, answer, client, tenant=None, session_id=None, cache_hit=None, prompt_tokens=None):
+    """Queues a question and its answer in the conversation log (never blocks)"""
+    if conversation_log is not None:
+        conversation_log.record(question, answer, client=client, tenant=tenant, session_id=session_id,
+                                cache_hit=cache_hit, prompt_tokens=prompt_tokens)
+
+
+async def get_chatbot(tenant=None):
+    """Returns the default chatbot, or the chatbot of a tenant (raises UnknownTenantError), building it in a worker
+    thread if needed so the event loop is not blocked."""
+    if tenant is not None:
+        chatbot = tenant_registry.get_if_loaded(tenant)
+        if chatbot is None:
+            chatbot = await run_in_threadpool(tenant_registry.get, tenant)
+        return chatbot
+    chatbot = chatbot_loader.get_if_ready()
+    if chatbot is None:
+        chatbot = await run_in_threadpool(chatbot_loader.get)
+    return chatbot
+
+
+async def unknown_tenant(request, error):
+    return JSONResponse({
+        "error": str(error),
+        "status": "error"
+    }, status_code=404)
+
+
+async def not_admitted(request, error):
+    """429 when a client exceeds its quota, 503 when the providers are saturated, both with Retry-After"""
+    return JSONResponse({
+        "error": str(error),
+        "status": "error"
+    }, status_code=error.status_code, headers={"Retry-After": str(error.retry_after)})
+
+
+async def read_question(request):
+    """Returns the stripped question of a JSON request body, or an empty string (also for a body that is not an object
+    or a question that is not a string)."""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    question = data.get("question") if isinstance(data, dict) else None
+    return question.strip() if isinstance(question, str) else ""
+
+
+async def read_session_id(request):
+    """Returns the optional session ID of a JSON request body (see parse_session_id)."""
+    try:
+        data = await request.json()  # Parsed once, Starlette caches the body
+    except ValueError:
+        data = {}
+    return parse_session_id(data.get("session_id") if isinstance(data, dict) else None)
+
+
+async def home(request):
+    """Health check endpoint (never builds the chatbot)"""
+    chatbot = chatbot_loader.get_if_ready()
+    return JSONResponse({
+        "status": "ok",
+        "message": f"Resume Chatbot API for {parameters['resume_owner_name']}",
+        "version": "2.0-simplified",
+        "ready": chatbot is not None,
+        "embedding_cache": chatbot.retriever.embeddings.stats() if chatbot else None,
+        "answer_cache": chatbot.answer_cache.stats() if chatbot and chatbot.answer_cache else None,
+        "sessions": chatbot.session_memory.stats() if chatbot else None,
+        "admission": chatbot.admission_stats() if chatbot else None,
+        "conversation_log": conversation_log.stats() if conversation_log else None,
+        "tenants": tenant_registry.stats(),
+        "startup": startup_report.report()
+    })
+
+
+async def ask(request):
+    """Main endpoint to ask questions about the resume (same contract as app.py's /ask)."""
+    try:
+        question = await read_question(request)
+
+        # Validate question
+        if not question:
+            return JSONResponse({
+                "error": "No question provided",
+                "status": "error"
+            }, status_code=400)
+        try:
+            session_id = await read_session_id(request)
+        except ValueError as e:
+            return JSONResponse({
+                "error": str(e),
+                "status": "error"
+            }, status_code=400)
+        check_quota(request)
+
+        # Note: conversation=[] means no client-side history, the session (if any) provides it
+        tenant = request.path_params.get("tenant")
+        response = await (await get_chatbot(tenant)).aanswer(
+            query=question,
+            conversation=[],
+            fake_conversation=False,
+            session_id=session_id
+        )
+        log_conversation(question, response["answer"], request_client(request), tenant, session_id,
+                         response.get("cache_hit"), response.get("prompt_tokens"))
+
+        return JSONResponse({
+            "answer": response["answer"],
+            "cache_hit": response.get("cache_hit") is not None,
+            "prompt_tokens": response.get("prompt_tokens"),
+            "session_id": session_id,
+            "status": "success"
+        })
+
+    except (UnknownTenantError, AdmissionError):
+        raise
+    except Exception as e:
+        return JSONResponse({
+            "error": str(e),
+            "status": "error"
+        }, status_code=500)
+
+
+async def ask_batch(request):
+    """Answers several questions in one request (same contract as app.py's /ask/batch)."""
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = {}
+        questions = (data or {}).get("questions")
+
+        # Validate questions
+        if not isinstance(questions, list) or not questions:
+            return JSONResponse({
+                "error": "No questions provided",
+                "status": "error"
+            }, status_code=400)
+        if len(questions) > parameters['batch_max_questions']:
+            return JSONResponse({
+                "error": f"Too many questions (maximum {parameters['batch_max_questions']})",
+                "status": "error"
+            }, status_code=400)
+
+        questions = [question.strip() if isinstance(question, str) else "" for question in questions]
+        check_quota(request, sum(1 for question in questions if question))
+        tenant = request.path_params.get("tenant")
+        results = await (await get_chatbot(tenant)).aanswer_batch(questions)
+        client = request_client(request)
+        for result in results:
+            if result["status"] == "success":
+                log_conversation(result["question"], result["answer"], client, tenant, cache_hit=result["cache_hit"])
+
+        return JSONResponse({
+            "answers": [dict(result, cache_hit=result["cache_hit"] is not None) for result in results],
+            "status": "success"
+        })
+
+    except (UnknownTenantError, AdmissionError):
+        raise
+    except Exception as e:
+        return JSONResponse({
+            "error": str(e),
+            "status": "error"
+        }, status_code=500)
+
+
+async def ask_stream(request):
+    """Streaming variant of /ask using server-sent events (same contract as app.py's /ask/stream)."""
+    question = await read_question(request)
+
+    # Validate question
+    if not question:
+        return JSONResponse({
+            "error": "No question provided",
+            "status": "error"
+        }, status_code=400)
+    try:
+        session_id = await read_session_id(request)
+    except ValueError as e:
+        return JSONResponse({
+            "error": str(e),
+            "status": "error"
+        }, status_code=400)
+    check_quota(request)
+
+    tenant = request.path_params.get("tenant")
+    chatbot = await get_chatbot(tenant)
+    chatbot.llm_limiter.check()  # Shed now, before spending an embedding call on the cache lookup
+    client = request_client(request)
+    from backend.chatbot import StreamError  # Already imported with the chatbot
+
+    # Wait for the first piece before sending the headers, so an admission failure is still an HTTP 503
+    pieces = chatbot.aanswer_stream(query=question, conversation=[], session_id=session_id)
+    first = await anext(pieces, None)
+
+    async def generate():
+        tokens = []
+        status = 'success'
+        token = first
+        while token is not None:
+            if isinstance(token, StreamError):
+                status = 'error'
+            else:
+                tokens.append(token)
+            yield f"data: {json.dumps({'token': token})}\n\n"
+            token = await anext(pieces, None)
+        if status == 'success':
+            log_conversation(question, "".join(tokens), client, tenant, session_id)
+        yield f"event: done\ndata: {json.dumps({'status': status})}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so tokens reach the client immediately
+        }
+    )
+
+
+async def metrics_endpoint(request):
+    """Prometheus metrics: per-stage latency histograms, LLM token usage, cache and error counters"""
+    if not parameters['metrics_enabled']:
+        return JSONResponse({
+            "error": "Metrics are disabled",
+            "status": "error"
+        }, status_code=404)
+    return Response(metrics.render(), headers={"Content-Type": metrics.content_type})
+
+
+class RequestMetricsMiddleware():
+    """Records the duration of each HTTP request (to the first byte for streamed responses)"""
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+
+    def _route(self, scope):
+        """Returns the path template of the matching route (e.g. /t/{tenant}/ask), so labels stay bounded."""
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+        return "other"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        route = self._route(scope)
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.start":
+                request_seconds.observe(time.perf_counter() - start, route, scope["method"], str(message["status"]))
+            await send(message)
+
+        await self.app(scope, receive, send_and_record)
+
+
+routes = [
+    Route("/", home, methods=["GET"]),
+    Route("/ask", ask, methods=["POST"]),
+    Route("/ask/batch", ask_batch, methods=["POST"]),
+    Route("/ask/stream", ask_stream, methods=["POST"]),
+    Route("/t/{tenant}/ask", ask, methods=["POST"]),
+    Route("/t/{tenant}/ask/batch", ask_batch, methods=["POST"]),
+    Route("/t/{tenant}/ask/stream", ask_stream, methods=["POST"]),
+    Route("/metrics", metrics_endpoint, methods=["GET"]),
+]
+
+app = Starlette(
+    routes=routes,
+    exception_handlers={UnknownTenantError: unknown_tenant, AdmissionError: not_admitted},
+    on_shutdown=[conversation_log.close] if conversation_log is not None else [],  # Writes the queued records
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]),  # Enable CORS for Next.js frontend
+        Middleware(RequestMetricsMiddleware, routes=routes)
+    ]
+)
+
+if __name__ == "__main__":
+    import uvicorn
+    port = int(os.getenv("PORT", 8000))
+    uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,287 @@
+import math
+import time
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager, asynccontextmanager
+from backend.metrics import admissions, queue_wait_seconds
+
+
+class AdmissionError(Exception):
+    """Raised when a request is not admitted. The HTTP layer answers with `status_code` and a Retry-After header."""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float = 1):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))  # Whole seconds, as in the Retry-After header
+
+
+class OverloadedError(AdmissionError):
+    """Raised when an upstream provider is saturated and waiting for it would exceed the latency budget (HTTP 503)."""
+
+    status_code = 503
+
+
+class QuotaExceededError(AdmissionError):
+    """Raised when a client has used up its request quota (HTTP 429)."""
+
+    status_code = 429
+
+
+class _Waiter():
+    """A request queued for a slot: a thread blocked on `event`, or a coroutine awaiting `future` on `loop`."""
+
+    __slots__ = ('granted', 'event', 'loop', 'future')
+
+    def __init__(self, loop=None):
+        self.granted = False
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyLimiter():
+    """Concurrency Limiter Class
+    This class bounds the number of concurrent calls to an upstream provider (the LLM or the embedding API), for the
+    threads of the Flask server and the coroutines of the ASGI server alike. Calls beyond `max_concurrency` wait in a
+    first-come first-served queue of at most `max_queue` requests, for at most `queue_timeout` seconds (the latency
+    budget). A call is shed at once, rather than queued, when the queue is full or when the wait predicted from the
+    recent call durations exceeds the budget, so a traffic spike turns into fast 503s instead of provider rate
+    limits and hung requests. A released slot is handed directly to the next waiter. `max_concurrency=0` disables
+    the limit.
+    """
+
+    def __init__(self, name: str, max_concurrency: int = 16, max_queue: int = 64, queue_timeout: float = 5.0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._active = 0
+        self._waiters = deque()
+        self._hold_time = None  # Moving average of the time a slot is held, in seconds
+        self._lock = threading.Lock()
+        self.shed = 0
+
+    def _predicted_wait(self, position: int):
+        """Returns the predicted wait of the `position`-th request in the queue. Must be called with the lock held."""
+        if self._hold_time is None:
+            return 0.0
+        return position * self._hold_time / self.max_concurrency
+
+    def _shed_if_overloaded(self):
+        """Raises OverloadedError if one more request cannot be admitted within the latency budget. Must be called
+        with the lock held."""
+        predicted_wait = self._predicted_wait(len(self._waiters) + 1)
+        if len(self._waiters) >= self.max_queue or predicted_wait > self.queue_timeout:
+            self.shed += 1
+            admissions.inc(self.name, 'shed')
+            raise OverloadedError(f"Too many concurrent requests to the {self.name} provider, please retry later",
+                                  retry_after=predicted_wait or self.queue_timeout)
+
+    def _enqueue(self, loop=None):
+        """Takes a free slot (returns None), or queues a waiter (returns it). Must be called with the lock held."""
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return None
+        self._shed_if_overloaded()
+        waiter = _Waiter(loop)
+        self._waiters.append(waiter)
+        return waiter
+
+    def _give_up(self, waiter: _Waiter, timed_out: bool = True):
+        """Removes a waiter that timed out (or was cancelled) from the queue. Returns True if it was granted a slot
+        in the meantime."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            if timed_out:
+                self.shed += 1
+        if timed_out:
+            admissions.inc(self.name, 'timeout')
+        return False
+
+    def _timeout_error(self):
+        return OverloadedError(f"Timed out waiting for the {self.name} provider, please retry later",
+                               retry_after=self._hold_time or self.queue_timeout)
+
+    def check(self):
+        """Raises OverloadedError if a request would be shed now, without taking a slot (e.g. before a streamed
+        response starts, while an HTTP error can still be returned)."""
+        if not self.max_concurrency:
+            return
+        with self._lock:
+            if self._active >= self.max_concurrency or self._waiters:
+                self._shed_if_overloaded()
+
+    def acquire(self):
+        """Takes a slot, waiting for one if needed.
+
+        Raises:
+            OverloadedError: If the request is shed or times out in the queue.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            waiter = self._enqueue()
+        if waiter is not None:
+            waiter.event.wait(self.queue_timeout)
+            if not self._give_up(waiter):
+                raise self._timeout_error()
+        self._admitted(waiter, start)
+
+    async def aacquire(self):
+        """Async version of `acquire`."""
+        start = time.perf_counter()
+        with self._lock:
+            waiter = self._enqueue(asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                if self._give_up(waiter, timed_out=False):
+                    self.release()  # Granted just as the request was cancelled: pass the slot on
+                raise
+            if not self._give_up(waiter):
+                raise self._timeout_error()
+        self._admitted(waiter, start)
+
+    def _admitted(self, waiter, start: float):
+        admissions.inc(self.name, 'admitted' if waiter is None else 'queued')
+        queue_wait_seconds.observe(time.perf_counter() - start, self.name)
+
+    def release(self, hold_time: float = None):
+        """Frees a slot, handing it to the next waiter if any.
+
+        Args:
+            hold_time (float, optional): How long the slot was held, to predict the queueing delay.
+        """
+        with self._lock:
+            if hold_time is not None:
+                self._hold_time = hold_time if self._hold_time is None else 0.8 * self._hold_time + 0.2 * hold_time
+            if not self._waiters:
+                self._active -= 1
+                return
+            waiter = self._waiters.popleft()
+            waiter.granted = True  # The slot changes hands, `_active` is unchanged
+        if waiter.event is not None:
+            waiter.event.set()
+        else:
+            waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+
+    @contextmanager
+    def slot(self):
+        """Holds a slot for the enclosed block (see `acquire`)."""
+        if not self.max_concurrency:
+            yield
+            return
+        self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def aslot(self):
+        """Async version of `slot`."""
+        if not self.max_concurrency:
+            yield
+            return
+        await self.aacquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+    def stats(self):
+        """Returns the slots in use, the queue length, the average call duration and the requests shed so far."""
+        with self._lock:
+            return {
+                'active': self._active,
+                'queued': len(self._waiters),
+                'max_concurrency': self.max_concurrency,
+                'max_queue': self.max_queue,
+                'average_call_seconds': round(self._hold_time, 4) if self._hold_time is not None else None,
+                'shed': self.shed,
+            }
+
+
+def create_limiter(parameters: dict[str, any], name: str):
+    """Creates the limiter of a provider ('llm' or 'embedding') from the application parameters.
+
+    Args:
+        parameters (dict): The application parameters, as returned by `load_config()`.
+        name (str): The provider name, which selects the `<name>_max_concurrency` parameter.
+
+    Returns:
+        ConcurrencyLimiter: The limiter.
+    """
+    return ConcurrencyLimiter(
+        name,
+        max_concurrency=parameters.get(f'{name}_max_concurrency', 16),
+        max_queue=parameters.get('admission_max_queue', 64),
+        queue_timeout=parameters.get('admission_queue_timeout', 5.0)
+    )
+
+
+def client_id(forwarded_for: str, remote_address: str, trust_proxy: bool = False):
+    """Returns the identity a request is rate limited under: its IP address, taken from the first X-Forwarded-For
+    entry when the server runs behind a trusted proxy (Railway, Render, ...), from the socket otherwise."""
+    if trust_proxy and forwarded_for:
+        return forwarded_for.split(',')[0].strip()
+    return remote_address or 'unknown'
+
+
+class TokenBucketQuota():
+    """Token Bucket Quota Class
+    This class gives each client a request quota, in the spirit of the `max_messages` column of the Users table:
+    a bucket of `burst` tokens refilled at `rate_per_minute`, one token per question. A client that empties its
+    bucket gets HTTP 429 with the time until enough tokens are back. Buckets are kept for the `max_clients` most
+    recently seen clients; a forgotten client starts again with a full bucket.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 10, max_clients: int = 10000):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # Client ID -> [tokens, last refill], least recently seen first
+        self._lock = threading.Lock()
+
+    def consume(self, client: str, cost: int = 1):
+        """Takes `cost` tokens from the bucket of a client.
+
+        Args:
+            client (str): The client ID (see `client_id`).
+            cost (int, optional): The number of questions of the request. Defaults to 1.
+
+        Raises:
+            QuotaExceededError: If the bucket holds fewer than `cost` tokens.
+        """
+        cost = min(cost, self.burst)  # A batch larger than the burst needs a full bucket
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.burst, now]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(client)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+
+            if bucket[0] < cost:
+                admissions.inc('quota', 'shed')
+                raise QuotaExceededError("Too many questions, please slow down",
+                                         retry_after=(cost - bucket[0]) / self.rate)
+            bucket[0] -= cost
+        admissions.inc('quota', 'admitted')
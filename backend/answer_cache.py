@@ -0,0 +1,157 @@
+import time
+import string
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class AnswerCache():
+    """Answer Cache Class
+    This class caches the chatbot's answers in two levels: an exact match on the normalized question, then a
+    near-duplicate match on the question embedding against previously answered questions. Entries are scoped by a
+    namespace (resume index version, model and temperature), expire after a TTL and are evicted least recently used
+    once the cache is full.
+    """
+
+    def __init__(self, max_size: int = 512, ttl: float = 86400, similarity_threshold: float = 0.95):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+
+        self._entries = OrderedDict()
+        self._matrices = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_question(question: str):
+        """Normalizes a question so case, spacing and trailing punctuation do not defeat the exact match."""
+        return " ".join(question.lower().split()).strip(string.punctuation + " ")
+
+    def _is_expired(self, entry: dict):
+        return self.ttl is not None and time.monotonic() - entry['created_at'] > self.ttl
+
+    def _remove(self, key: tuple):
+        """Removes an entry. Must be called with the lock held."""
+        del self._entries[key]
+        self._matrices.pop(key[0], None)
+
+    def get_exact(self, question: str, namespace: tuple):
+        """Looks up an answer for exactly the same normalized question.
+
+        Args:
+            question (str): The user's question.
+            namespace (tuple): The (index version, model, temperature) the answer must have been generated with.
+
+        Returns:
+            dict | None: The cached entry (answer and context), or None on a miss.
+        """
+        key = (namespace, self.normalize_question(question))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry
+
+    def _namespace_matrix(self, namespace: tuple):
+        """Returns the keys and the stacked embeddings of a namespace. Must be called with the lock held."""
+        if namespace not in self._matrices:
+            keys = [key for key, entry in self._entries.items()
+                    if key[0] == namespace and entry['embedding'] is not None]
+            matrix = np.vstack([self._entries[key]['embedding'] for key in keys]) if keys else None
+            self._matrices[namespace] = (keys, matrix)
+        return self._matrices[namespace]
+
+    def get_similar(self, embedding, namespace: tuple):
+        """Looks up an answer for a previously answered question whose embedding is close enough.
+
+        Args:
+            embedding (list): The embedding of the user's question.
+            namespace (tuple): The (index version, model, temperature) the answer must have been generated with.
+
+        Returns:
+            dict | None: The cached entry (answer and context), or None on a miss.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        with self._lock:
+            keys, matrix = self._namespace_matrix(namespace)
+            if matrix is not None:
+                scores = matrix @ query
+                for i in np.argsort(-scores):
+                    if scores[i] < self.similarity_threshold:
+                        break
+                    entry = self._entries.get(keys[i])
+                    if entry is None:
+                        continue
+                    if self._is_expired(entry):
+                        self._remove(keys[i])  # A less similar paraphrase may still be fresh
+                        continue
+                    self._entries.move_to_end(keys[i])
+                    self.semantic_hits += 1
+                    return entry
+            self.misses += 1
+            return None
+
+    def put(self, question: str, namespace: tuple, answer: str, context: list = None, embedding=None):
+        """Stores an answer.
+
+        Args:
+            question (str): The user's question.
+            namespace (tuple): The (index version, model, temperature) the answer was generated with.
+            answer (str): The chatbot's answer.
+            context (list, optional): The documents the answer was based on.
+            embedding (list, optional): The embedding of the question, enabling near-duplicate matches.
+        """
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32)
+            embedding = embedding / (np.linalg.norm(embedding) or 1.0)
+
+        key = (namespace, self.normalize_question(question))
+        with self._lock:
+            self._entries[key] = {
+                'answer': answer,
+                'context': context or [],
+                'embedding': embedding,
+                'created_at': time.monotonic(),
+            }
+            self._entries.move_to_end(key)
+            self._matrices.pop(namespace, None)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def export(self, namespace: tuple):
+        """Returns the live entries of a namespace (e.g. to persist precomputed answers).
+
+        Args:
+            namespace (tuple): The (index version, model, temperature) of the entries.
+
+        Returns:
+            list: The (normalized question, entry) pairs, least recently used first.
+        """
+        with self._lock:
+            return [(key[1], entry) for key, entry in self._entries.items()
+                    if key[0] == namespace and not self._is_expired(entry)]
+
+    def stats(self):
+        """Returns the cache hit/miss counters.
+
+        Returns:
+            dict: The number of exact hits, semantic hits, misses, and entries held.
+        """
+        with self._lock:
+            return {
+                'exact_hits': self.exact_hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+            }
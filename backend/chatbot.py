@@ -1,7 +1,34 @@
-from openai import OpenAI
-from langchain.prompts import PromptTemplate
 from backend.retriever import Retriever
+from backend.answer_cache import AnswerCache
+from backend.startup import startup_report
+from backend.transport import get_transport
+from backend.metrics import stage, stage_seconds, llm_tokens, answer_cache_lookups, prompt_tokens, context_tokens_saved
+from backend.context_assembler import TokenCounter, ContextAssembler
+from backend.session_store import SessionMemory, create_session_store
+from backend.single_flight import SingleFlight, AsyncSingleFlight
+from backend.admission import AdmissionError, create_limiter
 from datetime import datetime
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+
+NO_HISTORY_MESSAGE = 'There is no previous messages'
+SYSTEM_MESSAGE = "You are a helpful assistant specialized in answering questions about resumes."
+ERROR_MESSAGE = (
+    "I apologize, but I encountered an error while processing your question. "
+    "Please try again or rephrase your question."
+)
+
+
+class StreamError(str):
+    """StreamError Class
+    This class marks the last piece of a streamed answer that failed (see `ChatBot.answer_stream`). It is the 
+    user-friendly error message, so it can be shown like the rest of the answer, but the routes can tell it apart 
+    to report the error and keep it out of the conversation log.
+    """
 
 
 class ChatBot():
@@ -11,19 +38,100 @@ class ChatBot():
     and a custom prompt template to generate context-aware responses.
     """
 
-    def __init__(self, parameters: dict[str, any]):
+    def __init__(self, parameters: dict[str, any], shared=None):
+        """Builds the chatbot.
+        
+        Args:
+            parameters (dict): The application parameters, as returned by `load_config()` (or `tenant_parameters()`).
+            shared (ChatBot, optional): A chatbot whose LLM clients, LLM limiter, prompt template, token counter, 
+                embedder and session store are reused instead of being created again (multi-tenant serving). 
+                Defaults to None.
+        """
         self.parameters = parameters
+        self.tenant = parameters.get('tenant')
         
-        # Initialize OpenAI-compatible client for any provider
-        self.client = OpenAI(
-            api_key=parameters['llm_api_key'],
-            base_url=parameters.get('llm_base_url')
-        )
+        if shared is not None:
+            self.client = shared.client
+            self.async_client = shared.async_client
+            self.llm_limiter = shared.llm_limiter  # Every tenant counts against the same provider limits
+            self.retrieval_qa_chat_prompt = shared.retrieval_qa_chat_prompt
+        else:
+            # Heavy packages are imported here rather than at module level to keep cold starts fast
+            with startup_report.phase('import openai'):
+                from openai import OpenAI, AsyncOpenAI
+            
+            # Initialize OpenAI-compatible client for any provider, on the shared pooled connections
+            with startup_report.phase('LLM clients'):
+                transport = get_transport(parameters)
+                self.client = OpenAI(
+                    api_key=parameters['llm_api_key'],
+                    base_url=parameters.get('llm_base_url'),
+                    http_client=transport.client,
+                    timeout=transport.timeout('llm')
+                )
+                # Async client used by the ASGI serving mode (asgi.py)
+                self.async_client = AsyncOpenAI(
+                    api_key=parameters['llm_api_key'],
+                    base_url=parameters.get('llm_base_url'),
+                    http_client=transport.async_client,
+                    timeout=transport.timeout('llm')
+                )
+            
+            # Bounds the concurrent LLM calls, queueing then shedding the excess (HTTP 503) under load spikes
+            self.llm_limiter = create_limiter(parameters, 'llm')
+            
+            with startup_report.phase('prompt template'):
+                self.retrieval_qa_chat_prompt = self.create_prompt()
         
-        self.retrieval_qa_chat_prompt = self.create_prompt()
-        self.retriever = Retriever(self.parameters)
+        # Keeps each prompt within an input token budget (merged overlapping chunks, no near-duplicates, short history)
+        self.context_assembler = ContextAssembler(
+            shared.context_assembler.token_counter if shared is not None else TokenCounter(),
+            max_tokens=parameters.get('prompt_max_tokens', 3000),
+            history_max_tokens=parameters.get('history_max_tokens', 1000),
+            dedup_threshold=parameters.get('context_dedup_threshold', 0.8)
+        )
+        self._prompt_overhead_tokens = self.context_assembler.token_counter.count(
+            SYSTEM_MESSAGE + self.retrieval_qa_chat_prompt.format(
+                context="", history=NO_HISTORY_MESSAGE, date="September 30, 2000",
+                resume_owner_name=parameters['resume_owner_name'], input=""
+            )
+        )
+        self.retriever = Retriever(self.parameters, embeddings=shared.retriever.embeddings if shared is not None else None)
+        self.retrieval_k = parameters.get('retrieval_k', 3)
         self.vector_store = self.retriever.get_vector_store()
         
+        # Server-side conversation memory: recent turns verbatim, older ones folded into a rolling summary
+        if shared is not None:
+            self.session_memory = shared.session_memory  # Session IDs are scoped by tenant, see `_session_key`
+        else:
+            self.session_memory = SessionMemory(
+                create_session_store(parameters),
+                summarizer=self._summarize_turns if parameters.get('session_summary_enabled', True) else None,
+                max_turns=parameters.get('session_max_turns', 6),
+                summarize_every=parameters.get('session_summarize_every', 4),
+                max_turn_chars=parameters.get('session_max_turn_chars', 2000)
+            )
+        
+        # Answers are only cacheable when generation is deterministic
+        self.answer_cache = None
+        if parameters.get('answer_cache_enabled', True) and parameters.get('llm_temperature', 0) == 0:
+            self.answer_cache = AnswerCache(
+                max_size=parameters.get('answer_cache_size', 512),
+                ttl=parameters.get('answer_cache_ttl', 86400),
+                similarity_threshold=parameters.get('answer_cache_similarity_threshold', 0.95)
+            )
+        
+        # Concurrent identical questions wait for the first one's answer instead of each calling the LLM
+        self.single_flight = self.async_single_flight = None
+        if parameters.get('single_flight_enabled', True):
+            self.single_flight = SingleFlight()
+            self.async_single_flight = AsyncSingleFlight()
+        
+        # Precomputed answers to the frequent questions (written by index_resume.py), served from the first request
+        if self.answer_cache is not None:
+            with startup_report.phase('FAQ warmup'):
+                self.load_faq_answers(parameters.get('faq_answers_path'))
+        
         self.chatbot_welcome_message = (
             f"Hi! I'm {parameters['resume_owner_name']}. "
             f"I've created this chatbot to help you learn more about my background, experience, and skills. "
@@ -31,7 +139,7 @@ class ChatBot():
             f"How can I help you today?"
         )
 
-    def answer(self, query, conversation, conv_last_n_messages=6, fake_conversation=False):
+    def answer(self, query, conversation, conv_last_n_messages=6, fake_conversation=False, session_id=None):
         """Generates a response to the user's query based on the resume data and conversation history.
         
         Args:
@@ -41,75 +149,721 @@ class ChatBot():
                 conversation history. Defaults to 6.
             fake_conversation (bool, optional): If True, returns a fake response for testing purposes. 
                 Defaults to False.
+            session_id (str, optional): The ID of a server-side session, whose history is added to the prompt and 
+                which records the new turn. Defaults to None (stateless).
         
         Returns:
-            dict: A dictionary containing the user's input, context, and the chatbot's response.
+            dict: A dictionary containing the user's input, context, the chatbot's response, the answer
+                cache level that served it ('exact', 'semantic' or None), and the number of input tokens of the
+                assembled prompt (None when no prompt was sent).
         """
         if fake_conversation:
             # Return fake answer to test the solution without using the paid services 
             result = {
                 'input': 'Fake question',
                 'context': [],
-                'answer': 'This is a fake answer to test the solution without spending LLM tokens...'
+                'answer': 'This is a fake answer to test the solution without spending LLM tokens...',
+                'cache_hit': None,
+                'prompt_tokens': None
             }
             return result
         else:
-            # Process the conversation history to provide context for the chatbot
-            if len(conversation) > 2:
-                # Removing first and last message
-                conversation = conversation[1:-1]
-                # Keeping the last "conv_last_n_messages" messages of the historic conversation
-                if conv_last_n_messages is not None: 
-                    conv_last_n_messages = conv_last_n_messages * -1
-                    conv_hist = "\n".join([str(entry) for entry in conversation[conv_last_n_messages:]])  
-                else:
-                    # The entire historic conversation
-                    conv_hist = "\n".join([str(entry) for entry in conversation])   
+            conv_hist = self._session_history(session_id) + self._format_history(conversation, conv_last_n_messages)
+
+            if self.single_flight is None:
+                result = self._generate_answer(query, conv_hist)
             else:
-                conv_hist = 'There is no previous messages'
+                # Identical questions asked concurrently (same history and index) share one computation
+                result = dict(self.single_flight.do(self._flight_key(query, conv_hist), self._generate_answer, query, conv_hist), input=query)
+            if result['answer'] != ERROR_MESSAGE:
+                self._record_turn(session_id, query, result['answer'])
+            return result
+
+    def _generate_answer(self, query, conv_hist):
+        """Answers a question from the answer cache, or with the retrieved context and the LLM (see `answer`).
+        
+        Args:
+            query (str): The user's question.
+            conv_hist (list): The conversation history entries.
+        
+        Returns:
+            dict: The result returned by `answer`.
+        """
+        # Answers only depend on the question when there is no conversation history
+        use_cache = self.answer_cache is not None and not conv_hist
+        query_embedding = None
+        if use_cache:
+            cached, query_embedding = self._lookup_answer_cache(query)
+            if cached is not None:
+                return cached
+        
+        search_results = self._search(query, query_embedding)
+        messages, input_tokens = self._build_messages(query, conv_hist, search_results)
+        
+        # Generate response using the LLM
+        try:
+            with self.llm_limiter.slot(), stage('llm'):
+                response = self.client.chat.completions.create(
+                    model=self.parameters['llm_model'],
+                    messages=messages,
+                    temperature=self.parameters.get('llm_temperature', 0),
+                    max_tokens=500
+                )
+            self._record_usage(response)
             
+            answer = response.choices[0].message.content
+            
+            if use_cache:
+                self.answer_cache.put(query, self._cache_namespace(), answer, context=search_results, embedding=query_embedding)
+            
+        except AdmissionError:
+            raise  # Answered with HTTP 503 and Retry-After rather than the apology message
+        except Exception as e:
+            # Log error and return a user-friendly message
+            print(f"Error generating response: {str(e)}")
+            answer = ERROR_MESSAGE
+        
+        return {
+            'input': query,
+            'context': search_results,
+            'answer': answer,
+            'cache_hit': None,
+            'prompt_tokens': input_tokens
+        }
+
+    def answer_stream(self, query, conversation, conv_last_n_messages=6, session_id=None):
+        """Generates a response like `answer`, but yields the text as soon as the LLM provider emits it.
+        
+        Args:
+            query (str): The user's question or input.
+            conversation (list): The history of the conversation between the user and the chatbot.
+            conv_last_n_messages (int, optional): The number of recent messages to consider from the 
+                conversation history. Defaults to 6.
+            session_id (str, optional): The ID of a server-side session (see `answer`). Defaults to None.
+        
+        Yields:
+            str: Successive pieces of the chatbot's response. A cached answer is yielded in one piece, and an 
+                error ends the stream with the same user-friendly message as `answer`, as a `StreamError`.
+        
+        Raises:
+            AdmissionError: When the LLM limiter sheds the request (before any piece is yielded).
+        """
+        tokens = []
+        try:
+            conv_hist = self._session_history(session_id) + self._format_history(conversation, conv_last_n_messages)
+
+            use_cache = self.answer_cache is not None and not conv_hist
+            query_embedding = None
+            if use_cache:
+                cached, query_embedding = self._lookup_answer_cache(query)
+                if cached is not None:
+                    self._record_turn(session_id, query, cached['answer'])
+                    yield cached['answer']
+                    return
+
+            search_results = self._search(query, query_embedding)
+            messages, _ = self._build_messages(query, conv_hist, search_results)
+
+            with self.llm_limiter.slot(), stage('llm'):
+                start = time.perf_counter()
+                stream = self.client.chat.completions.create(
+                    model=self.parameters['llm_model'],
+                    messages=messages,
+                    temperature=self.parameters.get('llm_temperature', 0),
+                    max_tokens=500,
+                    stream=True
+                )
+                for chunk in stream:
+                    self._record_usage(chunk)
+                    if not chunk.choices:
+                        continue
+                    token = chunk.choices[0].delta.content
+                    if token:
+                        if not tokens:
+                            stage_seconds.observe(time.perf_counter() - start, 'llm_first_token')
+                        tokens.append(token)
+                        yield token
+
+            if use_cache:
+                self.answer_cache.put(query, self._cache_namespace(), "".join(tokens), context=search_results, embedding=query_embedding)
+            self._record_turn(session_id, query, "".join(tokens))
+
+        except AdmissionError:
+            raise  # Raised before the first piece, so the route can still answer with HTTP 503 and Retry-After
+        except Exception as e:
+            # Log error and finish the stream with a user-friendly message
+            print(f"Error generating response: {str(e)}")
+            yield StreamError(("\n\n" if tokens else "") + ERROR_MESSAGE)
+
+    async def aanswer(self, query, conversation, conv_last_n_messages=6, fake_conversation=False, session_id=None):
+        """Async version of `answer`: the embedding, the vector search and the LLM call do not block the event loop.
+        
+        Args:
+            query (str): The user's question or input.
+            conversation (list): The history of the conversation between the user and the chatbot.
+            conv_last_n_messages (int, optional): The number of recent messages to consider from the 
+                conversation history. Defaults to 6.
+            fake_conversation (bool, optional): If True, returns a fake response for testing purposes. 
+                Defaults to False.
+            session_id (str, optional): The ID of a server-side session, whose history is added to the prompt and 
+                which records the new turn. Defaults to None (stateless).
+        
+        Returns:
+            dict: A dictionary containing the user's input, context, the chatbot's response, the answer
+                cache level that served it ('exact', 'semantic' or None), and the number of input tokens of the
+                assembled prompt (None when no prompt was sent).
+        """
+        if fake_conversation:
+            return self.answer(query, conversation, fake_conversation=True)
+
+        conv_hist = await self._asession_history(session_id) + self._format_history(conversation, conv_last_n_messages)
+
+        if self.async_single_flight is None:
+            result = await self._agenerate_answer(query, conv_hist)
+        else:
+            result = dict(await self.async_single_flight.do(self._flight_key(query, conv_hist), self._agenerate_answer, query, conv_hist), input=query)
+        if result['answer'] != ERROR_MESSAGE:
+            await self._arecord_turn(session_id, query, result['answer'])
+        return result
+
+    async def _agenerate_answer(self, query, conv_hist):
+        """Async version of `_generate_answer`."""
+        use_cache = self.answer_cache is not None and not conv_hist
+        query_embedding = None
+        if use_cache:
+            cached, query_embedding = await self._alookup_answer_cache(query)
+            if cached is not None:
+                return cached
+
+        search_results = await self._asearch(query, query_embedding)
+        messages, input_tokens = self._build_messages(query, conv_hist, search_results)
+
+        try:
+            async with self.llm_limiter.aslot():
+                with stage('llm'):
+                    response = await self.async_client.chat.completions.create(
+                        model=self.parameters['llm_model'],
+                        messages=messages,
+                        temperature=self.parameters.get('llm_temperature', 0),
+                        max_tokens=500
+                    )
+            self._record_usage(response)
+
+            answer = response.choices[0].message.content
+
+            if use_cache:
+                self.answer_cache.put(query, self._cache_namespace(), answer, context=search_results, embedding=query_embedding)
+
+        except AdmissionError:
+            raise
+        except Exception as e:
+            # Log error and return a user-friendly message
+            print(f"Error generating response: {str(e)}")
+            answer = ERROR_MESSAGE
+
+        return {
+            'input': query,
+            'context': search_results,
+            'answer': answer,
+            'cache_hit': None,
+            'prompt_tokens': input_tokens
+        }
+
+    async def aanswer_stream(self, query, conversation, conv_last_n_messages=6, session_id=None):
+        """Async version of `answer_stream`.
+        
+        Yields:
+            str: Successive pieces of the chatbot's response.
+        """
+        tokens = []
+        try:
+            conv_hist = await self._asession_history(session_id)
+            conv_hist = conv_hist + self._format_history(conversation, conv_last_n_messages)
+
+            use_cache = self.answer_cache is not None and not conv_hist
+            query_embedding = None
+            if use_cache:
+                cached, query_embedding = await self._alookup_answer_cache(query)
+                if cached is not None:
+                    await self._arecord_turn(session_id, query, cached['answer'])
+                    yield cached['answer']
+                    return
+
+            search_results = await self._asearch(query, query_embedding)
+            messages, _ = self._build_messages(query, conv_hist, search_results)
+
+            async with self.llm_limiter.aslot():
+                with stage('llm'):
+                    start = time.perf_counter()
+                    stream = await self.async_client.chat.completions.create(
+                        model=self.parameters['llm_model'],
+                        messages=messages,
+                        temperature=self.parameters.get('llm_temperature', 0),
+                        max_tokens=500,
+                        stream=True
+                    )
+                    async for chunk in stream:
+                        self._record_usage(chunk)
+                        if not chunk.choices:
+                            continue
+                        token = chunk.choices[0].delta.content
+                        if token:
+                            if not tokens:
+                                stage_seconds.observe(time.perf_counter() - start, 'llm_first_token')
+                            tokens.append(token)
+                            yield token
+
+            if use_cache:
+                self.answer_cache.put(query, self._cache_namespace(), "".join(tokens), context=search_results, embedding=query_embedding)
+            await self._arecord_turn(session_id, query, "".join(tokens))
+
+        except AdmissionError:
+            raise  # Raised before the first piece, so the route can still answer with HTTP 503 and Retry-After
+        except Exception as e:
+            # Log error and finish the stream with a user-friendly message
+            print(f"Error generating response: {str(e)}")
+            yield StreamError(("\n\n" if tokens else "") + ERROR_MESSAGE)
+
+    def answer_batch(self, queries, max_concurrency=None):
+        """Answers several independent questions at once (without conversation history).
+        
+        All the questions are embedded in one batch call, the vector searches run together, the chunks retrieved 
+        by several questions are shared, and the LLM generations run concurrently.
+        
+        Args:
+            queries (list): The user's questions.
+            max_concurrency (int, optional): The maximum number of concurrent LLM generations. Defaults to the 
+                `batch_max_concurrency` parameter.
+        
+        Returns:
+            list: One dictionary per question, in input order, with the question, the answer, the cache level 
+                that served it, and a status ('success' or 'error', with the error message).
+        """
+        max_concurrency = max_concurrency or self.parameters.get('batch_max_concurrency', 4)
+        results, todo = self._prepare_batch(queries)
+        if not todo:
+            return results
+
+        query_embeddings = self.retriever.embed_queries([queries[i] for i in todo])
+        todo, query_embeddings = self._lookup_batch_similar(queries, results, todo, query_embeddings)
+        if not todo:
+            return results
+
+        search_results = self.retriever.search_batch([queries[i] for i in todo], query_embeddings, k=self.retrieval_k,
+                                                     max_concurrency=max_concurrency)
+        search_results = self._dedup_chunks(search_results)
+
+        def generate(position):
+            i = todo[position]
+            messages, _ = self._build_messages(queries[i], [], search_results[position])
+            try:
+                with self.llm_limiter.slot(), stage('llm'):
+                    response = self.client.chat.completions.create(
+                        model=self.parameters['llm_model'],
+                        messages=messages,
+                        temperature=self.parameters.get('llm_temperature', 0),
+                        max_tokens=500
+                    )
+                self._record_usage(response)
+                return response.choices[0].message.content, None
+            except Exception as e:
+                print(f"Error generating response: {str(e)}")
+                return None, e
+
+        with ThreadPoolExecutor(max_workers=min(len(todo), max_concurrency)) as executor:
+            generations = list(executor.map(generate, range(len(todo))))
+
+        self._store_batch(queries, results, todo, query_embeddings, search_results, generations)
+        return results
+
+    async def aanswer_batch(self, queries, max_concurrency=None):
+        """Async version of `answer_batch`."""
+        max_concurrency = max_concurrency or self.parameters.get('batch_max_concurrency', 4)
+        results, todo = self._prepare_batch(queries)
+        if not todo:
+            return results
+
+        query_embeddings = await self.retriever.aembed_queries([queries[i] for i in todo])
+        todo, query_embeddings = self._lookup_batch_similar(queries, results, todo, query_embeddings)
+        if not todo:
+            return results
+
+        search_results = await self.retriever.asearch_batch([queries[i] for i in todo], query_embeddings, k=self.retrieval_k)
+        search_results = self._dedup_chunks(search_results)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def generate(position):
+            i = todo[position]
+            messages, _ = self._build_messages(queries[i], [], search_results[position])
+            async with semaphore:
+                try:
+                    async with self.llm_limiter.aslot():
+                        with stage('llm'):
+                            response = await self.async_client.chat.completions.create(
+                                model=self.parameters['llm_model'],
+                                messages=messages,
+                                temperature=self.parameters.get('llm_temperature', 0),
+                                max_tokens=500
+                            )
+                    self._record_usage(response)
+                    return response.choices[0].message.content, None
+                except Exception as e:
+                    print(f"Error generating response: {str(e)}")
+                    return None, e
+
+        generations = await asyncio.gather(*[generate(position) for position in range(len(todo))])
+
+        self._store_batch(queries, results, todo, query_embeddings, search_results, generations)
+        return results
+
+    def _prepare_batch(self, queries):
+        """Fills the batch results of empty questions and exact answer cache hits.
+        
+        Returns:
+            tuple: The results list (None for the questions still to answer) and the indexes still to answer.
+        """
+        results = [None] * len(queries)
+        todo = []
+        for i, query in enumerate(queries):
+            if not query:
+                results[i] = {'question': query, 'answer': None, 'cache_hit': None,
+                              'status': 'error', 'error': 'No question provided'}
+                continue
+            if self.answer_cache is not None:
+                cached = self.answer_cache.get_exact(query, self._cache_namespace())
+                if cached is not None:
+                    answer_cache_lookups.inc('exact')
+                    results[i] = {'question': query, 'answer': cached['answer'], 'cache_hit': 'exact', 'status': 'success'}
+                    continue
+            todo.append(i)
+        return results, todo
+
+    def _lookup_batch_similar(self, queries, results, todo, query_embeddings):
+        """Fills the batch results of paraphrase answer cache hits.
+        
+        Returns:
+            tuple: The indexes still to answer and their query embeddings.
+        """
+        if self.answer_cache is None:
+            return todo, query_embeddings
+
+        remaining, remaining_embeddings = [], []
+        for i, query_embedding in zip(todo, query_embeddings):
+            with stage('answer_cache'):
+                cached = self.answer_cache.get_similar(query_embedding, self._cache_namespace())
+            if cached is not None:
+                answer_cache_lookups.inc('semantic')
+                results[i] = {'question': queries[i], 'answer': cached['answer'], 'cache_hit': 'semantic', 'status': 'success'}
+            else:
+                answer_cache_lookups.inc('miss')
+                remaining.append(i)
+                remaining_embeddings.append(query_embedding)
+        return remaining, remaining_embeddings
+
+    def _dedup_chunks(self, search_results):
+        """Removes the chunks repeated within a question's results, and makes the questions that retrieved the same 
+        chunk share a single Document object.
+        
+        Args:
+            search_results (list): One list of Document objects per question.
+        
+        Returns:
+            list: The deduplicated lists of Document objects.
+        """
+        unique_chunks = {}
+        deduplicated = []
+        for docs in search_results:
+            seen = set()
+            kept = []
+            for doc in docs:
+                key = (doc.metadata.get('source'), doc.metadata.get('chunk_id'), doc.page_content)
+                if key in seen:
+                    continue
+                seen.add(key)
+                kept.append(unique_chunks.setdefault(key, doc))
+            deduplicated.append(kept)
+        return deduplicated
+
+    def _store_batch(self, queries, results, todo, query_embeddings, search_results, generations):
+        """Fills the batch results of the generated answers and caches the successful ones."""
+        for position, (answer, error) in enumerate(generations):
+            i = todo[position]
+            if error is not None:
+                results[i] = {'question': queries[i], 'answer': ERROR_MESSAGE, 'cache_hit': None,
+                              'status': 'error', 'error': str(error)}
+                continue
+            results[i] = {'question': queries[i], 'answer': answer, 'cache_hit': None, 'status': 'success'}
+            if self.answer_cache is not None:
+                self.answer_cache.put(queries[i], self._cache_namespace(), answer,
+                                      context=search_results[position], embedding=query_embeddings[position])
+
+    def precompute_faq(self, questions, faq_answers_path):
+        """Answers the frequent questions and writes the answers, their context and the question embeddings to a file
+        that `load_faq_answers` loads into the answer cache at startup.
+        
+        Args:
+            questions (list): The frequent questions.
+            faq_answers_path (str): The path of the FAQ answers file.
+        
+        Returns:
+            int: The number of answers written.
+        """
+        if self.answer_cache is None:
+            print("Answer cache disabled (ANSWER_CACHE_ENABLED=false or LLM_TEMPERATURE > 0), FAQ answers not precomputed.")
+            return 0
+        
+        results = self.answer_batch(questions)
+        answered = {AnswerCache.normalize_question(result['question'])
+                    for result in results if result['status'] == 'success'}
+        namespace = self._cache_namespace()
+        entries = [
+            {
+                'question': question,
+                'answer': entry['answer'],
+                'context': [{'page_content': doc.page_content, 'metadata': doc.metadata} for doc in entry['context']],
+                'embedding': entry['embedding'].tolist() if entry['embedding'] is not None else None,
+            }
+            for question, entry in self.answer_cache.export(namespace) if question in answered
+        ]
+        
+        directory = os.path.dirname(faq_answers_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(faq_answers_path, 'w', encoding='utf-8') as file:
+            json.dump({'namespace': list(namespace), 'entries': entries}, file, ensure_ascii=False)
+        return len(entries)
+
+    def load_faq_answers(self, faq_answers_path):
+        """Loads the precomputed FAQ answers into the answer cache. Answers generated from another index content,
+        model or temperature are stale and ignored.
+        
+        Args:
+            faq_answers_path (str): The path of the FAQ answers file.
+        
+        Returns:
+            int: The number of answers loaded.
+        """
+        if self.answer_cache is None or not faq_answers_path or not os.path.exists(faq_answers_path):
+            return 0
+        
+        from langchain_core.documents import Document
+        
+        with open(faq_answers_path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        namespace = self._cache_namespace()
+        if data.get('namespace') != list(namespace):
+            print(f"FAQ answers in '{faq_answers_path}' are stale (the index content, model or temperature changed), "
+                  f"re-run index_resume.py to refresh them.")
+            return 0
+        
+        for entry in data['entries']:
+            context = [Document(page_content=doc['page_content'], metadata=doc['metadata']) for doc in entry['context']]
+            self.answer_cache.put(entry['question'], namespace, entry['answer'], context=context,
+                                  embedding=entry['embedding'])
+        print(f"Loaded {len(data['entries'])} precomputed FAQ answers from '{faq_answers_path}'.")
+        return len(data['entries'])
+
+    def _format_history(self, conversation, conv_last_n_messages):
+        """Turns the conversation history into the entries inserted in the prompt.
+        
+        Args:
+            conversation (list): The history of the conversation between the user and the chatbot.
+            conv_last_n_messages (int): The number of recent messages to keep, or None to keep them all.
+        
+        Returns:
+            list: The conversation history entries (strings), oldest first. Empty when there is no history.
+        """
+        if len(conversation) > 2:
+            # Removing first and last message
+            conversation = conversation[1:-1]
+            # Keeping the last "conv_last_n_messages" messages of the historic conversation
+            if conv_last_n_messages is not None: 
+                conv_last_n_messages = conv_last_n_messages * -1
+                return [str(entry) for entry in conversation[conv_last_n_messages:]]
+            # The entire historic conversation
+            return [str(entry) for entry in conversation]
+        return []
+
+    def admission_stats(self):
+        """Returns the state of the LLM and embedding concurrency limiters."""
+        embedding_limiter = getattr(self.retriever.embeddings, 'limiter', None)
+        return {
+            'llm': self.llm_limiter.stats(),
+            'embedding': embedding_limiter.stats() if embedding_limiter is not None else None,
+        }
+
+    def _session_key(self, session_id):
+        """Returns the key of a session in the session store, scoped by tenant (tenants share the store)."""
+        return session_id if self.tenant is None else f"{self.tenant}/{session_id}"
+
+    def _session_history(self, session_id):
+        """Returns the history entries of a server-side session (summary first), or an empty list."""
+        if session_id is None:
+            return []
+        return self.session_memory.history(self._session_key(session_id))
+
+    def _record_turn(self, session_id, query, answer):
+        """Records a question and its answer in a server-side session."""
+        if session_id is not None:
+            self.session_memory.record(self._session_key(session_id), query, answer)
+
+    async def _asession_history(self, session_id):
+        """Async version of `_session_history`: the session store (e.g. SQLite) is read in a worker thread."""
+        if session_id is None:
+            return []
+        return await asyncio.get_running_loop().run_in_executor(None, self._session_history, session_id)
+
+    async def _arecord_turn(self, session_id, query, answer):
+        """Async version of `_record_turn`: the session store (e.g. SQLite) is written in a worker thread."""
+        if session_id is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._record_turn, session_id, query, answer)
+
+    def _summarize_turns(self, summary, turns):
+        """Folds old conversation turns into the rolling summary of a session with the LLM.
+        
+        Args:
+            summary (str): The current summary (empty if none).
+            turns (list): The turns to fold in, oldest first.
+        
+        Returns:
+            str: The new summary.
+        """
+        turns_text = "\n".join(turns)
+        response = self.client.chat.completions.create(
+            model=self.parameters['llm_model'],
+            messages=[
+                {"role": "system", "content": "You summarize conversations between a recruiter (User) and a candidate (Assistant)."},
+                {"role": "user", "content": (
+                    f"Current summary:\n{summary or 'None'}\n\nNew exchanges:\n{turns_text}\n\n"
+                    f"Write an updated summary of the whole conversation in at most 120 words. Keep the topics the "
+                    f"recruiter asked about and the facts the candidate gave. Answer with the summary only."
+                )}
+            ],
+            temperature=0,
+            max_tokens=200
+        )
+        self._record_usage(response)
+        return response.choices[0].message.content.strip()
+
+    def _flight_key(self, query, conv_hist):
+        """Returns the key under which identical concurrent questions are coalesced: the normalized question, the
+        conversation history and the cache namespace (index version, model, temperature)."""
+        return (AnswerCache.normalize_question(query), tuple(conv_hist), self._cache_namespace())
+
+    def _cache_namespace(self):
+        """Returns the (index version, model, temperature) scope of cached answers."""
+        return (
+            self.retriever.get_index_version(),
+            self.parameters['llm_model'],
+            self.parameters.get('llm_temperature', 0)
+        )
+
+    def _lookup_answer_cache(self, query):
+        """Looks up the answer cache, first for the exact question, then for a paraphrase.
+        
+        Args:
+            query (str): The user's question.
+        
+        Returns:
+            tuple: The cached result (or None on a miss) and the query embedding computed for the paraphrase 
+                lookup (or None if the exact match hit).
+        """
+        cache_namespace = self._cache_namespace()
+        with stage('answer_cache'):
+            cached = self.answer_cache.get_exact(query, cache_namespace)
+        if cached is not None:
+            return self._cached_result(query, cached, 'exact'), None
+
+        query_embedding = self.retriever.embed_query(query)
+        with stage('answer_cache'):
+            cached = self.answer_cache.get_similar(query_embedding, cache_namespace)
+        return self._cached_result(query, cached, 'semantic'), query_embedding
+
+    async def _alookup_answer_cache(self, query):
+        """Async version of `_lookup_answer_cache`."""
+        cache_namespace = self._cache_namespace()
+        with stage('answer_cache'):
+            cached = self.answer_cache.get_exact(query, cache_namespace)
+        if cached is not None:
+            return self._cached_result(query, cached, 'exact'), None
+
+        query_embedding = await self.retriever.aembed_query(query)
+        with stage('answer_cache'):
+            cached = self.answer_cache.get_similar(query_embedding, cache_namespace)
+        return self._cached_result(query, cached, 'semantic'), query_embedding
+
+    def _cached_result(self, query, cached, cache_level):
+        """Builds the result of `answer` from an answer cache entry, or returns None on a miss."""
+        answer_cache_lookups.inc(cache_level if cached is not None else 'miss')
+        if cached is None:
+            return None
+        return {
+            'input': query,
+            'context': cached['context'],
+            'answer': cached['answer'],
+            'cache_hit': cache_level,
+            'prompt_tokens': None
+        }
+
+    def _search(self, query, query_embedding=None):
+        """Searches for relevant context from the resume.
+        
+        Args:
+            query (str): The user's question.
+            query_embedding (list, optional): The query embedding, if it was already computed.
+        
+        Returns:
+            list: The most relevant Document objects (hybrid lexical and vector retrieval, see `Retriever.search`).
+        """
+        return self.retriever.search(query, k=self.retrieval_k, query_embedding=query_embedding)
+
+    async def _asearch(self, query, query_embedding=None):
+        """Async version of `_search`."""
+        return await self.retriever.asearch(query, k=self.retrieval_k, query_embedding=query_embedding)
+
+    def _record_usage(self, response):
+        """Counts the prompt and completion tokens of an LLM response (or stream chunk) that reports its usage."""
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            llm_tokens.inc('prompt', amount=usage.prompt_tokens or 0)
+            llm_tokens.inc('completion', amount=usage.completion_tokens or 0)
+
+    def _build_messages(self, query, conv_hist, search_results):
+        """Formats the prompt with all necessary information and wraps it in chat messages. The context and the 
+        history are assembled within the input token budget.
+        
+        Args:
+            query (str): The user's question.
+            conv_hist (list): The conversation history entries, oldest first.
+            search_results (list): The Document objects retrieved for the question.
+        
+        Returns:
+            tuple: The messages to send to the LLM, and their number of input tokens.
+        """
+        with stage('prompt'):
             current_date = datetime.now()
             current_date = current_date.strftime("%B %d, %Y")
 
-            # Search for relevant context from the resume
-            search_results = self.vector_store.similarity_search(query, k=3)
-            context = "\n\n".join([doc.page_content for doc in search_results])
+            fixed_tokens = self._prompt_overhead_tokens + self.context_assembler.token_counter.count(query)
+            context_docs, history, input_tokens, saved_tokens = self.context_assembler.assemble(
+                search_results, conv_hist, fixed_tokens
+            )
+            context = "\n\n".join([doc.page_content for doc in context_docs])
             
-            # Format the prompt with all necessary information
             prompt = self.retrieval_qa_chat_prompt.format(
                 context=context,
-                history=conv_hist,
+                history="\n".join(history) if history else NO_HISTORY_MESSAGE,
                 date=current_date,
                 resume_owner_name=self.parameters['resume_owner_name'],
                 input=query
             )
-            
-            # Generate response using the LLM
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.parameters['llm_model'],
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant specialized in answering questions about resumes."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=self.parameters.get('llm_temperature', 0),
-                    max_tokens=500
-                )
-                
-                answer = response.choices[0].message.content
-                
-            except Exception as e:
-                # Log error and return a user-friendly message
-                print(f"Error generating response: {str(e)}")
-                answer = f"I apologize, but I encountered an error while processing your question. Please try again or rephrase your question."
-            
-            result = {
-                'input': query,
-                'context': search_results,
-                'answer': answer
-            }
-            
-            return result
+        prompt_tokens.observe(input_tokens)
+        context_tokens_saved.observe(saved_tokens)
+        return [
+            {"role": "system", "content": SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ], input_tokens
         
     def create_prompt(self):
         """Creates a custom prompt template for the chatbot.
@@ -121,6 +875,8 @@ class ChatBot():
         Returns:
             PromptTemplate: A LangChain prompt template for generating responses.
         """
+        from langchain_core.prompts import PromptTemplate
+        
         return PromptTemplate.from_template("""
 You are {resume_owner_name}, responding to questions about your professional background and experience.
 Answer questions in the FIRST PERSON, as if you are the candidate speaking directly to the recruiter.
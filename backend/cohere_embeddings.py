@@ -0,0 +1,85 @@
+import time
+import asyncio
+
+
+class CohereEmbeddings():
+    """Cohere Embeddings Class
+    This class calls Cohere's embed endpoint through the shared pooled HTTP clients of an HttpTransport. It replaces
+    LangChain's CohereEmbeddings, whose cohere 4.x SDK opens a new HTTP session (and TLS handshake) for every call.
+    It implements the LangChain Embeddings interface, plus `embed`/`aembed` with an explicit input type.
+    """
+
+    api_url = 'https://api.cohere.ai/v1/embed'
+    batch_size = 96  # Maximum number of texts per Cohere embed call
+    retry_status_codes = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_key: str, model: str, transport, truncate: str = None, max_retries: int = 3):
+        self.api_key = api_key
+        self.model = model
+        self.transport = transport
+        self.truncate = truncate
+        self.max_retries = max_retries
+
+    def _request_kwargs(self, texts: list, input_type: str):
+        payload = {'model': self.model, 'texts': texts}
+        if input_type:
+            payload['input_type'] = input_type
+        if self.truncate:
+            payload['truncate'] = self.truncate
+        return {
+            'json': payload,
+            'headers': {'Authorization': f"Bearer {self.api_key}", 'Request-Source': 'resume-chatbot'},
+            'timeout': self.transport.timeout('embedding'),
+        }
+
+    def embed(self, texts: list[str], *, input_type: str = None) -> list[list[float]]:
+        """Embeds texts, sending at most `batch_size` texts per call.
+
+        Args:
+            texts (list): The texts to embed.
+            input_type (str, optional): 'search_query' or 'search_document'.
+
+        Returns:
+            list: One embedding per text.
+        """
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            for attempt in range(self.max_retries + 1):
+                response = self.transport.client.post(self.api_url, **self._request_kwargs(batch, input_type))
+                if response.status_code not in self.retry_status_codes or attempt == self.max_retries:
+                    break
+                time.sleep(0.5 * 2 ** attempt)
+            response.raise_for_status()
+            embeddings.extend(response.json()['embeddings'])
+        return [list(map(float, embedding)) for embedding in embeddings]
+
+    async def aembed(self, texts: list[str], *, input_type: str = None) -> list[list[float]]:
+        """Async version of `embed`."""
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            for attempt in range(self.max_retries + 1):
+                response = await self.transport.async_client.post(self.api_url, **self._request_kwargs(batch, input_type))
+                if response.status_code not in self.retry_status_codes or attempt == self.max_retries:
+                    break
+                await asyncio.sleep(0.5 * 2 ** attempt)
+            response.raise_for_status()
+            embeddings.extend(response.json()['embeddings'])
+        return [list(map(float, embedding)) for embedding in embeddings]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embeds a list of document texts."""
+        return self.embed(texts, input_type='search_document')
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embeds a query."""
+        return self.embed([text], input_type='search_query')[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Async version of `embed_documents`."""
+        return await self.aembed(texts, input_type='search_document')
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Async version of `embed_query`."""
+        return (await self.aembed([text], input_type='search_query'))[0]
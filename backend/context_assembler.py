@@ -0,0 +1,207 @@
+import re
+import math
+
+
+class TokenCounter():
+    """Token Counter Class
+    This class counts tokens locally, without calling the LLM provider. It uses tiktoken's encoding when the package
+    is installed (and its encoding file is available), and otherwise a fast approximation of a BPE tokenizer: one
+    token per punctuation mark and one per four characters of each word.
+    """
+
+    _pieces = re.compile(r"\w+|[^\w\s]")
+
+    def __init__(self, encoding: str = 'cl100k_base'):
+        self._encoding = None
+        try:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(encoding)
+        except Exception:
+            # tiktoken is optional (pip install tiktoken), and needs its encoding file on first use
+            pass
+
+    @property
+    def name(self):
+        """The tokenizer in use."""
+        return self._encoding.name if self._encoding is not None else 'approximate'
+
+    def count(self, text: str):
+        """Returns the number of tokens of a text."""
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return sum(math.ceil(len(piece) / 4) for piece in self._pieces.findall(text))
+
+    def truncate(self, text: str, max_tokens: int):
+        """Returns the longest prefix of a text that fits in a number of tokens, cut at a word boundary."""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        if self._encoding is not None:
+            return self._encoding.decode(self._encoding.encode(text, disallowed_special=())[:max_tokens])
+        tokens = 0
+        for match in self._pieces.finditer(text):
+            tokens += math.ceil(len(match.group()) / 4)
+            if tokens > max_tokens:
+                return text[:match.start()].rstrip()
+        return text
+
+
+class ContextAssembler():
+    """Context Assembler Class
+    This class builds the retrieved context and the conversation history inserted in the prompt within a fixed input
+    token budget, so prompt size (and therefore LLM latency and cost) stays bounded:
+    - adjacent chunks of the same source are merged, without repeating the text their split overlap duplicated
+    - passages that are near-duplicates of a better-ranked one are dropped
+    - passages are kept in rank order while they fit; history entries are kept newest first in what remains
+    """
+
+    def __init__(self, token_counter: TokenCounter, max_tokens: int = 3000, history_max_tokens: int = 1000,
+                 dedup_threshold: float = 0.8):
+        self.token_counter = token_counter
+        self.max_tokens = max_tokens
+        self.history_max_tokens = history_max_tokens
+        self.dedup_threshold = dedup_threshold
+
+    @staticmethod
+    def _overlap(first: str, second: str):
+        """Returns the length of the longest suffix of `first` that is a prefix of `second` (at least 20 characters)."""
+        probe = second[:20]
+        if len(probe) < 20:
+            return 0
+        position = first.find(probe, max(0, len(first) - len(second)))
+        while position != -1:
+            if second.startswith(first[position:]):
+                return len(first) - position
+            position = first.find(probe, position + 1)
+        return 0
+
+    def merge_adjacent(self, documents: list):
+        """Merges the chunks that follow each other in the same source (consecutive chunk_id) into one passage.
+
+        Args:
+            documents (list): The retrieved Document objects, best match first.
+
+        Returns:
+            list: The passages (Document objects, 'chunk_end' is set on merged ones), in the rank of their best chunk.
+        """
+        from langchain_core.documents import Document
+
+        by_position = {}
+        for rank, doc in enumerate(documents):
+            chunk_id = doc.metadata.get('chunk_id')
+            if chunk_id is not None:
+                by_position.setdefault((doc.metadata.get('source'), chunk_id), (rank, doc))
+
+        merged = []
+        consumed = set()
+        for rank, doc in enumerate(documents):
+            source, chunk_id = doc.metadata.get('source'), doc.metadata.get('chunk_id')
+            if chunk_id is None:
+                merged.append((rank, doc))
+                continue
+            if (source, chunk_id) in consumed:
+                continue
+
+            # Walk back to the first retrieved chunk of the run, then forward to its last one
+            start = chunk_id
+            while (source, start - 1) in by_position:
+                start -= 1
+            text = by_position[(source, start)][1].page_content
+            best_rank = by_position[(source, start)][0]
+            consumed.add((source, start))
+            end = start
+            while (source, end + 1) in by_position:
+                end += 1
+                next_rank, next_doc = by_position[(source, end)]
+                overlap = self._overlap(text, next_doc.page_content)
+                text += next_doc.page_content[overlap:] if overlap else "\n" + next_doc.page_content
+                best_rank = min(best_rank, next_rank)
+                consumed.add((source, end))
+
+            if start == end:
+                merged.append((best_rank, by_position[(source, start)][1]))
+            else:
+                metadata = dict(by_position[(source, start)][1].metadata, chunk_id=start, chunk_end=end)
+                merged.append((best_rank, Document(page_content=text, metadata=metadata)))
+
+        return [doc for _, doc in sorted(merged, key=lambda item: item[0])]
+
+    @staticmethod
+    def _shingles(text: str):
+        words = text.lower().split()
+        return {" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+
+    def drop_near_duplicates(self, documents: list):
+        """Drops the passages whose word trigrams mostly (Jaccard similarity above the threshold) repeat those of a
+        better-ranked passage."""
+        kept, kept_shingles = [], []
+        for doc in documents:
+            shingles = self._shingles(doc.page_content)
+            if any(len(shingles & other) / max(1, len(shingles | other)) >= self.dedup_threshold
+                   for other in kept_shingles):
+                continue
+            kept.append(doc)
+            kept_shingles.append(shingles)
+        return kept
+
+    def collapse(self, documents: list):
+        """Merges the adjacent chunks and drops the near-duplicate passages of the retrieved documents.
+
+        Args:
+            documents (list): The retrieved Document objects, best match first.
+
+        Returns:
+            tuple: The passages (Document objects), their token counts, and the tokens of repeated text removed.
+        """
+        passages = self.drop_near_duplicates(self.merge_adjacent(documents))
+        passage_tokens = [self.token_counter.count(doc.page_content) for doc in passages]
+        retrieved_tokens = sum(self.token_counter.count(doc.page_content) for doc in documents)
+        return passages, passage_tokens, max(0, retrieved_tokens - sum(passage_tokens))
+
+    def assemble(self, documents: list, history: list, fixed_tokens: int = 0):
+        """Selects the context passages and history entries that fit in the token budget.
+
+        Args:
+            documents (list): The retrieved Document objects, best match first.
+            history (list): The conversation history entries (strings), oldest first.
+            fixed_tokens (int, optional): The tokens of the rest of the prompt (template, question). Defaults to 0.
+
+        Returns:
+            tuple: The context passages (Document objects), the kept history entries (oldest first), the total
+                number of input tokens (fixed part included), and the tokens saved by `collapse`.
+        """
+        from langchain_core.documents import Document
+
+        passages, passage_tokens, saved_tokens = self.collapse(documents)
+
+        available = max(0, self.max_tokens - fixed_tokens)
+        history_tokens = [self.token_counter.count(entry) for entry in history]
+        history_reserve = min(self.history_max_tokens, sum(history_tokens), available)
+
+        context, context_tokens = [], 0
+        for doc, tokens in zip(passages, passage_tokens):
+            if context_tokens + tokens > available - history_reserve:
+                if not context:
+                    # Always keep (the beginning of) the best passage
+                    text = self.token_counter.truncate(doc.page_content, available - history_reserve)
+                    if text:
+                        context.append(Document(page_content=text, metadata=doc.metadata))
+                        context_tokens += self.token_counter.count(text)
+                continue
+            context.append(doc)
+            context_tokens += tokens
+
+        # History is truncated oldest first, within its own cap and what the context left
+        history_budget = min(self.history_max_tokens, available - context_tokens)
+        kept_history, kept_tokens = [], 0
+        for entry, tokens in zip(reversed(history), reversed(history_tokens)):
+            if kept_tokens + tokens > history_budget:
+                break
+            kept_history.append(entry)
+            kept_tokens += tokens
+        kept_history.reverse()
+
+        return context, kept_history, fixed_tokens + context_tokens + kept_tokens, saved_tokens
@@ -0,0 +1,174 @@
+import os
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+from backend.metrics import conversation_log_records
+
+
+class SQLiteConversationSink():
+    """SQLite Conversation Sink Class
+    This class writes conversation records to a local SQLite file, in a `conversation_history` table modelled on the
+    notebook's ConversationHistory table. Another SQL backend (e.g. the Azure SQL database of the notebooks) only
+    needs a class with the same `write(records)` and `close()` methods.
+    """
+
+    columns = ('created', 'client', 'tenant', 'session_id', 'user_query', 'chatbot_answer', 'cache_hit',
+               'prompt_tokens')
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Only the writer thread uses the connection once the log has started
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS conversation_history (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "created TEXT NOT NULL, client TEXT, tenant TEXT, session_id TEXT, user_query TEXT NOT NULL, "
+            "chatbot_answer TEXT NOT NULL, cache_hit TEXT, prompt_tokens INTEGER)"
+        )
+        self._db.commit()
+
+    def write(self, records: list):
+        """Inserts a batch of records (dicts keyed by `columns`) in one transaction."""
+        placeholders = ", ".join("?" for _ in self.columns)
+        with self._db:
+            self._db.executemany(
+                f"INSERT INTO conversation_history ({', '.join(self.columns)}) VALUES ({placeholders})",
+                [tuple(record.get(column) for column in self.columns) for record in records]
+            )
+
+    def close(self):
+        self._db.close()
+
+
+class ConversationLog():
+    """Conversation Log Class
+    This class records every question and answer without slowing requests down (write-behind): `record` only puts
+    the record in a bounded in-memory queue, and a background thread writes the queued records to the sink in
+    batches, once `batch_size` records are waiting or `flush_interval` seconds after the oldest one. When the queue
+    is full (the sink is slow or down), new records are dropped and counted rather than blocking the request.
+    `close` drains the queue before the process exits.
+    """
+
+    _stop = object()  # Queued by `close` after the last record
+
+    def __init__(self, sink, max_queue: int = 10000, batch_size: int = 100, flush_interval: float = 2.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._writer = threading.Thread(target=self._run, name="conversation-log", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def record(self, question: str, answer: str, client: str = None, tenant: str = None, session_id: str = None,
+               cache_hit: str = None, prompt_tokens: int = None):
+        """Queues a question and its answer for the log. Never blocks and never raises.
+
+        Args:
+            question (str): The user's question.
+            answer (str): The chatbot's answer.
+            client (str, optional): The client ID (see `admission.client_id`).
+            tenant (str, optional): The tenant ID (multi-tenant serving).
+            session_id (str, optional): The session ID of the conversation.
+            cache_hit (str, optional): The answer cache level that served the answer ('exact' or 'semantic').
+            prompt_tokens (int, optional): The input tokens of the prompt.
+        """
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait({
+                'created': time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime()),
+                'client': client,
+                'tenant': tenant,
+                'session_id': session_id,
+                'user_query': question,
+                'chatbot_answer': answer or "",
+                'cache_hit': cache_hit,
+                'prompt_tokens': prompt_tokens,
+            })
+        except queue.Full:
+            self.dropped += 1
+            conversation_log_records.inc('dropped')
+
+    def _run(self):
+        """Writer thread: waits for a first record, collects a batch until it is full or the flush interval has
+        passed, and writes it."""
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is self._stop:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is self._stop:
+                    stopping = True  # Everything queued before the stop marker is in the batch
+                    break
+                batch.append(item)
+            self._write(batch)
+        self.sink.close()
+
+    def _write(self, batch: list):
+        try:
+            self.sink.write(batch)
+            self.written += len(batch)
+            conversation_log_records.inc('written', amount=len(batch))
+        except Exception as e:
+            # The batch is lost, the requests it came from were answered long ago
+            self.failed += len(batch)
+            conversation_log_records.inc('failed', amount=len(batch))
+            print(f"Error writing conversation log: {str(e)}")
+
+    def close(self, timeout: float = 10):
+        """Writes the queued records and stops the writer thread (called at exit)."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(self._stop, timeout=timeout)  # Waits for room if the queue is full, the writer empties it
+        except queue.Full:
+            return
+        self._writer.join(timeout)
+
+    def stats(self):
+        """Returns the number of records queued, written, dropped (queue full) and lost to write errors."""
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+
+
+def create_conversation_log(parameters: dict[str, any]):
+    """Creates the conversation log selected by the configuration.
+
+    Args:
+        parameters (dict): The application parameters, as returned by `load_config()`.
+
+    Returns:
+        ConversationLog | None: The conversation log, or None if CONVERSATION_LOG_ENABLED is false.
+    """
+    if not parameters.get('conversation_log_enabled', True):
+        return None
+    return ConversationLog(
+        SQLiteConversationSink(parameters.get('conversation_log_path', os.path.join('data', 'conversations.db'))),
+        max_queue=parameters.get('conversation_log_queue_size', 10000),
+        batch_size=parameters.get('conversation_log_batch_size', 100),
+        flush_interval=parameters.get('conversation_log_flush_interval', 2.0)
+    )
@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from backend.metrics import embedding_cache_lookups
+
+
+class CachedEmbeddings():
+    """Cached Embeddings Class
+    This class wraps an embeddings object (e.g. CohereEmbeddings) and caches the vectors it returns, so repeated
+    questions do not pay for a remote embed call. Entries are keyed by the normalized text, the embedding model and
+    the input type (query or document), kept in a bounded in-memory LRU and optionally persisted in a SQLite file
+    that survives restarts. It implements the LangChain Embeddings interface without importing LangChain.
+    The remote calls of uncached queries (the serving path, not indexing) go through an optional ConcurrencyLimiter.
+    """
+
+    def __init__(self, embeddings, model: str, max_size: int = 1024, cache_path: str = None, limiter=None):
+        self.embeddings = embeddings
+        self.model = model
+        self.max_size = max_size
+        self.cache_path = cache_path
+        self.limiter = limiter
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if cache_path:
+            directory = os.path.dirname(cache_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def normalize_text(text: str):
+        """Normalizes a text so trivially different spellings of the same question share a cache entry."""
+        return " ".join(text.lower().split())
+
+    def _key(self, text: str, input_type: str):
+        raw = f"{self.model}\x00{input_type}\x00{self.normalize_text(text)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _get(self, key: str):
+        """Looks up a vector in memory, then on disk. Must be called with the lock held."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+
+        if self._db is not None:
+            row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                vector = np.frombuffer(row[0], dtype=np.float32).tolist()
+                self._put_memory(key, vector)
+                self.hits += 1
+                self.disk_hits += 1
+                return vector
+
+        self.misses += 1
+        return None
+
+    def _put_memory(self, key: str, vector: list):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _put(self, items: list):
+        """Stores (key, vector) pairs in memory and on disk. Must be called with the lock held."""
+        for key, vector in items:
+            self._put_memory(key, vector)
+
+        if self._db is not None and items:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                [(key, self.model, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+            )
+            self._db.commit()
+
+    def _lookup(self, texts: list, input_type: str):
+        """Returns the cache keys of the texts and their cached vectors (None for the missing ones)."""
+        keys = [self._key(text, input_type) for text in texts]
+        with self._lock:
+            vectors = [self._get(key) for key in keys]
+        misses = vectors.count(None)
+        if misses < len(vectors):
+            embedding_cache_lookups.inc('hit', amount=len(vectors) - misses)
+        if misses:
+            embedding_cache_lookups.inc('miss', amount=misses)
+        return keys, vectors
+
+    def _store(self, keys: list, vectors: list, missing: list, new_vectors: list):
+        """Fills the missing vectors with the newly computed ones and caches them."""
+        for i, vector in zip(missing, new_vectors):
+            vectors[i] = list(vector)
+        with self._lock:
+            self._put([(keys[i], vectors[i]) for i in missing])
+        return vectors
+
+    def _embed(self, texts: list, input_type: str, embed_function):
+        keys, vectors = self._lookup(texts, input_type)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return vectors
+        if self.limiter is None or input_type != 'query':
+            return self._store(keys, vectors, missing, embed_function([texts[i] for i in missing]))
+        with self.limiter.slot():
+            new_vectors = embed_function([texts[i] for i in missing])
+        return self._store(keys, vectors, missing, new_vectors)
+
+    async def _aembed(self, texts: list, input_type: str, embed_function):
+        keys, vectors = self._lookup(texts, input_type)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return vectors
+        if self.limiter is None or input_type != 'query':
+            return self._store(keys, vectors, missing, await embed_function([texts[i] for i in missing]))
+        async with self.limiter.aslot():
+            new_vectors = await embed_function([texts[i] for i in missing])
+        return self._store(keys, vectors, missing, new_vectors)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embeds a list of documents, calling the wrapped embeddings only for the uncached ones.
+
+        Args:
+            texts (list): The texts to embed.
+
+        Returns:
+            list: One embedding per text.
+        """
+        return self._embed(texts, 'document', self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embeds a query, calling the wrapped embeddings only on a cache miss.
+
+        Args:
+            text (str): The query to embed.
+
+        Returns:
+            list: The query embedding.
+        """
+        return self._embed([text], 'query', lambda texts: [self.embeddings.embed_query(texts[0])])[0]
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embeds several queries, sending all the uncached ones in a single batch call when the wrapped embeddings
+        support it (Cohere's `embed` with an input type).
+
+        Args:
+            texts (list): The queries to embed.
+
+        Returns:
+            list: One embedding per query.
+        """
+        if hasattr(self.embeddings, 'embed'):
+            embed_function = lambda batch: self.embeddings.embed(batch, input_type='search_query')
+        else:
+            embed_function = lambda batch: [self.embeddings.embed_query(text) for text in batch]
+        return self._embed(texts, 'query', embed_function)
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Async version of `embed_queries`."""
+        async def embed_function(batch):
+            if hasattr(self.embeddings, 'aembed'):
+                return await self.embeddings.aembed(batch, input_type='search_query')
+            return [await self.embeddings.aembed_query(text) for text in batch]
+        return await self._aembed(texts, 'query', embed_function)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Async version of `embed_documents`."""
+        return await self._aembed(texts, 'document', self.embeddings.aembed_documents)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Async version of `embed_query`."""
+        async def embed_function(texts):
+            return [await self.embeddings.aembed_query(texts[0])]
+        return (await self._aembed([text], 'query', embed_function))[0]
+
+    def stats(self):
+        """Returns the cache hit/miss counters.
+
+        Returns:
+            dict: The number of hits (of which disk hits), misses, and entries held in memory.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'memory_entries': len(self._memory),
+            }
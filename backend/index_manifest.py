@@ -0,0 +1,102 @@
+import os
+import json
+import hashlib
+import threading
+
+
+def content_chunk_id(source: str, text: str, occurrences: dict):
+    """Computes the deterministic ID of one chunk from its content. Identical chunks within a source are told apart
+    by their occurrence number, tracked in `occurrences` (one dict per source, updated in place).
+
+    Args:
+        source (str): The name of the source file.
+        text (str): The content of the chunk.
+        occurrences (dict): The number of times each content digest was already seen in the source.
+
+    Returns:
+        str: The chunk ID.
+    """
+    digest = hashlib.sha256(f"{source}\x00{text}".encode('utf-8')).hexdigest()[:32]
+    occurrence = occurrences.get(digest, 0)
+    occurrences[digest] = occurrence + 1
+    return digest if occurrence == 0 else f"{digest}-{occurrence}"
+
+
+def content_chunk_ids(chunks, source: str):
+    """Computes deterministic chunk IDs from the chunks' content, so an unchanged chunk keeps the same ID across
+    re-indexing runs.
+
+    Args:
+        chunks (list): The Document objects of one source.
+        source (str): The name of the source file.
+
+    Returns:
+        list: One ID per chunk.
+    """
+    occurrences = {}
+    return [content_chunk_id(source, chunk.page_content, occurrences) for chunk in chunks]
+
+
+class IndexManifest():
+    """Index Manifest Class
+    This class keeps a local record of what is already indexed: for each source file, the IDs of its chunks and their
+    position (chunk_id). It lets a re-indexing run embed and upsert only new or changed chunks and delete only stale
+    ones. The manifest is tied to an index and an embedding model; if either changes, it starts empty.
+    """
+
+    def __init__(self, manifest_path: str, index: str, embedding_model: str):
+        self.manifest_path = manifest_path
+        self.index = index
+        self.embedding_model = embedding_model
+        self.sources = {}
+
+        if manifest_path and os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('index') == index and data.get('embedding_model') == embedding_model:
+                self.sources = data.get('sources', {})
+            else:
+                print(f"Manifest '{manifest_path}' belongs to another index or embedding model, starting from scratch.")
+
+    def get_chunks(self, source: str):
+        """Returns the indexed chunks of a source.
+
+        Args:
+            source (str): The name of the source file.
+
+        Returns:
+            dict: The chunk IDs mapped to their chunk_id (position in the source).
+        """
+        return dict(self.sources.get(source, {}))
+
+    def set_chunks(self, source: str, chunks: dict):
+        """Records the indexed chunks of a source (chunk IDs mapped to their chunk_id)."""
+        self.sources[source] = dict(chunks)
+
+    def chunk_ids(self):
+        """Returns the IDs of every indexed chunk, source by source, in chunk order."""
+        return [doc_id for chunks in self.sources.values()
+                for doc_id, _ in sorted(chunks.items(), key=lambda item: item[1])]
+
+    def remove_source(self, source: str):
+        """Forgets a source."""
+        self.sources.pop(source, None)
+
+    def clear(self):
+        """Forgets every source."""
+        self.sources = {}
+
+    def save(self):
+        """Writes the manifest file."""
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Written to a temporary file first: a crash mid-write must not leave a truncated manifest
+        temporary_path = f"{self.manifest_path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'index': self.index,
+                'embedding_model': self.embedding_model,
+                'sources': self.sources,
+            }, file, ensure_ascii=False, indent=2)
+        os.replace(temporary_path, self.manifest_path)
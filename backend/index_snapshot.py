@@ -0,0 +1,210 @@
+import os
+import json
+import mmap
+import struct
+import time
+import numpy as np
+from backend.local_vector_store import LocalVectorStore
+
+
+SNAPSHOT_MAGIC = b'RCSNAP\x00\x00'
+SNAPSHOT_FORMAT_VERSION = 2
+
+# Magic, format version (uint32) and header length (uint32), little-endian
+_PREAMBLE = struct.Struct('<8sII')
+_ALIGNMENT = 64  # The vector block starts on a cache line (and float32) boundary
+
+
+def _align(offset: int):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _layout(header_length: int, count: int, dimension: int):
+    """Returns the offsets of the vector block, the record offsets and the records, which follow the header."""
+    vectors_offset = _align(_PREAMBLE.size + header_length)
+    offsets_offset = vectors_offset + count * dimension * 4
+    records_offset = offsets_offset + (count + 1) * 8
+    return vectors_offset, offsets_offset, records_offset
+
+
+def write_snapshot(snapshot_path: str, ids: list, vectors, documents, embedding_model: str = None,
+                   index_version: str = None, block_rows: int = 4096):
+    """Writes indexed chunks into a single snapshot file, replacing it atomically.
+
+    The file holds, after a fixed preamble (magic, format version, header length) and a JSON header (chunk count,
+    dimension, IDs, row positions of each resume section, embedding model, index version), a flat block of
+    L2-normalized little-endian float32 vectors (one row per chunk, 64-byte aligned), the count + 1 uint64 offsets
+    of the records, and the records themselves (one UTF-8 JSON object per chunk with its text and metadata).
+
+    Args:
+        snapshot_path (str): The path of the snapshot file.
+        ids (list): The chunk IDs.
+        vectors (np.ndarray): One embedding per chunk (memory-mapped arrays are read by blocks of rows).
+        documents (list): The Document objects of the chunks.
+        embedding_model (str, optional): The model the vectors come from, checked when the snapshot is opened.
+        index_version (str, optional): The version of the indexed content (see `Retriever.get_index_version`).
+        block_rows (int, optional): Rows normalized and written at a time. Defaults to 4096.
+
+    Returns:
+        int: The size of the snapshot file in bytes.
+    """
+    count = len(ids)
+    dimension = int(vectors.shape[1]) if count else 0
+    section_rows = {}
+    for position, doc in enumerate(documents):
+        if doc.metadata.get('section') is not None:
+            section_rows.setdefault(doc.metadata['section'], []).append(position)
+    header = json.dumps({
+        'count': count,
+        'dimension': dimension,
+        'dtype': 'float32',
+        'ids': list(ids),
+        'section_rows': section_rows,
+        'embedding_model': embedding_model,
+        'index_version': index_version,
+        'created': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }, ensure_ascii=False).encode('utf-8')
+    vectors_offset, _, _ = _layout(len(header), count, dimension)
+
+    directory = os.path.dirname(snapshot_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Replaced rather than overwritten: running workers keep reading the memory-mapped previous file
+    temporary_path = f"{snapshot_path}.tmp"
+    with open(temporary_path, 'wb') as file:
+        file.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header)))
+        file.write(header)
+        file.write(b'\x00' * (vectors_offset - _PREAMBLE.size - len(header)))
+        for start in range(0, count, block_rows):
+            block = LocalVectorStore._normalize(vectors[start:start + block_rows])
+            file.write(block.astype('<f4', copy=False).tobytes())
+
+        records = [
+            json.dumps({'page_content': doc.page_content, 'metadata': doc.metadata}, ensure_ascii=False).encode('utf-8')
+            for doc in documents
+        ]
+        offsets = np.zeros(count + 1, dtype='<u8')
+        offsets[1:] = np.cumsum([len(record) for record in records], dtype=np.uint64)
+        file.write(offsets.tobytes())
+        for record in records:
+            file.write(record)
+    os.replace(temporary_path, snapshot_path)
+    return os.path.getsize(snapshot_path)
+
+
+class SnapshotDocuments():
+    """Snapshot Documents Class
+    This class is the read-only list of the Document objects of a snapshot. A record is decoded from the
+    memory-mapped file the first time it is accessed, so opening a snapshot does not parse its texts.
+    """
+
+    def __init__(self, buffer, offsets, records_offset: int):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._records_offset = records_offset
+        self._documents = [None] * (len(offsets) - 1)
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        document = self._documents[position]
+        if document is None:
+            from langchain_core.documents import Document
+
+            start = self._records_offset + int(self._offsets[position])
+            end = self._records_offset + int(self._offsets[position + 1])
+            record = json.loads(self._buffer[start:end])
+            document = self._documents[position] = Document(page_content=record['page_content'],
+                                                            metadata=record['metadata'])
+        return document
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+
+class IndexSnapshot():
+    """Index Snapshot Class
+    This class opens a snapshot file written by `write_snapshot`, read-only and memory-mapped: only the header is
+    parsed, the vectors are a NumPy view of the mapped file and the documents are decoded on first access. Opening
+    is near-instant whatever the index size, and the worker processes of a server share the pages of the file
+    through the OS page cache instead of each holding a copy. Section filters use the row positions recorded in the
+    header, without decoding any record.
+    """
+
+    def __init__(self, snapshot_path: str):
+        self.path = snapshot_path
+        with open(snapshot_path, 'rb') as file:
+            magic, format_version, header_length = _PREAMBLE.unpack(file.read(_PREAMBLE.size))
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"'{snapshot_path}' is not an index snapshot")
+            if format_version != SNAPSHOT_FORMAT_VERSION:
+                raise ValueError(f"Index snapshot '{snapshot_path}' has format version {format_version}, expected "
+                                 f"{SNAPSHOT_FORMAT_VERSION}: export it again with index_resume.py --snapshot")
+            header = json.loads(file.read(header_length))
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.count = header['count']
+        self.dimension = header['dimension']
+        self.ids = header['ids']
+        self.section_rows = {section: np.array(rows, dtype=np.intp) for section, rows in header['section_rows'].items()}
+        self.embedding_model = header.get('embedding_model')
+        self.index_version = header.get('index_version')
+        self.created = header.get('created')
+
+        vectors_offset, offsets_offset, records_offset = _layout(header_length, self.count, self.dimension)
+        if self.count:
+            self.vectors = np.ndarray((self.count, self.dimension), dtype='<f4', buffer=self._buffer,
+                                      offset=vectors_offset)
+        else:
+            self.vectors = np.zeros((0, 0), dtype=np.float32)
+        offsets = np.ndarray((self.count + 1,), dtype='<u8', buffer=self._buffer, offset=offsets_offset)
+        self.documents = SnapshotDocuments(self._buffer, offsets, records_offset)
+
+
+class SnapshotVectorStore(LocalVectorStore):
+    """Snapshot Vector Store Class
+    This class is a read-only LocalVectorStore over an index snapshot (see `IndexSnapshot`), for deployments that
+    ship their index with the code: no network call and no parsing at startup. With `quantization`, the codes are
+    computed from the mapped vectors at startup and each worker keeps its own copy of them. The snapshot is
+    replaced by exporting the index again (index_resume.py --snapshot).
+    """
+
+    def __init__(self, embedding, snapshot_path: str, quantization: str = None, rescore_factor: int = None,
+                 embedding_model: str = None):
+        super().__init__(embedding, index_path=None, quantization=quantization, rescore_factor=rescore_factor)
+        self.snapshot = IndexSnapshot(snapshot_path)
+        if embedding_model and self.snapshot.embedding_model and embedding_model != self.snapshot.embedding_model:
+            raise ValueError(f"Index snapshot '{snapshot_path}' was built with the embedding model "
+                             f"'{self.snapshot.embedding_model}', not '{embedding_model}'")
+
+        self.ids = self.snapshot.ids
+        self.documents = self.snapshot.documents
+        self.vectors = self.snapshot.vectors
+        self._section_rows = self.snapshot.section_rows  # Not rebuilt from the documents, which would decode them
+        if quantization and self.ids:
+            self.codes, self.scales = self._quantize(self.vectors)
+        print(f"Opened index snapshot '{snapshot_path}' ({len(self.ids)} chunks, created {self.snapshot.created}).")
+
+    @property
+    def version(self):
+        """The version of the indexed content recorded at export, or a fingerprint of the chunk IDs."""
+        return self.snapshot.index_version or super().version
+
+    def memory_usage(self):
+        """Returns the bytes of vector data held in process memory: the mapped vectors are shared, not counted."""
+        usage = super().memory_usage()
+        usage['vector_bytes'] -= self.vectors.nbytes
+        return usage
+
+    def _read_only(self, *args, **kwargs):
+        raise ValueError(f"The index snapshot '{self.snapshot.path}' is read-only: index into the local or Pinecone "
+                         f"backend and export it again with index_resume.py --snapshot")
+
+    add_vectors = _read_only
+    add_documents = _read_only
+    delete = _read_only
+    update_metadata = _read_only
@@ -0,0 +1,268 @@
+import os
+import time
+import threading
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from backend.retriever import Retriever
+from backend.index_manifest import content_chunk_id, content_chunk_ids
+from backend.resume_splitter import ResumeSplitter
+
+
+SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.doc', '.txt']
+
+
+def create_text_splitter():
+    """Creates the text splitter used to cut documents into chunks: along the resume's sections and entries, with
+    'section' (and 'role') metadata."""
+    return ResumeSplitter(chunk_size=1000, chunk_overlap=200)
+
+
+def stream_chunks(file_path: str):
+    """Loads and splits a file incrementally: PDF pages and text file blocks are split as soon as they are read, so
+    memory use stays bounded and the chunks can be uploaded while the rest of the file is still being parsed.
+    DOCX files cannot be read incrementally and are loaded whole.
+
+    Args:
+        file_path (str): The path to a PDF, DOCX or TXT file.
+
+    Yields:
+        tuple: Each chunk (Document with 'source', 'chunk_id' and, after a section heading, 'section' metadata) and
+            its content-addressed ID, in order.
+    """
+    file_path = Path(file_path)
+
+    if not file_path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    extension = file_path.suffix.lower()
+
+    if extension == '.pdf':
+        documents = Retriever.pdf_page_stream(str(file_path))
+    elif extension in ['.docx', '.doc']:
+        documents = Retriever.docx_loader(str(file_path))
+    elif extension == '.txt':
+        documents = Retriever.text_block_stream(str(file_path))
+    else:
+        raise ValueError(f"Unsupported file type: {extension}. Supported: .pdf, .docx, .txt")
+
+    occurrences = {}
+    # The splitter reads the pages lazily, carrying the current section over from one page to the next
+    for chunk_id, chunk in enumerate(create_text_splitter().lazy_split_documents(documents)):
+        chunk.metadata['source'] = file_path.name
+        chunk.metadata['chunk_id'] = chunk_id
+        yield chunk, content_chunk_id(file_path.name, chunk.page_content, occurrences)
+
+
+def load_and_split(file_path: str):
+    """Loads a file and splits it into chunks. Runs in a worker process of the ingestion pipeline, so it only needs
+    the Retriever's static loaders, not its clients.
+
+    Args:
+        file_path (str): The path to a PDF, DOCX or TXT file.
+
+    Returns:
+        tuple: The file name, its chunks (Document objects with 'source', 'chunk_id' and, after a section heading,
+            'section' metadata), their content-addressed IDs, and the number of loaded documents.
+    """
+    file_path = Path(file_path)
+
+    if not file_path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+
+    # Determine file type and load accordingly
+    extension = file_path.suffix.lower()
+
+    if extension == '.pdf':
+        documents = Retriever.pdf_loader(str(file_path))
+    elif extension in ['.docx', '.doc']:
+        documents = Retriever.docx_loader(str(file_path))
+    elif extension == '.txt':
+        documents = Retriever.text_loader(str(file_path))
+    else:
+        raise ValueError(f"Unsupported file type: {extension}. Supported: .pdf, .docx, .txt")
+
+    # Split documents into chunks for better retrieval
+    chunks = create_text_splitter().split_documents(documents)
+
+    # Add metadata to chunks
+    for i, chunk in enumerate(chunks):
+        chunk.metadata['source'] = file_path.name
+        chunk.metadata['chunk_id'] = i
+
+    return file_path.name, chunks, content_chunk_ids(chunks, file_path.name), len(documents)
+
+
+def _timed_load_and_split(file_path: str):
+    """Runs `load_and_split` and also returns how long it took in the worker process."""
+    start = time.perf_counter()
+    result = load_and_split(file_path)
+    return result, time.perf_counter() - start
+
+
+def diff_chunks(source: str, chunks: list, ids: list, manifest=None):
+    """Compares the chunks of a source with what the manifest records as already indexed.
+
+    Returns:
+        tuple: The positions of the new or changed chunks, the metadata updates of the chunks that only moved,
+            the IDs of the stale chunks, and the current chunk IDs mapped to their chunk_id.
+    """
+    indexed = manifest.get_chunks(source) if manifest is not None else {}
+    current = {doc_id: chunk.metadata['chunk_id'] for doc_id, chunk in zip(ids, chunks)}
+    new_positions = [i for i, doc_id in enumerate(ids) if doc_id not in indexed]
+    moved = {doc_id: {'chunk_id': chunk_id} for doc_id, chunk_id in current.items()
+             if doc_id in indexed and indexed[doc_id] != chunk_id}
+    stale = [doc_id for doc_id in indexed if doc_id not in current]
+    return new_positions, moved, stale, current
+
+
+class IngestionPipeline():
+    """Ingestion Pipeline Class
+    This class indexes many files with bounded concurrency, each stage feeding the next as soon as it has work:
+    files are loaded and split in a process pool, new chunks are embedded in size-bounded batches with several
+    requests in flight, and embedded batches are upserted, both with retry and exponential backoff. The local index 
+    files are written, the file recorded in the manifest and its stale chunks deleted once all of its batches are 
+    upserted.
+    """
+
+    def __init__(self, retriever: Retriever, manifest=None, load_workers: int = None, embed_batch_size: int = 96,
+                 embed_concurrency: int = 4, upsert_batch_size: int = 100, max_retries: int = 3):
+        self.retriever = retriever
+        self.manifest = manifest
+        self.load_workers = load_workers or os.cpu_count() or 1
+        self.embed_batch_size = embed_batch_size
+        self.embed_concurrency = embed_concurrency
+        self.upsert_batch_size = upsert_batch_size
+        self.max_retries = max_retries
+
+        self._lock = threading.Lock()
+        self._in_flight = threading.BoundedSemaphore(embed_concurrency * 2)  # Backpressure on the loading stage
+        self._failed = set()
+        self._stage_seconds = {'load_split': 0.0, 'embed': 0.0, 'upsert': 0.0}
+        self.chunks_uploaded = 0
+        self.files_indexed = 0
+
+    def _add_stage_time(self, stage: str, seconds: float):
+        with self._lock:
+            self._stage_seconds[stage] += seconds
+
+    def _with_retry(self, function, *args):
+        """Calls a function, retrying with exponential backoff when it raises."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return function(*args)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = 0.5 * 2 ** attempt
+                print(f"⚠️  {e} - retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _process_batch(self, file_state: dict, docs: list, ids: list):
+        """Embeds a batch of chunks, then upserts it in upsert-sized slices."""
+        try:
+            start = time.perf_counter()
+            vectors = self._with_retry(self.retriever.embeddings.embed_documents, [doc.page_content for doc in docs])
+            self._add_stage_time('embed', time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for offset in range(0, len(docs), self.upsert_batch_size):
+                end = offset + self.upsert_batch_size
+                # Written to disk once per file, in _finalize: rewriting the local index per batch is quadratic
+                self._with_retry(self.retriever.upsert_embeddings, docs[offset:end], vectors[offset:end], ids[offset:end],
+                                 False)
+            self._add_stage_time('upsert', time.perf_counter() - start)
+
+            with self._lock:
+                self.chunks_uploaded += len(docs)
+        except Exception as e:
+            print(f"❌ Error indexing {file_state['source']}: {e}")
+            with self._lock:
+                self._failed.add(file_state['source'])
+        finally:
+            self._in_flight.release()
+            self._batch_done(file_state)
+
+    def _batch_done(self, file_state: dict):
+        with self._lock:
+            file_state['remaining'] -= 1
+            finished = file_state['remaining'] == 0
+        if finished:
+            self._finalize(file_state)
+
+    def _finalize(self, file_state: dict):
+        """Updates the moved chunks, deletes the stale ones and records the file once all its batches are upserted."""
+        source = file_state['source']
+        with self._lock:
+            if source in self._failed:
+                return
+        try:
+            start = time.perf_counter()
+            if file_state['new']:
+                self.retriever.save_indexes()  # Before the manifest records the file
+            self.retriever.update_documents_metadata(file_state['moved'])
+            self.retriever.delete_documents(file_state['stale'])
+            self._add_stage_time('upsert', time.perf_counter() - start)
+            with self._lock:
+                if self.manifest is not None:
+                    self.manifest.set_chunks(source, file_state['current'])
+                    self.manifest.save()
+                self.files_indexed += 1
+            print(f"✅ {source}: {len(file_state['new'])} new chunk(s) indexed, {len(file_state['stale'])} stale removed")
+        except Exception as e:
+            print(f"❌ Error finalizing {source}: {e}")
+            with self._lock:
+                self._failed.add(source)
+
+    def run(self, files: list):
+        """Indexes the files.
+
+        Args:
+            files (list): The paths of the files to index.
+
+        Returns:
+            dict: The number of files indexed and failed, chunks uploaded, wall-clock time, throughput in chunks per
+                second, and the cumulative time spent in each stage.
+        """
+        started = time.perf_counter()
+        failed_loads = 0
+
+        with ProcessPoolExecutor(max_workers=min(self.load_workers, len(files))) as load_pool, \
+                ThreadPoolExecutor(max_workers=self.embed_concurrency) as embed_pool:
+            futures = {load_pool.submit(_timed_load_and_split, str(file)): str(file) for file in files}
+
+            for future in as_completed(futures):
+                try:
+                    (source, chunks, ids, _), seconds = future.result()
+                except Exception as e:
+                    print(f"❌ Error loading {Path(futures[future]).name}: {e}")
+                    failed_loads += 1
+                    continue
+                self._add_stage_time('load_split', seconds)
+
+                new_positions, moved, stale, current = diff_chunks(source, chunks, ids, self.manifest)
+                new = set(new_positions)
+                self.retriever.backfill_lexical_index([chunk for i, chunk in enumerate(chunks) if i not in new],
+                                                      [doc_id for i, doc_id in enumerate(ids) if i not in new])
+                batches = [new_positions[i:i + self.embed_batch_size]
+                           for i in range(0, len(new_positions), self.embed_batch_size)]
+                file_state = {'source': source, 'new': new_positions, 'moved': moved, 'stale': stale,
+                              'current': current, 'remaining': len(batches)}
+                print(f"🔪 {source}: {len(chunks)} chunks, {len(new_positions)} new or changed, {len(stale)} stale")
+
+                if not batches:
+                    self._finalize(file_state)
+                    continue
+                for batch in batches:
+                    self._in_flight.acquire()
+                    embed_pool.submit(self._process_batch, file_state,
+                                      [chunks[i] for i in batch], [ids[i] for i in batch])
+
+        elapsed = time.perf_counter() - started
+        return {
+            'files_indexed': self.files_indexed,
+            'files_failed': len(self._failed) + failed_loads,
+            'chunks_uploaded': self.chunks_uploaded,
+            'seconds': elapsed,
+            'chunks_per_second': self.chunks_uploaded / elapsed if elapsed else 0.0,
+            'stage_seconds': dict(self._stage_seconds),
+        }
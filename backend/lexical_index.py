@@ -0,0 +1,234 @@
+import os
+import re
+import json
+import math
+import hashlib
+import heapq
+import threading
+
+
+# Words that carry no retrieval signal in recruiter questions ("Does the candidate know ...?")
+STOP_WORDS = frozenset("""
+a about after all also am an and any are as at be been before being both but by can could did do does doing done
+for from had has have having he her here him his how i if in into is it its just me more most my no not of on or
+other our out over she so some such than that the their them then there these they this those to too under up us
+very was we were what when where which while who whom why will with would you your yours
+candidate resume cv tell know knows describe give list please mr ms mrs
+""".split())
+
+
+class BM25Index():
+    """BM25 Index Class
+    This class is a local inverted index over the indexed chunks, scored with Okapi BM25. It finds the chunks that
+    name an exact technology or keyword ("Kubernetes", "PySpark") without any network call, and reports how much of
+    the question the best chunk covers, so confident keyword matches can skip the embedding and vector search.
+    Chunks are added and deleted by ID, mirroring the vector index, and kept in a JSON file.
+    """
+
+    _tokens = re.compile(r"\w[\w+#]*(?:[.\-'][\w+#]+)*")
+
+    def __init__(self, index_path: str = None, k1: float = 1.2, b: float = 0.75):
+        self.index_path = index_path
+        self.k1 = k1
+        self.b = b
+
+        self._documents = {}  # Chunk ID -> (Document, length, term frequencies)
+        self._postings = {}   # Term -> {chunk ID: term frequency}
+        self._total_length = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+        if index_path and os.path.exists(index_path):
+            self.load()
+
+    @classmethod
+    def tokenize(cls, text: str):
+        """Splits a text into normalized terms: lowercased, stop words removed, possessives and plurals stripped.
+        Technology names such as 'c++', 'c#' or 'node.js' are kept whole."""
+        terms = []
+        for token in cls._tokens.findall(text.lower()):
+            if token.endswith("'s"):
+                token = token[:-2]
+            if token in STOP_WORDS:
+                continue
+            if len(token) > 3 and token.isalpha() and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+                token = token[:-1]
+            terms.append(token)
+        return terms
+
+    def __len__(self):
+        return len(self._documents)
+
+    @property
+    def version(self):
+        """A fingerprint of the indexed chunks, which changes whenever chunks are added, changed or deleted."""
+        with self._lock:
+            if self._version is None:
+                self._version = hashlib.sha1("\n".join(sorted(self._documents)).encode('utf-8')).hexdigest()[:12]
+            return self._version
+
+    def __contains__(self, doc_id):
+        return doc_id in self._documents
+
+    def load(self):
+        """Loads the chunks from the index file and rebuilds the postings."""
+        from langchain_core.documents import Document
+
+        with open(self.index_path, 'r', encoding='utf-8') as file:
+            records = json.load(file)
+        with self._lock:
+            for record in records:
+                self._add(record['id'], Document(page_content=record['page_content'], metadata=record['metadata']))
+        print(f"Loaded {len(records)} chunks from lexical index '{self.index_path}'.")
+
+    def save(self):
+        """Writes the chunks to the index file."""
+        if not self.index_path:
+            return
+
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            records = [
+                {'id': doc_id, 'page_content': doc.page_content, 'metadata': doc.metadata}
+                for doc_id, (doc, _, _) in self._documents.items()
+            ]
+        # Written to a temporary file first: ingestion threads may save concurrently
+        temporary_path = f"{self.index_path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(records, file, ensure_ascii=False)
+        os.replace(temporary_path, self.index_path)
+
+    def _add(self, doc_id: str, document):
+        """Indexes one chunk, replacing the chunk with the same ID. Must be called with the lock held."""
+        self._remove(doc_id)
+        self._version = None
+        frequencies = {}
+        terms = self.tokenize(document.page_content)
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+        self._documents[doc_id] = (document, len(terms), frequencies)
+        self._total_length += len(terms)
+
+    def _remove(self, doc_id: str):
+        """Unindexes one chunk. Must be called with the lock held."""
+        entry = self._documents.pop(doc_id, None)
+        if entry is None:
+            return
+        self._version = None
+        _, length, frequencies = entry
+        for term in frequencies:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= length
+
+    def add(self, documents: list, ids: list):
+        """Indexes chunks, replacing the chunks with the same IDs.
+
+        Args:
+            documents (list): The Document objects.
+            ids (list): Their IDs, as in the vector index.
+        """
+        with self._lock:
+            for doc_id, document in zip(ids, documents):
+                self._add(doc_id, document)
+
+    def delete(self, ids: list = None, delete_all: bool = False):
+        """Unindexes chunks by ID, or every chunk with delete_all=True."""
+        with self._lock:
+            if delete_all:
+                self._documents, self._postings, self._total_length, self._version = {}, {}, 0, None
+                return
+            for doc_id in ids or []:
+                self._remove(doc_id)
+
+    def update_metadata(self, updates: dict):
+        """Updates the metadata of chunks (chunk IDs mapped to the metadata fields to set)."""
+        with self._lock:
+            for doc_id, metadata in updates.items():
+                if doc_id in self._documents:
+                    self._documents[doc_id][0].metadata.update(metadata)
+
+    def _idf(self, document_frequency: int, count: int):
+        return math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def search(self, query: str, k: int = 10, filter: dict = None, min_terms: int = 2):
+        """Returns the chunks with the best BM25 score for a question, and the confidence of the best match.
+
+        Args:
+            query (str): The question.
+            k (int, optional): The number of chunks. Defaults to 10.
+            filter (dict, optional): Metadata key/value pairs the chunks must match (e.g. {'section': 'skills'}).
+            min_terms (int, optional): The distinct question terms the best chunk must contain for a non-zero
+                confidence. Defaults to 2.
+
+        Returns:
+            tuple: A list of (Document, BM25 score) tuples, best match first, and the confidence: the share of the
+                question's term weight (IDF) that the best chunk contains, from 0 to 1. Terms absent from the index
+                weigh the most, so questions worded differently from the resume get a low confidence. It is 0 when
+                the best chunk contains fewer than `min_terms` question terms: a question reduced to one term
+                ("What is your experience?") is fully covered by any chunk containing it, which says nothing about
+                which chunk answers it.
+        """
+        terms = set(self.tokenize(query))
+        with self._lock:
+            count = len(self._documents)
+            if not terms or count == 0:
+                return [], 0.0
+            average_length = self._total_length / count or 1.0
+
+            weights = {term: self._idf(len(self._postings.get(term, ())), count) for term in terms}
+            scores = {}
+            for term in terms:
+                for doc_id, frequency in self._postings.get(term, {}).items():
+                    length = self._documents[doc_id][1]
+                    score = weights[term] * frequency * (self.k1 + 1) / (
+                        frequency + self.k1 * (1 - self.b + self.b * length / average_length))
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+            if filter:
+                metadata = {doc_id: self._documents[doc_id][0].metadata for doc_id in scores}
+                scores = {doc_id: score for doc_id, score in scores.items()
+                          if all(metadata[doc_id].get(key) == value for key, value in filter.items())}
+            if not scores:
+                return [], 0.0
+
+            top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            best_frequencies = self._documents[top[0][0]][2]
+            matched = [term for term in terms if term in best_frequencies]
+            if len(matched) < min_terms:
+                return [(self._documents[doc_id][0], score) for doc_id, score in top], 0.0
+            confidence = sum(weights[term] for term in matched) / sum(weights.values())
+            return [(self._documents[doc_id][0], score) for doc_id, score in top], confidence
+
+
+def chunk_key(doc):
+    """Returns the identity of a retrieved chunk: its source and position, or its text for chunks without them."""
+    chunk_id = doc.metadata.get('chunk_id')
+    return (doc.metadata.get('source'), chunk_id) if chunk_id is not None else doc.page_content
+
+
+def reciprocal_rank_fusion(rankings: list, k: int = 60, limit: int = 3):
+    """Fuses several rankings of chunks with reciprocal rank fusion: each chunk scores the sum of 1 / (k + rank)
+    over the rankings it appears in, so chunks ranked well by both the lexical and the vector search come first.
+
+    Args:
+        rankings (list): Lists of Document objects, best match first.
+        k (int, optional): The rank smoothing constant. Defaults to 60.
+        limit (int, optional): The number of chunks to return. Defaults to 3.
+
+    Returns:
+        list: The fused Document objects, best first.
+    """
+    scores, documents = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = chunk_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+            documents.setdefault(key, doc)
+    best = sorted(scores, key=scores.get, reverse=True)[:limit]
+    return [documents[key] for key in best]
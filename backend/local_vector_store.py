@@ -0,0 +1,528 @@
+import os
+import json
+import uuid
+import hashlib
+import threading
+import numpy as np
+
+
+QUANTIZATION_MODES = ('int8', 'binary')
+
+# Chunks re-scored exactly per chunk returned, by default: binary codes rank too coarsely for a short shortlist
+# (recall@3 of 0.68 with 4, 0.94 with 16 on `python -m benchmarks.quantization`)
+DEFAULT_RESCORE_FACTORS = {'int8': 4, 'binary': 16}
+
+# Quantized codes are scored by blocks of rows small enough for their float32 copy to stay in the CPU cache
+SCORE_BLOCK_ROWS = 256
+
+_popcount = None
+
+
+def popcount_table():
+    """Returns the number of set bits of every 16-bit value, to count the differing signs of binary codes two bytes
+    at a time. Built on first use (about 16 ms), so processes without binary quantization do not pay for it."""
+    global _popcount
+    if _popcount is None:
+        _popcount = np.array([bin(value).count('1') for value in range(1 << 16)], dtype=np.uint8)
+    return _popcount
+
+
+def maximal_marginal_relevance(relevance, vectors, k: int, lambda_mult: float = 0.5):
+    """Selects k candidates by maximal marginal relevance: each pick maximizes `lambda_mult * relevance -
+    (1 - lambda_mult) * (highest similarity to the candidates already picked)`, so a chunk that mostly repeats a
+    selected one (e.g. the chunk its split overlaps) gives way to a slightly less relevant but new one.
+
+    Args:
+        relevance (np.ndarray): The cosine similarity of each candidate to the query.
+        vectors (np.ndarray): The L2-normalized candidate vectors.
+        k (int): The number of candidates to select.
+        lambda_mult (float, optional): 1 ranks by relevance only, 0 by diversity only. Defaults to 0.5.
+
+    Returns:
+        list: The positions of the selected candidates, in selection order.
+    """
+    k = min(k, len(relevance))
+    if k <= 0:
+        return []
+    relevance = np.asarray(relevance, dtype=np.float32)
+    selected = [int(np.argmax(relevance))]
+    redundancy = vectors @ vectors[selected[0]]
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        redundancy = np.maximum(redundancy, vectors @ vectors[best])
+    return selected
+
+
+class LocalVectorStore():
+    """Local Vector Store Class
+    This class keeps every indexed chunk in process memory and answers similarity searches without any network call.
+    All chunk vectors are stored L2-normalized in one contiguous float32 matrix, so a top-k cosine query is a single
+    matrix-vector product followed by an argpartition. It exposes the same methods as the LangChain vector stores
+    used by the ChatBot (add_documents, similarity_search, ...).
+
+    With `quantization`, only compact codes of the vectors stay in memory: 'int8' keeps one byte per dimension and a
+    scale per vector (4x smaller), 'binary' keeps one bit per dimension, its sign (32x smaller). Queries are scored
+    against the codes, and the `rescore_factor * k` best chunks are re-scored exactly with the float32 vectors, read
+    from the memory-mapped index file, so only the pages of that shortlist are loaded. int8 only saves memory: NumPy
+    has no integer matrix product kernel, so its codes are converted to float32 block by block and scored slightly
+    slower than the full-precision vectors. Binary codes are scored faster than the vectors, with a popcount of their XOR.
+
+    The row positions of each resume section are kept up to date, so a search filtered by section only scores the
+    vectors (or codes) of that section.
+    """
+
+    def __init__(self, embedding, index_path: str = None, quantization: str = None, rescore_factor: int = None):
+        if quantization is not None and quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization '{quantization}' "
+                             f"(expected one of: {', '.join(QUANTIZATION_MODES)})")
+        self.embedding = embedding
+        self.index_path = index_path
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor or DEFAULT_RESCORE_FACTORS.get(quantization, 1)
+
+        self.ids = []
+        self.documents = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.codes = None   # int8 codes, or sign bits packed 8 per byte
+        self.scales = None  # Per-vector scale of the int8 codes
+        self._section_rows = {}  # Section -> sorted row positions of its chunks
+        self._write_lock = threading.RLock()  # Held by save(), also called while writing
+
+        if index_path and os.path.exists(self._vectors_file()):
+            self.load()
+
+    @property
+    def version(self):
+        """A fingerprint of the indexed chunks, which changes whenever documents are added or deleted."""
+        return hashlib.sha1("\n".join(self.ids).encode('utf-8')).hexdigest()[:12]
+
+    def _vectors_file(self):
+        return os.path.join(self.index_path, 'vectors.npy')
+
+    def _documents_file(self):
+        return os.path.join(self.index_path, 'documents.json')
+
+    @staticmethod
+    def _normalize(vectors):
+        """L2-normalizes a vector or a matrix of row vectors so dot products become cosine similarities."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def load(self):
+        """Loads the vectors and the documents from the local index directory."""
+        from langchain_core.documents import Document
+
+        with open(self._documents_file(), 'r', encoding='utf-8') as file:
+            records = json.load(file)
+
+        self.ids = [record['id'] for record in records]
+        self.documents = [
+            Document(page_content=record['page_content'], metadata=record['metadata'])
+            for record in records
+        ]
+        if self.quantization:
+            self.vectors = np.load(self._vectors_file(), mmap_mode='r')
+            self.codes, self.scales = self._quantize(self.vectors)
+        else:
+            self.vectors = np.ascontiguousarray(np.load(self._vectors_file()), dtype=np.float32)
+        self._index_sections()
+        print(f"Loaded {len(self.ids)} chunks from local index '{self.index_path}'.")
+
+    def save(self):
+        """Writes the vectors and the documents to the local index directory."""
+        if not self.index_path:
+            return
+
+        os.makedirs(self.index_path, exist_ok=True)
+        with self._write_lock:
+            records = [
+                {'id': doc_id, 'page_content': doc.page_content, 'metadata': doc.metadata}
+                for doc_id, doc in zip(self.ids, self.documents)
+            ]
+            with open(self._documents_file(), 'w', encoding='utf-8') as file:
+                json.dump(records, file, ensure_ascii=False)
+            # Replaced rather than overwritten: searches may still read the memory-mapped previous file
+            temporary_path = f"{self._vectors_file()}.tmp"
+            with open(temporary_path, 'wb') as file:
+                np.save(file, self.vectors)
+            os.replace(temporary_path, self._vectors_file())
+            if self.quantization:
+                self.vectors = np.load(self._vectors_file(), mmap_mode='r')
+
+    def _quantize(self, vectors):
+        """Returns the codes of normalized vectors (and their int8 scales), computed by blocks of rows."""
+        codes, scales = [], []
+        for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            if self.quantization == 'binary':
+                codes.append(self._sign_bits(block))
+                continue
+            scale = np.abs(block).max(axis=1) / 127
+            scale[scale == 0] = 1.0
+            codes.append(np.round(block / scale[:, None]).astype(np.int8))
+            scales.append(scale.astype(np.float32))
+        if not codes:
+            return None, None
+        return np.vstack(codes), (np.concatenate(scales) if scales else None)
+
+    @staticmethod
+    def _sign_bits(vectors):
+        """Returns the signs of row vectors packed 16 per uint16 (padded with zero bits)."""
+        bits = np.packbits(vectors > 0, axis=1)
+        if bits.shape[1] % 2:
+            bits = np.hstack([bits, np.zeros((len(bits), 1), dtype=np.uint8)])
+        return np.ascontiguousarray(bits).view(np.uint16)
+
+    def _approximate_scores(self, queries, rows=None):
+        """Scores normalized queries against the codes of every chunk, or of the given rows.
+
+        Args:
+            queries (np.ndarray): The normalized query vectors, one per row.
+            rows (np.ndarray, optional): The row positions of the chunks to score.
+
+        Returns:
+            np.ndarray: One row of scores per query, in the same order as the chunks (or rows). With int8 codes, the
+                scores approximate the cosine similarities; with binary codes, they are the share of matching signs.
+        """
+        codes = self.codes if rows is None else self.codes[rows]
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        if self.quantization == 'binary':
+            popcount = popcount_table()
+            query_bits = self._sign_bits(queries)
+            dimension = queries.shape[1]
+            for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+                block = codes[start:start + SCORE_BLOCK_ROWS]
+                differing = popcount[block[None, :, :] ^ query_bits[:, None, :]].sum(axis=2, dtype=np.uint32)
+                scores[:, start:start + len(block)] = 1 - differing / dimension
+            return scores
+
+        # The codes of each block are converted into the same float32 buffer, which stays in the CPU cache
+        scales = self.scales if rows is None else self.scales[rows]
+        buffer = np.empty((min(SCORE_BLOCK_ROWS, len(codes)), codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = buffer[:len(codes[start:start + SCORE_BLOCK_ROWS])]
+            np.copyto(block, codes[start:start + SCORE_BLOCK_ROWS], casting='unsafe')
+            scores[:, start:start + len(block)] = queries @ block.T
+        scores *= scales
+        return scores
+
+    @staticmethod
+    def _top(scores, k: int):
+        """Returns the positions of the k highest scores, highest first."""
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top])]
+
+    def _search(self, query, k: int, rows=None):
+        """Returns the positions and cosine similarities of the k chunks most similar to a normalized query.
+
+        Args:
+            query (np.ndarray): The normalized query vector.
+            k (int): The number of chunks (at most the number of rows).
+            rows (np.ndarray, optional): The sorted row positions of the chunks that may be returned; only these
+                are scored.
+
+        Returns:
+            tuple: The positions of the chunks, best first, and their cosine similarities.
+        """
+        if self.quantization is None:
+            scores = (self.vectors if rows is None else self.vectors[rows]) @ query
+            top = self._top(scores, k)
+            return (top if rows is None else rows[top]), scores[top]
+
+        return self._rescore(query, self._approximate_scores(query[None, :], rows)[0], k, rows)
+
+    def _rescore(self, query, approximate, k: int, rows=None):
+        """Re-scores the `rescore_factor * k` chunks with the best approximate scores with their float32 vectors.
+
+        Returns:
+            tuple: The positions of the k best chunks, best first, and their cosine similarities.
+        """
+        shortlist_size = min(len(approximate), max(k, k * self.rescore_factor))
+        # Sorted positions, so the rows are read from the memory-mapped file in order
+        shortlist = np.sort(np.argpartition(-approximate, shortlist_size - 1)[:shortlist_size])
+        if rows is not None:
+            shortlist = rows[shortlist]
+        exact = np.asarray(self.vectors[shortlist], dtype=np.float32) @ query
+        top = self._top(exact, k)
+        return shortlist[top], exact[top]
+
+    def memory_usage(self):
+        """Returns the bytes of vector data held in process memory, and the bytes a float32 matrix would take.
+
+        Returns:
+            dict: The number of chunks, the quantization, the bytes in memory and the full-precision bytes.
+        """
+        full_precision = len(self.ids) * (self.vectors.shape[1] if self.vectors.ndim == 2 else 0) * 4
+        in_memory = 0 if isinstance(self.vectors, np.memmap) else self.vectors.nbytes
+        for array in (self.codes, self.scales):
+            if array is not None:
+                in_memory += array.nbytes
+        return {
+            'chunks': len(self.ids),
+            'quantization': self.quantization,
+            'vector_bytes': in_memory,
+            'full_precision_bytes': full_precision,
+        }
+
+    def add_vectors(self, vectors, documents, ids=None, save: bool = True):
+        """Adds precomputed vectors and their documents to the index.
+
+        Args:
+            vectors (list): One embedding per document.
+            documents (list): The Document objects matching the vectors.
+            ids (list, optional): The IDs of the documents. Random IDs are generated if not provided.
+            save (bool, optional): Whether to write the whole index to disk. Defaults to True; when adding many 
+                batches, pass False and call `save` once at the end.
+
+        Returns:
+            list: List of document IDs that were added.
+        """
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in documents]
+        if not documents:
+            return []
+
+        new_vectors = self._normalize(vectors)
+        with self._write_lock:
+            # Overwrite documents that already exist with the same IDs
+            existing = set(ids) & set(self.ids)
+            if existing:
+                self._remove(existing)
+
+            if self.vectors.size == 0:
+                self.vectors = np.ascontiguousarray(new_vectors)
+            else:
+                self.vectors = np.ascontiguousarray(np.vstack([self.vectors, new_vectors]))
+            if self.quantization:
+                new_codes, new_scales = self._quantize(new_vectors)
+                self.codes = new_codes if self.codes is None else np.vstack([self.codes, new_codes])
+                if new_scales is not None:
+                    self.scales = new_scales if self.scales is None else np.concatenate([self.scales, new_scales])
+
+            self._index_sections(documents, start=len(self.ids))
+            self.ids.extend(ids)
+            self.documents.extend(documents)
+            if save:
+                self.save()
+        return ids
+
+    def add_documents(self, documents, ids=None, **kwargs):
+        """Embeds and adds documents to the index.
+
+        Args:
+            documents (list): A list of Document objects to be added.
+            ids (list, optional): The IDs of the documents.
+
+        Returns:
+            list: List of document IDs that were added.
+        """
+        vectors = self.embedding.embed_documents([doc.page_content for doc in documents])
+        return self.add_vectors(vectors, documents, ids=ids)
+
+    def similarity_search_by_vector_with_score(self, embedding, k: int = 4, filter: dict = None):
+        """Returns the k documents most similar to the given embedding.
+
+        Args:
+            embedding (list): The query embedding.
+            k (int, optional): The number of documents to return. Defaults to 4.
+            filter (dict, optional): Metadata key/value pairs the documents must match.
+
+        Returns:
+            list: A list of (Document, cosine similarity) tuples, best match first.
+        """
+        if not self.ids:
+            return []
+
+        rows = self._filter_rows(filter)
+        k = min(k, len(self.ids) if rows is None else len(rows))
+        if k <= 0:
+            return []
+
+        top, scores = self._search(self._normalize(embedding), k, rows)
+        return [(self.documents[i], float(score)) for i, score in zip(top, scores)]
+
+    def max_marginal_relevance_search_by_vector(self, embedding, k: int = 4, fetch_k: int = 20,
+                                                lambda_mult: float = 0.5, filter: dict = None, **kwargs):
+        """Returns k documents selected for both relevance and diversity among the fetch_k documents most similar to
+        the given embedding (see `maximal_marginal_relevance`). Same signature as the LangChain vector stores.
+
+        Args:
+            embedding (list): The query embedding.
+            k (int, optional): The number of documents to return. Defaults to 4.
+            fetch_k (int, optional): The number of candidates to select from. Defaults to 20.
+            lambda_mult (float, optional): 1 ranks by relevance only, 0 by diversity only. Defaults to 0.5.
+            filter (dict, optional): Metadata key/value pairs the documents must match.
+
+        Returns:
+            list: The selected Document objects, in selection order.
+        """
+        if not self.ids:
+            return []
+
+        rows = self._filter_rows(filter)
+        fetch_k = min(max(k, fetch_k), len(self.ids) if rows is None else len(rows))
+        if fetch_k <= 0:
+            return []
+
+        top, scores = self._search(self._normalize(embedding), fetch_k, rows)
+        candidates = np.asarray(self.vectors[top], dtype=np.float32)
+        return [self.documents[top[i]] for i in maximal_marginal_relevance(scores, candidates, k, lambda_mult)]
+
+    def _index_sections(self, documents=None, start: int = 0):
+        """Records the row positions of the chunks of each section.
+
+        Args:
+            documents (list, optional): Documents appended at row `start`. By default, every section is re-indexed
+                from all the documents.
+            start (int, optional): The row position of the first of `documents`. Defaults to 0.
+        """
+        if documents is None:
+            self._section_rows, documents = {}, self.documents
+        added = {}
+        for position, doc in enumerate(documents, start):
+            section = doc.metadata.get('section')
+            if section is not None:
+                added.setdefault(section, []).append(position)
+        for section, positions in added.items():
+            positions = np.array(positions, dtype=np.intp)
+            previous = self._section_rows.get(section)
+            self._section_rows[section] = positions if previous is None else np.concatenate([previous, positions])
+
+    def _filter_rows(self, filter: dict = None):
+        """Returns the sorted row positions of the documents matching the metadata key/value pairs (None without
+        filter). A section is looked up in the section index; other keys are checked on the documents."""
+        if not filter:
+            return None
+        rows = None
+        if 'section' in filter:
+            rows = self._section_rows.get(filter['section'], np.zeros(0, dtype=np.intp))
+        others = {key: value for key, value in filter.items() if key != 'section'}
+        if others:
+            candidates = range(len(self.documents)) if rows is None else rows
+            rows = np.array([
+                i for i in candidates
+                if all(self.documents[i].metadata.get(key) == value for key, value in others.items())
+            ], dtype=np.intp)
+        return rows
+
+    def similarity_search_by_vectors(self, embeddings, k: int = 4):
+        """Returns the k documents most similar to each of several embeddings, scoring them all with a single
+        matrix-matrix product.
+
+        Args:
+            embeddings (list): The query embeddings.
+            k (int, optional): The number of documents to return per query. Defaults to 4.
+
+        Returns:
+            list: One list of Document objects per query, best match first.
+        """
+        if not self.ids or len(embeddings) == 0:
+            return [[] for _ in embeddings]
+
+        queries = self._normalize(embeddings)
+        k = min(k, len(self.ids))
+        if self.quantization:
+            # The codes are scored against every query at once, then each shortlist is re-scored on its own
+            approximate = self._approximate_scores(queries)
+            return [
+                [self.documents[i] for i in self._rescore(query, scores, k)[0]]
+                for query, scores in zip(queries, approximate)
+            ]
+
+        scores = queries @ self.vectors.T
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+
+        return [[self.documents[i] for i in row] for row in top]
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, filter: dict = None, **kwargs):
+        """Returns the k documents most similar to the given embedding."""
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: dict = None, **kwargs):
+        """Returns the k documents most similar to the query, with their cosine similarity."""
+        embedding = self.embedding.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: dict = None, **kwargs):
+        """Returns the k documents most similar to the query.
+
+        Args:
+            query (str): The text to look up.
+            k (int, optional): The number of documents to return. Defaults to 4.
+            filter (dict, optional): Metadata key/value pairs the documents must match.
+
+        Returns:
+            list: A list of Document objects, best match first.
+        """
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    async def asimilarity_search_by_vector_with_score(self, embedding, k: int = 4, filter: dict = None):
+        """Async version of `similarity_search_by_vector_with_score`. The search is in-memory, so it runs inline."""
+        return self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+
+    async def asimilarity_search_by_vector(self, embedding, k: int = 4, filter: dict = None, **kwargs):
+        """Async version of `similarity_search_by_vector`."""
+        return [doc for doc, _ in await self.asimilarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+    async def amax_marginal_relevance_search_by_vector(self, embedding, k: int = 4, fetch_k: int = 20,
+                                                       lambda_mult: float = 0.5, filter: dict = None, **kwargs):
+        """Async version of `max_marginal_relevance_search_by_vector` (in-memory, so it runs inline)."""
+        return self.max_marginal_relevance_search_by_vector(embedding, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult,
+                                                            filter=filter)
+
+    async def asimilarity_search(self, query: str, k: int = 4, filter: dict = None, **kwargs):
+        """Async version of `similarity_search`, only awaiting the query embedding."""
+        embedding = await self.embedding.aembed_query(query)
+        return await self.asimilarity_search_by_vector(embedding, k=k, filter=filter)
+
+    def delete(self, ids=None, delete_all: bool = None, **kwargs):
+        """Deletes documents from the index.
+
+        Args:
+            ids (list, optional): The IDs of the documents to delete.
+            delete_all (bool, optional): If True, deletes every document.
+        """
+        with self._write_lock:
+            if delete_all:
+                self._remove(set(self.ids))
+            else:
+                self._remove(set(ids or []))
+            self.save()
+
+    def _remove(self, ids: set):
+        """Removes documents from memory, without saving."""
+        keep = [i for i, doc_id in enumerate(self.ids) if doc_id not in ids]
+        self.ids = [self.ids[i] for i in keep]
+        self.documents = [self.documents[i] for i in keep]
+        self.vectors = np.ascontiguousarray(self.vectors[keep]) if keep else np.zeros((0, 0), dtype=np.float32)
+        if self.codes is not None:
+            self.codes = self.codes[keep] if keep else None
+            self.scales = self.scales[keep] if self.scales is not None and keep else None
+        self._index_sections()
+
+    def update_metadata(self, updates: dict):
+        """Updates the metadata of documents without re-embedding them.
+
+        Args:
+            updates (dict): Document IDs mapped to the metadata fields to set.
+        """
+        with self._write_lock:
+            positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+            for doc_id, metadata in updates.items():
+                if doc_id in positions:
+                    self.documents[positions[doc_id]].metadata.update(metadata)
+            if any('section' in metadata for metadata in updates.values()):
+                self._index_sections()
+            self.save()
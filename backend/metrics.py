@@ -0,0 +1,227 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+
+# Latency buckets in seconds, from a cache hit to a slow LLM generation
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames: tuple, labels: tuple, extra: str = None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter():
+    """Counter Class
+    This class counts events (cache hits, errors, tokens, ...), one value per combination of label values.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        """Adds an amount (1 by default) to the counter of the given label values."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        """Returns the counter of the given label values."""
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self):
+        """Returns the counter in the Prometheus text exposition format."""
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram():
+    """Histogram Class
+    This class records durations (or any other values) in fixed buckets, one series per combination of label values.
+    Recording a value is a binary search and a few additions under a lock, cheap enough to leave on in production.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # Label values -> per-bucket counts (the last one is +Inf), then the sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        """Records a value in the series of the given label values."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """Records the duration of the enclosed block, in seconds, in the series of the given label values."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels):
+        """Returns the number of values recorded in the series of the given label values."""
+        with self._lock:
+            series = self._series.get(labels)
+            return sum(series[:-1]) if series else 0
+
+    def render(self):
+        """Returns the histogram in the Prometheus text exposition format."""
+        with self._lock:
+            all_series = {labels: list(series) for labels, series in self._series.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(all_series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry():
+    """Metrics Registry Class
+    This class holds the metrics of the process and renders them for the Prometheus `/metrics` route.
+    """
+
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()):
+        """Creates and registers a Counter."""
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        """Creates and registers a Histogram."""
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Returns every registered metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Shared by the serving entry points and the backend classes
+metrics = MetricsRegistry()
+
+stage_seconds = metrics.histogram(
+    'resume_chatbot_stage_seconds',
+    'Time spent in each stage of answering a question (embedding, vector_search, prompt, llm, ...)',
+    ('stage',)
+)
+request_seconds = metrics.histogram(
+    'resume_chatbot_request_seconds',
+    'Time to respond to an HTTP request (to the first byte for streamed responses)',
+    ('route', 'method', 'status')
+)
+prompt_tokens = metrics.histogram(
+    'resume_chatbot_prompt_tokens',
+    'Input tokens of each assembled prompt (context, history and template)',
+    buckets=(256, 512, 1024, 1536, 2048, 3072, 4096, 6144, 8192, 16384)
+)
+context_tokens_saved = metrics.histogram(
+    'resume_chatbot_context_tokens_saved',
+    'Tokens of each prompt\'s retrieved chunks not sent to the LLM as repeated text (merged overlaps of adjacent '
+    'chunks, near-duplicate passages)',
+    buckets=(0, 25, 50, 100, 200, 400, 800, 1600)
+)
+llm_tokens = metrics.counter(
+    'resume_chatbot_llm_tokens_total',
+    'LLM tokens used, as reported by the provider',
+    ('type',)
+)
+answer_cache_lookups = metrics.counter(
+    'resume_chatbot_answer_cache_lookups_total',
+    'Answer cache lookups by result (exact, semantic or miss)',
+    ('result',)
+)
+embedding_cache_lookups = metrics.counter(
+    'resume_chatbot_embedding_cache_lookups_total',
+    'Embedding cache lookups by result (hit or miss)',
+    ('result',)
+)
+retrievals = metrics.counter(
+    'resume_chatbot_retrievals_total',
+    'Context retrievals by route (lexical: confident BM25 match, no embedding or vector search; hybrid; vector)',
+    ('route',)
+)
+section_filters = metrics.counter(
+    'resume_chatbot_section_filter_total',
+    'Retrievals by the resume section they were restricted to (none: the question is not about a single section)',
+    ('section',)
+)
+single_flight_calls = metrics.counter(
+    'resume_chatbot_single_flight_total',
+    'Answer computations by serving mode (sync or async) and role (leader: ran the computation; coalesced: waited '
+    'on an identical question already in flight)',
+    ('mode', 'role')
+)
+admissions = metrics.counter(
+    'resume_chatbot_admissions_total',
+    'Admission decisions by limiter (llm, embedding or quota) and result (admitted: at once; queued: after waiting; '
+    'shed: rejected with 429/503; timeout: waited past the latency budget)',
+    ('limiter', 'result')
+)
+queue_wait_seconds = metrics.histogram(
+    'resume_chatbot_queue_wait_seconds',
+    'Time admitted calls waited for a provider slot, by limiter',
+    ('limiter',)
+)
+conversation_log_records = metrics.counter(
+    'resume_chatbot_conversation_log_total',
+    'Conversation log records by result (written; dropped: queue full; failed: write error)',
+    ('result',)
+)
+errors = metrics.counter(
+    'resume_chatbot_errors_total',
+    'Errors by stage',
+    ('stage',)
+)
+
+
+@contextmanager
+def stage(name: str):
+    """Times the enclosed block under the given stage, and counts the exceptions it raises as errors of that stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        errors.inc(name)
+        raise
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, name)
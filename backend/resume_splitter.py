@@ -0,0 +1,261 @@
+import re
+import itertools
+
+
+# Canonical sections and the headings (lowercase, without punctuation) that open them, in English and French
+SECTION_HEADINGS = {
+    'summary': ('summary', 'professional summary', 'profile', 'professional profile', 'about', 'about me',
+                'objective', 'career objective', 'profil', 'à propos'),
+    'experience': ('experience', 'experiences', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history', 'career history', 'career', 'expérience', 'expériences',
+                   'expérience professionnelle', 'expériences professionnelles', 'parcours professionnel'),
+    'education': ('education', 'academic background', 'education and training', 'studies', 'formation',
+                  'formations', 'diplômes', 'études', 'parcours académique'),
+    'skills': ('skills', 'technical skills', 'core skills', 'key skills', 'competencies', 'core competencies',
+               'technologies', 'tech stack', 'tools', 'languages', 'skills and tools', 'compétences',
+               'compétences techniques', 'outils', 'langues'),
+    'projects': ('projects', 'personal projects', 'selected projects', 'side projects', 'key projects', 'projets',
+                 'projets personnels'),
+    'certifications': ('certifications', 'certification', 'certificates', 'licenses', 'licenses and certifications',
+                       'awards', 'awards and certifications', 'certificats'),
+}
+SECTIONS = tuple(SECTION_HEADINGS)
+
+# Sections made of dated entries (a role, a degree, ...): a date range line starts a new entry
+ENTRY_SECTIONS = ('experience', 'education', 'projects', 'certifications')
+
+# Phrasings that unambiguously point at a single section (see `question_section`). Generic words ('experience',
+# 'work', 'technologies', 'tools', ...) are left out: "Do you have experience with Docker?" is about a skill, and
+# "Which technologies did you use at Globex?" about a role
+SECTION_QUESTION_WORDS = {
+    'experience': ('work history', 'employment history', 'career history', 'previous employer', 'previous employers',
+                   'past employers', 'previous jobs', 'previous roles', 'job titles', 'where have you worked',
+                   'where did you work', 'companies have you worked'),
+    'education': ('education', 'degree', 'degrees', 'diploma', 'diplomas', 'university', 'universities',
+                  'graduated', 'studied', 'where did you study', 'bachelor', 'phd'),
+    'skills': ('skills', 'skill set', 'skillset', 'tech stack', 'programming languages'),
+    'projects': ('side project', 'side projects', 'personal project', 'personal projects', 'portfolio'),
+    'certifications': ('certification', 'certifications', 'certified', 'certificate', 'certificates'),
+}
+
+_HEADINGS = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+_MONTH = (r"(?:jan(?:uary|v\.?|vier)?|feb(?:ruary)?|f[ée]v(?:\.|rier)?|mar(?:ch|s)?|apr(?:il)?|avr(?:\.|il)?|may|mai|"
+          r"june?|juin|july?|juil(?:\.|let)?|aug(?:ust)?|ao[uû]t|sept?(?:ember|\.|embre)?|oct(?:ober|\.|obre)?|"
+          r"nov(?:ember|\.|embre)?|d[ée]c(?:ember|\.|embre)?)")
+_DATE = rf"(?:{_MONTH}\.?\s+|\d{{1,2}}/)?(?:19|20)\d{{2}}"
+_DATE_RANGE = re.compile(
+    rf"\b{_DATE}\s*(?:-|–|—|to|à|au)\s*(?:{_DATE}|present|current|now|today|aujourd'hui|présent|actuel)",
+    re.IGNORECASE
+)
+_BULLET = re.compile(r"^[-–•*·▪◦●]")
+
+
+def heading_section(line: str):
+    """Returns the section a line opens if it is a section heading ('Work Experience', '## SKILLS:', ...), else None."""
+    text = line.strip().strip('#*_=:|-–— \t').lower().replace('&', 'and')
+    if not text or len(text) > 40:
+        return None
+    return _HEADINGS.get(re.sub(r"\s+", " ", text))
+
+
+def question_section(question: str):
+    """Returns the section a question is about when its words point at exactly one section, else None.
+
+    Args:
+        question (str): The user's question.
+
+    Returns:
+        str | None: The section ('experience', 'education', 'skills', 'projects' or 'certifications').
+    """
+    text = f" {re.sub(r'[^a-z ]+', ' ', question.lower())} "
+    sections = [section for section, words in SECTION_QUESTION_WORDS.items()
+                if any(f" {word} " in text for word in words)]
+    return sections[0] if len(sections) == 1 else None
+
+
+class ResumeSplitter():
+    """Resume Splitter Class
+    This class cuts a resume into chunks along its structure instead of every `chunk_size` characters: section
+    headings (experience, education, skills, projects, certifications) start new chunks, and within the dated
+    sections each entry (a role, a degree, ...) starts at its date range line, together with its title lines. Each
+    entry is one chunk, unless it is longer than `chunk_size` characters and split with overlap, and every chunk
+    starts with its section heading (and its role, for the pieces of a long entry). Chunks are tagged with a
+    'section' metadata (and 'role' for the entries), so retrieval can be restricted to one section. The text before
+    the first heading (name, contact, or a whole document without headings) is split by the generic splitter, page by
+    page, with each page's own metadata. It has the `split_documents` method of the LangChain text splitters.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.max_entry_length = 50 * chunk_size
+        self._text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                                                             length_function=len)
+
+    @staticmethod
+    def _is_title(line: str):
+        """Whether a line looks like the title of an entry (a role, a school), rather than a sentence or a bullet."""
+        line = line.strip()
+        return bool(line) and len(line) <= 100 and not _BULLET.match(line) and ':' not in line \
+            and not line.endswith('.') and not _DATE_RANGE.search(line)
+
+    def _entries(self, documents):
+        """Reads the documents line by line, in order, and yields their entries. Only the current entry is kept in
+        memory, so pages streamed one at a time are split as they arrive. A dated entry may continue on the next
+        page; the other text of a section is cut at page boundaries, so it keeps the metadata of its page.
+
+        Yields:
+            tuple: The section, its heading line, the entry's role (None outside dated entries), the entry's lines
+                and the metadata of the document its first line comes from.
+        """
+        section, heading = None, None
+        lines, pages, length, role, dated = [], [], 0, None, False  # pages: the metadata of each line's document
+
+        def entry():
+            # The entry takes the metadata of the document of its first non-blank line
+            metadata = next(page for line, page in zip(lines, pages) if line.strip())
+            return section, heading, role, lines, metadata
+
+        for document in documents:
+            if not dated and lines:
+                if any(lines):
+                    yield entry()
+                lines, pages, length = [], [], 0
+            for line in document.page_content.splitlines():
+                line = line.rstrip()
+                opened = heading_section(line)
+                if opened is not None:
+                    if any(lines):
+                        yield entry()
+                    section, heading = opened, line.strip().strip('#*_=:|-–— \t')
+                    lines, pages, length, role, dated = [], [], 0, None, False
+                    continue
+
+                if section in ENTRY_SECTIONS and _DATE_RANGE.search(line):
+                    # The lines of an entry read so far without a date are the title of this one ('Acme Corp' /
+                    # 'Data Engineer' / '2019 - 2022'); otherwise its title lines are the last ones of the previous
+                    # entry: the title lines after its last blank line, or the line just above the date
+                    titles = len(lines)
+                    if dated:
+                        titles = 0
+                        while titles < min(2, len(lines)) and self._is_title(lines[-1 - titles]):
+                            titles += 1
+                        if titles == 2 and (len(lines) == 2 or lines[-3].strip()):
+                            titles = 1  # Two title lines only when a blank line sets them apart
+                    cut = len(lines) - titles
+                    header = [(entry_line, page) for entry_line, page in zip(lines[cut:], pages[cut:])
+                              if entry_line.strip()]
+                    lines, pages = lines[:cut], pages[:cut]
+                    if any(lines):
+                        yield entry()
+                    role = " | ".join(entry_line.strip() for entry_line, _ in header + [(line, None)])[:200]
+                    lines = [entry_line for entry_line, _ in header] + [line]
+                    pages = [page for _, page in header] + [document.metadata]
+                    length, dated = sum(len(entry_line) for entry_line in lines), True
+                    continue
+
+                lines.append(line)
+                pages.append(document.metadata)
+                length += len(line)
+                if length > self.max_entry_length:
+                    # Bounds the memory used by a long section without dates
+                    if any(lines):
+                        yield entry()
+                    lines, pages, length = [], [], 0
+
+        if any(lines):
+            yield entry()
+
+    def _chunk(self, text: str, section: str, roles: list, metadata: dict):
+        from langchain_core.documents import Document
+
+        metadata = dict(metadata or {}, section=section)
+        if len(roles) == 1:
+            metadata['role'] = roles[0]
+        return Document(page_content=text, metadata=metadata)
+
+    def _split_entry(self, text: str, section: str, heading_line: str, role: str, metadata: dict):
+        """Splits an entry too long for one chunk with overlap, repeating its heading and role on every piece."""
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        prefix = heading_line + (f"{role}\n" if role else "")
+        text_splitter = self._text_splitter
+        if prefix:
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=max(self.chunk_size - len(prefix), self.chunk_size // 2),
+                chunk_overlap=self.chunk_overlap,
+                length_function=len
+            )
+        roles = [role] if role else []
+        for position, piece in enumerate(text_splitter.split_text(text)):
+            # The first piece starts with the role line already
+            yield self._chunk((heading_line if position == 0 else prefix) + piece, section, roles, metadata)
+
+    def lazy_split_documents(self, documents):
+        """Splits documents (e.g. the pages of a PDF, read lazily) into chunks, in order.
+
+        Args:
+            documents (iterable): The Document objects of one file, in reading order.
+
+        Yields:
+            Document: Each chunk, with the metadata of the document it starts in, plus 'section' (and 'role') after
+                the first section heading.
+        """
+        from langchain_core.documents import Document
+
+        documents = iter(documents)
+        for document in documents:
+            lines = document.page_content.splitlines(keepends=True)
+            position = next((i for i, line in enumerate(lines) if heading_section(line) is not None), None)
+            if position is None:
+                yield from self._text_splitter.split_documents([document])
+                continue
+            prefix = "".join(lines[:position])
+            if prefix.strip():
+                yield from self._text_splitter.split_documents([Document(page_content=prefix,
+                                                                         metadata=document.metadata)])
+            rest = Document(page_content="".join(lines[position:]), metadata=document.metadata)
+            yield from self._split_sections(itertools.chain([rest], documents))
+            return
+
+    def _split_sections(self, documents):
+        """Splits documents that start with a section heading along their sections and entries."""
+        packed, packed_length, packed_key, packed_roles, packed_metadata = [], 0, None, [], None
+
+        for section, heading, role, lines, metadata in self._entries(documents):
+            text = "\n".join(lines).strip()
+            if not text:
+                continue
+            heading_line = f"{heading}\n" if heading else ""
+
+            # Each dated entry (a role, a degree) gets its own chunk; the other text of a section is packed together
+            # while it fits
+            if packed and ((section, heading) != packed_key[:2] or role or packed_roles or metadata != packed_metadata
+                           or packed_length + 2 + len(text) > self.chunk_size):
+                yield self._chunk(packed_key[2] + "\n\n".join(packed), section=packed_key[0], roles=packed_roles,
+                                  metadata=packed_metadata)
+                packed = []
+            if len(heading_line) + len(text) > self.chunk_size:
+                yield from self._split_entry(text, section, heading_line, role, metadata)
+                continue
+            if not packed:
+                packed_length, packed_key, packed_roles, packed_metadata = len(heading_line) - 2, \
+                    (section, heading, heading_line), [], metadata
+            packed.append(text)
+            packed_length += 2 + len(text)
+            if role:
+                packed_roles.append(role)
+
+        if packed:
+            yield self._chunk(packed_key[2] + "\n\n".join(packed), section=packed_key[0], roles=packed_roles,
+                              metadata=packed_metadata)
+
+    def split_documents(self, documents):
+        """Splits documents into chunks (see `lazy_split_documents`).
+
+        Returns:
+            list: The chunks (Document objects).
+        """
+        return list(self.lazy_split_documents(documents))
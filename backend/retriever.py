@@ -1,30 +1,113 @@
 import os
-from pinecone import Pinecone, ServerlessSpec
-from langchain_pinecone import PineconeVectorStore
-from langchain_community.embeddings import CohereEmbeddings
+import asyncio
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from backend.local_vector_store import LocalVectorStore
+from backend.index_snapshot import SnapshotVectorStore, write_snapshot
+from backend.embedding_cache import CachedEmbeddings
+from backend.startup import startup_report
+from backend.metrics import stage, retrievals, section_filters
+from backend.lexical_index import BM25Index, chunk_key, reciprocal_rank_fusion
+from backend.transport import get_transport
+from backend.cohere_embeddings import CohereEmbeddings
+from backend.admission import create_limiter
+from backend.resume_splitter import question_section
 
 
 class Retriever():
     """Retriever Class
     This class encapsulates the functionality for retrieving and managing documents within the Pinecone vector database.
     It handles the creation of embeddings, interaction with the Pinecone service, and the loading of documents.
-    Uses Cohere for embeddings.
+    Uses Cohere for embeddings. With VECTOR_BACKEND=local, documents are kept in an in-process LocalVectorStore
+    instead of Pinecone. A local BM25 index mirrors the indexed chunks for hybrid (lexical + vector) retrieval.
+    The Pinecone and LangChain packages are imported on first use to keep cold starts fast, and all the outbound
+    clients share the pooled connections of the process-wide HttpTransport.
     """
     
-    def __init__(self, parameters: dict[str, any]):
+    def __init__(self, parameters: dict[str, any], embeddings=None):
         self.parameters = parameters
+        self.transport = get_transport(parameters)
         
-        # Initialize Cohere embeddings
-        embeddings = CohereEmbeddings(
-            cohere_api_key=parameters['embedding_api_key'],
-            model=parameters.get('embedding_model', 'embed-english-v3.0')
-        )
+        if embeddings is None:
+            # Initialize Cohere embeddings
+            embeddings = CohereEmbeddings(
+                api_key=parameters['embedding_api_key'],
+                model=parameters.get('embedding_model', 'embed-english-v3.0'),
+                transport=self.transport
+            )
+            
+            # Cache embeddings so repeated questions skip the remote embed call
+            embeddings = CachedEmbeddings(
+                embeddings,
+                model=parameters.get('embedding_model', 'embed-english-v3.0'),
+                max_size=parameters.get('embedding_cache_size', 1024),
+                cache_path=parameters.get('embedding_cache_path'),
+                limiter=create_limiter(parameters, 'embedding')  # Bounds the concurrent query embed calls
+            )
         
         self.embeddings = embeddings
         self.index_name = parameters['pinecone_index_name']
+        self.namespace = parameters.get('pinecone_namespace')  # One namespace per tenant in multi-tenant serving
+        self.vector_backend = parameters.get('vector_backend', 'pinecone')
+        
+        # Maximal marginal relevance selection of the vector results among more candidates (1: relevance only)
+        self.fetch_k = parameters.get('retrieval_fetch_k', 20)
+        self.mmr_lambda = parameters.get('retrieval_mmr_lambda', 0.7)
+        
+        # Questions about a single resume section (skills, education, ...) only search the chunks of that section
+        self.section_routing = parameters.get('section_routing_enabled', True)
+        
+        # Local BM25 index of the same chunks, fused with the vector results (see `search`)
+        self.lexical_index = None
+        if parameters.get('hybrid_search_enabled', True):
+            with startup_report.phase('lexical index load'):
+                self.lexical_index = BM25Index(parameters.get('lexical_index_path'))
+        
+        quantization = parameters.get('local_index_quantization', 'none')
+        if self.vector_backend == 'snapshot':
+            # Open the index snapshot shipped with the deployment, read-only and memory-mapped (no network at boot)
+            with startup_report.phase('index snapshot open'):
+                self.vector_store = SnapshotVectorStore(
+                    embedding=embeddings,
+                    snapshot_path=parameters.get('index_snapshot_path'),
+                    quantization=None if quantization == 'none' else quantization,
+                    rescore_factor=parameters.get('local_index_rescore_factor'),
+                    embedding_model=parameters.get('embedding_model', 'embed-english-v3.0')
+                )
+            return
+        
+        if self.vector_backend == 'local':
+            # Initialize the in-process vector store (no network round-trip at query time)
+            with startup_report.phase('local index load'):
+                self.vector_store = LocalVectorStore(
+                    embedding=embeddings,
+                    index_path=parameters.get('local_index_path'),
+                    quantization=None if quantization == 'none' else quantization,
+                    rescore_factor=parameters.get('local_index_rescore_factor')
+                )
+            return
+        
+        with startup_report.phase('import pinecone'):
+            from langchain_pinecone import PineconeVectorStore
+        
+        # The index already exists in production: only check it when explicitly requested (e.g. by index_resume.py)
+        if parameters.get('pinecone_check_index', False):
+            with startup_report.phase('Pinecone index check'):
+                self.ensure_index()
+        
+        # Initialize vector store
+        with startup_report.phase('Pinecone vector store'):
+            self.vector_store = PineconeVectorStore(
+                index=self.transport.get_pinecone_index(self.index_name),
+                embedding=embeddings,
+                namespace=self.namespace
+            )
+    
+    def ensure_index(self):
+        """Creates the Pinecone index if it does not exist yet."""
+        from pinecone import ServerlessSpec
         
-        # Initialize Pinecone
-        pc = Pinecone(api_key=parameters['pinecone_api_key'])
+        pc = self.transport.get_pinecone()
         
         # Check if index exists, if not create it
         existing_indexes = [index.name for index in pc.list_indexes()]
@@ -32,7 +115,7 @@ class Retriever():
         if self.index_name not in existing_indexes:
             print(f"Index '{self.index_name}' does not exist. Creating new index...")
             # Create index with appropriate dimensions based on embedding model
-            dimension = self._get_embedding_dimension('cohere', parameters.get('embedding_model'))
+            dimension = self._get_embedding_dimension('cohere', self.parameters.get('embedding_model'))
             
             pc.create_index(
                 name=self.index_name,
@@ -40,17 +123,10 @@ class Retriever():
                 metric='cosine',
                 spec=ServerlessSpec(
                     cloud='aws',
-                    region=parameters.get('pinecone_environment', 'us-east-1')
+                    region=self.parameters.get('pinecone_environment', 'us-east-1')
                 )
             )
             print(f"Index '{self.index_name}' created successfully.")
-        
-        # Initialize vector store
-        self.vector_store = PineconeVectorStore(
-            index_name=self.index_name,
-            embedding=embeddings,
-            pinecone_api_key=parameters['pinecone_api_key']
-        )
     
     def _get_embedding_dimension(self, provider, model):
         """Get the dimension of Cohere embeddings based on model."""
@@ -64,7 +140,8 @@ class Retriever():
         
         return dimensions.get(provider, {}).get(model, 1024)  # Default to 1024
     
-    def docx_loader(self, docx_file_path: str):
+    @staticmethod
+    def docx_loader(docx_file_path: str):
         """Loads documents from a DOCX file.
 
         Args:
@@ -77,7 +154,8 @@ class Retriever():
         loader = Docx2txtLoader(docx_file_path)
         return loader.load()
     
-    def pdf_loader(self, pdf_file_path: str):
+    @staticmethod
+    def pdf_loader(pdf_file_path: str):
         """Loads documents from a PDF file.
         Uses pypdf directly for Windows compatibility.
 
@@ -87,22 +165,34 @@ class Retriever():
         Returns:
             list: A list of Document objects loaded from the PDF file.
         """
+        return list(Retriever.pdf_page_stream(pdf_file_path))
+    
+    @staticmethod
+    def pdf_page_stream(pdf_file_path: str):
+        """Yields the pages of a PDF file one at a time, as pypdf extracts them, so memory use does not grow with 
+        the document size.
+
+        Args:
+            pdf_file_path (str): The path to the PDF file.
+
+        Yields:
+            Document: One Document object per non-empty page.
+        """
         import pypdf
         from langchain.schema import Document
         
-        documents = []
         with open(pdf_file_path, 'rb') as file:
             pdf_reader = pypdf.PdfReader(file)
             for page_num, page in enumerate(pdf_reader.pages):
                 text = page.extract_text()
                 if text.strip():
-                    documents.append(Document(
+                    yield Document(
                         page_content=text,
                         metadata={"source": pdf_file_path, "page": page_num}
-                    ))
-        return documents
+                    )
     
-    def text_loader(self, text_file_path: str):
+    @staticmethod
+    def text_loader(text_file_path: str):
         """Loads documents from a text file.
 
         Args:
@@ -115,38 +205,501 @@ class Retriever():
         loader = TextLoader(text_file_path)
         return loader.load()
     
-    def upload_docs_index(self, docs):
-        """Uploads documents to the Pinecone index.
+    @staticmethod
+    def text_block_stream(text_file_path: str, block_size: int = 65536):
+        """Yields a text file in blocks of about `block_size` characters, cut at paragraph boundaries, so memory 
+        use does not grow with the file size.
+
+        Args:
+            text_file_path (str): The path to the text file.
+            block_size (int, optional): The number of characters read at a time. Defaults to 65536.
+
+        Yields:
+            Document: One Document object per block.
+        """
+        from langchain.schema import Document
+        
+        block_num = 0
+        buffer = ""
+        with open(text_file_path) as file:
+            while True:
+                data = file.read(block_size)
+                buffer += data
+                if data:
+                    cut = buffer.rfind("\n\n")
+                    if cut > 0:
+                        cut += 2
+                    elif len(buffer) >= 4 * block_size:
+                        cut = len(buffer)  # No paragraph boundary in sight, cut anyway to bound memory
+                    else:
+                        continue
+                else:
+                    cut = len(buffer)
+                
+                block, buffer = buffer[:cut], buffer[cut:]
+                if block.strip():
+                    yield Document(
+                        page_content=block,
+                        metadata={"source": text_file_path, "block": block_num}
+                    )
+                    block_num += 1
+                if not data:
+                    break
+    
+    def upload_docs_index(self, docs, ids=None):
+        """Uploads documents to the Pinecone index (or to the local index with VECTOR_BACKEND=local).
 
         Args:
             docs (list): A list of Document objects to be uploaded.
+            ids (list, optional): The IDs of the documents. Existing documents with the same IDs are overwritten.
+                Random IDs are generated if not provided.
             
         Returns:
             list: List of document IDs that were added.
         """
         try:
-            ids = self.vector_store.add_documents(documents=docs)
+            ids = self.vector_store.add_documents(documents=docs, ids=ids)
+            self._add_lexical(docs, ids)
             print(f"Successfully uploaded {len(ids)} documents to Pinecone index '{self.index_name}'.")
             return ids
         except Exception as e:
             print(f"Error uploading documents to Pinecone: {str(e)}")
             raise
 
+    def upsert_embeddings(self, docs, vectors, ids, save: bool = True):
+        """Uploads documents whose embeddings were already computed, overwriting documents with the same IDs.
+
+        Args:
+            docs (list): A list of Document objects to be uploaded.
+            vectors (list): One embedding per document.
+            ids (list): The IDs of the documents.
+            save (bool, optional): Whether to write the local files (local vector store and lexical index) now. 
+                Defaults to True; callers uploading many batches pass False and call `save_indexes` once.
+        """
+        if self.vector_backend == 'local':
+            self.vector_store.add_vectors(vectors, docs, ids=ids, save=save)
+        else:
+            index = self.transport.get_pinecone_index(self.index_name)
+            # Same layout as PineconeVectorStore: the chunk text is stored in the 'text' metadata field
+            index.upsert(vectors=[
+                {'id': doc_id, 'values': vector, 'metadata': {**doc.metadata, 'text': doc.page_content}}
+                for doc, vector, doc_id in zip(docs, vectors, ids)
+            ], namespace=self.namespace)
+        self._add_lexical(docs, ids, save=save)
+
+    def _add_lexical(self, docs, ids, save: bool = True):
+        """Mirrors uploaded chunks in the lexical index."""
+        if self.lexical_index is not None:
+            self.lexical_index.add(docs, ids)
+            if save:
+                self.lexical_index.save()
+
+    def save_indexes(self):
+        """Writes the local files of the index (local vector store and lexical index), see `upsert_embeddings`."""
+        if self.vector_backend == 'local':
+            self.vector_store.save()
+        if self.lexical_index is not None:
+            self.lexical_index.save()
+
+    def backfill_lexical_index(self, docs, ids):
+        """Adds already indexed chunks that are missing from the lexical index (e.g. indexed before it existed),
+        without embedding or uploading them again.
+
+        Args:
+            docs (list): The Document objects of the indexed chunks.
+            ids (list): Their IDs.
+
+        Returns:
+            int: The number of chunks added.
+        """
+        if self.lexical_index is None:
+            return 0
+        missing = [(doc, doc_id) for doc, doc_id in zip(docs, ids) if doc_id not in self.lexical_index]
+        if missing:
+            self._add_lexical([doc for doc, _ in missing], [doc_id for _, doc_id in missing])
+        return len(missing)
+
+    def delete_documents(self, ids):
+        """Deletes documents from the index by ID.
+
+        Args:
+            ids (list): The IDs of the documents to delete.
+        """
+        if not ids:
+            return
+        if self.vector_backend == 'local':
+            self.vector_store.delete(ids=ids)
+        else:
+            index = self.transport.get_pinecone_index(self.index_name)
+            # Pinecone accepts at most 1000 IDs per delete call
+            for start in range(0, len(ids), 1000):
+                index.delete(ids=ids[start:start + 1000], namespace=self.namespace)
+        if self.lexical_index is not None:
+            self.lexical_index.delete(ids=ids)
+            self.lexical_index.save()
+        print(f"Deleted {len(ids)} documents from index '{self.index_name}'.")
+
+    def update_documents_metadata(self, updates):
+        """Updates the metadata of indexed documents without re-embedding them.
+
+        Args:
+            updates (dict): Document IDs mapped to the metadata fields to set.
+        """
+        if not updates:
+            return
+        if self.vector_backend == 'local':
+            self.vector_store.update_metadata(updates)
+        else:
+            index = self.transport.get_pinecone_index(self.index_name)
+            for doc_id, metadata in updates.items():
+                index.update(id=doc_id, set_metadata=metadata, namespace=self.namespace)
+        if self.lexical_index is not None:
+            self.lexical_index.update_metadata(updates)
+            self.lexical_index.save()
+
     def get_vector_store(self):
         """Retrieves the vector store object.
 
         Returns:
-            PineconeVectorStore: The vector store object.
+            PineconeVectorStore | LocalVectorStore: The vector store object.
         """
         return self.vector_store
     
+    def embed_query(self, query: str):
+        """Embeds a question through the embedding cache.
+
+        Args:
+            query (str): The question.
+
+        Returns:
+            list: The query embedding.
+        """
+        with stage('embedding'):
+            return self.embeddings.embed_query(query)
+    
+    async def aembed_query(self, query: str):
+        """Async version of `embed_query`."""
+        with stage('embedding'):
+            return await self.embeddings.aembed_query(query)
+    
+    def embed_queries(self, queries: list):
+        """Embeds several questions, the uncached ones in a single batch call."""
+        with stage('embedding'):
+            return self.embeddings.embed_queries(queries)
+    
+    async def aembed_queries(self, queries: list):
+        """Async version of `embed_queries`."""
+        with stage('embedding'):
+            return await self.embeddings.aembed_queries(queries)
+    
+    def search_by_vector(self, embedding, k: int = 3, filter: dict = None):
+        """Returns the chunks most similar to a query embedding.
+        Both vector stores implement `similarity_search_by_vector_with_score` (PineconeVectorStore does not implement
+        `similarity_search_by_vector`). With RETRIEVAL_MMR_LAMBDA below 1, the k chunks are picked among `fetch_k`
+        candidates by maximal marginal relevance, so near-identical overlapping chunks do not crowd out the others.
+
+        Args:
+            embedding (list): The query embedding.
+            k (int, optional): The number of chunks. Defaults to 3.
+            filter (dict, optional): Metadata key/value pairs the chunks must match (e.g. {'section': 'skills'}).
+
+        Returns:
+            list: The most similar Document objects.
+        """
+        with stage('vector_search'):
+            if self.mmr_lambda < 1:
+                return self.vector_store.max_marginal_relevance_search_by_vector(
+                    embedding, k=k, fetch_k=max(k, self.fetch_k), lambda_mult=self.mmr_lambda, filter=filter
+                )
+            results = self.vector_store.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+        return [doc for doc, _ in results]
+    
+    async def asearch_by_vector(self, embedding, k: int = 3, filter: dict = None):
+        """Async version of `search_by_vector`. Vector stores without a native async search run in a worker thread."""
+        if not hasattr(self.vector_store, 'asimilarity_search_by_vector_with_score'):
+            return await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self.search_by_vector(embedding, k=k, filter=filter)
+            )
+        with stage('vector_search'):
+            if self.mmr_lambda < 1:
+                return await self.vector_store.amax_marginal_relevance_search_by_vector(
+                    embedding, k=k, fetch_k=max(k, self.fetch_k), lambda_mult=self.mmr_lambda, filter=filter
+                )
+            results = await self.vector_store.asimilarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+        return [doc for doc, _ in results]
+    
+    def search_by_vectors(self, embeddings: list, k: int = 3, max_concurrency: int = 4):
+        """Returns the chunks most similar to each of several query embeddings: in one matrix product with the local
+        vector store (without MMR selection), with concurrent queries otherwise.
+
+        Returns:
+            list: One list of Document objects per embedding.
+        """
+        if hasattr(self.vector_store, 'similarity_search_by_vectors') and self.mmr_lambda >= 1:
+            with stage('vector_search'):
+                return self.vector_store.similarity_search_by_vectors(embeddings, k=k)
+        with ThreadPoolExecutor(max_workers=max(1, min(len(embeddings), max_concurrency))) as executor:
+            return list(executor.map(lambda embedding: self.search_by_vector(embedding, k=k), embeddings))
+    
+    async def asearch_by_vectors(self, embeddings: list, k: int = 3):
+        """Async version of `search_by_vectors`."""
+        if hasattr(self.vector_store, 'similarity_search_by_vectors') and self.mmr_lambda >= 1:
+            return self.search_by_vectors(embeddings, k=k)
+        return list(await asyncio.gather(*[self.asearch_by_vector(embedding, k=k) for embedding in embeddings]))
+    
+    def lexical_search(self, query: str, filter: dict = None):
+        """Searches the lexical index for the fusion candidates of a question.
+
+        Args:
+            query (str): The question.
+            filter (dict, optional): Metadata key/value pairs the chunks must match.
+
+        Returns:
+            tuple: The candidate Document objects, best match first, and whether the best match is confident enough
+                to answer from the lexical results alone: it contains at least HYBRID_LEXICAL_MIN_TERMS of the
+                question's terms and their share of its term weight reaches HYBRID_LEXICAL_CONFIDENCE (always False
+                when hybrid search is disabled).
+        """
+        if self.lexical_index is None or not len(self.lexical_index):
+            return [], False
+        with stage('lexical_search'):
+            hits, confidence = self.lexical_index.search(query, k=self.parameters.get('hybrid_candidates', 10),
+                                                         filter=filter,
+                                                         min_terms=self.parameters.get('hybrid_lexical_min_terms', 2))
+        return [doc for doc, _ in hits], confidence >= self.parameters.get('hybrid_lexical_confidence', 0.9)
+
+    def fuse(self, lexical_results: list, vector_results: list, k: int = 3):
+        """Fuses the lexical and the vector rankings of a question with reciprocal rank fusion."""
+        if not lexical_results:
+            retrievals.inc('vector')
+            return vector_results[:k]
+        retrievals.inc('hybrid')
+        return reciprocal_rank_fusion([lexical_results, vector_results], k=self.parameters.get('hybrid_rrf_k', 60),
+                                      limit=k)
+
+    def section_filter(self, query: str, k: int = 3):
+        """Returns the metadata filter restricting the search of a question to one resume section, if the question is
+        about a single section (see `question_section`) and SECTION_ROUTING_ENABLED is true, else None. The section
+        is only a preference: no filter is returned when any of the question's best k keyword (BM25) matches lies
+        outside of it, e.g. a skill named in an experience question or an index without sections."""
+        section = question_section(query) if self.section_routing else None
+        if section and self.lexical_index is not None and len(self.lexical_index):
+            hits, _ = self.lexical_index.search(query, k=k)
+            if any(doc.metadata.get('section') != section for doc, _ in hits):
+                section = None
+        section_filters.inc(section or 'none')
+        return {'section': section} if section else None
+
+    @staticmethod
+    def _top_up(results: list, fallback: list, k: int):
+        """Completes the results of a section search up to k chunks with the unfiltered results."""
+        seen = {chunk_key(doc) for doc in results}
+        return results + [doc for doc in fallback if chunk_key(doc) not in seen][:k - len(results)]
+
+    def search(self, query: str, k: int = 3, query_embedding=None):
+        """Returns the chunks most relevant to a question. The BM25 ranking is fused with the vector ranking; when
+        the best lexical match covers the question well enough (an exact technology name, ...), the lexical results
+        are returned directly and the embedding and vector search are skipped. A question about a single resume
+        section (see `section_filter`) searches the chunks of that section first, completed up to k chunks by a
+        search of the whole resume.
+
+        Args:
+            query (str): The question.
+            k (int, optional): The number of chunks. Defaults to 3.
+            query_embedding (list, optional): The query embedding, if it was already computed.
+
+        Returns:
+            list: The most relevant Document objects.
+        """
+        return self._search_section(query, k, query_embedding, self.section_filter(query, k))
+
+    def _search_section(self, query: str, k: int, query_embedding=None, filter: dict = None):
+        results = self._search(query, k, query_embedding, filter) if filter is not None else []
+        if len(results) < k:
+            # The embedding of the first search is cached (CachedEmbeddings)
+            results = self._top_up(results, self._search(query, k, query_embedding), k)
+        return results
+
+    def _search(self, query: str, k: int, query_embedding=None, filter: dict = None):
+        lexical_results, confident = self.lexical_search(query, filter)
+        if confident:
+            retrievals.inc('lexical')
+            return lexical_results[:k]
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        vector_results = self.search_by_vector(query_embedding, k=self._candidates(k), filter=filter)
+        return self.fuse(lexical_results, vector_results, k=k)
+
+    async def asearch(self, query: str, k: int = 3, query_embedding=None):
+        """Async version of `search`. The lexical search is in-memory, so it runs inline."""
+        return await self._asearch_section(query, k, query_embedding, self.section_filter(query, k))
+
+    async def _asearch_section(self, query: str, k: int, query_embedding=None, filter: dict = None):
+        results = await self._asearch(query, k, query_embedding, filter) if filter is not None else []
+        if len(results) < k:
+            results = self._top_up(results, await self._asearch(query, k, query_embedding), k)
+        return results
+
+    async def _asearch(self, query: str, k: int, query_embedding=None, filter: dict = None):
+        lexical_results, confident = self.lexical_search(query, filter)
+        if confident:
+            retrievals.inc('lexical')
+            return lexical_results[:k]
+        if query_embedding is None:
+            query_embedding = await self.aembed_query(query)
+        vector_results = await self.asearch_by_vector(query_embedding, k=self._candidates(k), filter=filter)
+        return self.fuse(lexical_results, vector_results, k=k)
+
+    def _candidates(self, k: int):
+        """Returns the number of vector results to fetch: more than k when they are fused with lexical results."""
+        if self.lexical_index is None or not len(self.lexical_index):
+            return k
+        return max(k, self.parameters.get('hybrid_candidates', 10))
+
+    def _split_batch(self, queries: list, k: int):
+        """Runs the lexical search of each question of a batch, answering the confident ones directly.
+
+        Returns:
+            tuple: The results (None for the questions still needing a vector search), the lexical results of each
+                question, and the positions of the questions still needing a vector search.
+        """
+        results, lexical, pending = [], [], []
+        for position, query in enumerate(queries):
+            lexical_results, confident = self.lexical_search(query)
+            lexical.append(lexical_results)
+            if confident:
+                retrievals.inc('lexical')
+                results.append(lexical_results[:k])
+            else:
+                results.append(None)
+                pending.append(position)
+        return results, lexical, pending
+
+    def search_batch(self, queries: list, query_embeddings: list, k: int = 3, max_concurrency: int = 4):
+        """Batch version of `search`, for questions whose embeddings were already computed: the questions with a
+        confident lexical match skip the vector search, the questions about a single section are searched within it,
+        and the others are searched together (see `search_by_vectors`).
+
+        Returns:
+            list: One list of Document objects per question.
+        """
+        results = [None] * len(queries)
+        for position, query in enumerate(queries):
+            filter = self.section_filter(query, k)
+            if filter is not None:
+                results[position] = self._search_section(query, k, query_embeddings[position], filter)
+        unrouted = [i for i, documents in enumerate(results) if documents is None]
+        if unrouted:
+            batch_results = self._search_batch([queries[i] for i in unrouted], [query_embeddings[i] for i in unrouted],
+                                               k=k, max_concurrency=max_concurrency)
+            for position, documents in zip(unrouted, batch_results):
+                results[position] = documents
+        return results
+
+    def _search_batch(self, queries: list, query_embeddings: list, k: int = 3, max_concurrency: int = 4):
+        results, lexical, pending = self._split_batch(queries, k)
+        if pending:
+            vector_results = self.search_by_vectors([query_embeddings[i] for i in pending], k=self._candidates(k),
+                                                    max_concurrency=max_concurrency)
+            for position, documents in zip(pending, vector_results):
+                results[position] = self.fuse(lexical[position], documents, k=k)
+        return results
+
+    async def asearch_batch(self, queries: list, query_embeddings: list, k: int = 3):
+        """Async version of `search_batch`."""
+        results = [None] * len(queries)
+        for position, query in enumerate(queries):
+            filter = self.section_filter(query, k)
+            if filter is not None:
+                results[position] = await self._asearch_section(query, k, query_embeddings[position], filter)
+        unrouted = [i for i, documents in enumerate(results) if documents is None]
+        if unrouted:
+            batch_results = await self._asearch_batch([queries[i] for i in unrouted],
+                                                      [query_embeddings[i] for i in unrouted], k=k)
+            for position, documents in zip(unrouted, batch_results):
+                results[position] = documents
+        return results
+
+    async def _asearch_batch(self, queries: list, query_embeddings: list, k: int = 3):
+        results, lexical, pending = self._split_batch(queries, k)
+        if pending:
+            vector_results = await self.asearch_by_vectors([query_embeddings[i] for i in pending],
+                                                           k=self._candidates(k))
+            for position, documents in zip(pending, vector_results):
+                results[position] = self.fuse(lexical[position], documents, k=k)
+        return results
+
+    def get_index_version(self):
+        """Returns an identifier of the indexed content, used to scope cached answers.
+        RESUME_INDEX_VERSION takes precedence; otherwise the local index fingerprint is used or, with Pinecone, the
+        fingerprint of the lexical index (which mirrors the indexed chunks) and the index name.
+
+        Returns:
+            str: The index version.
+        """
+        if self.parameters.get('resume_index_version'):
+            return self.parameters['resume_index_version']
+        if self.vector_backend in ('local', 'snapshot'):
+            return self.vector_store.version
+        version = f"{self.index_name}/{self.namespace}" if self.namespace else self.index_name
+        if self.lexical_index is not None and len(self.lexical_index):
+            version += f"@{self.lexical_index.version}"
+        return version
+    
+    def export_snapshot(self, snapshot_path: str, ids: list = None, batch_size: int = 100):
+        """Exports the indexed chunks, their vectors and their metadata into an index snapshot file (see
+        `write_snapshot`), which VECTOR_BACKEND=snapshot opens at startup.
+
+        Args:
+            snapshot_path (str): The path of the snapshot file.
+            ids (list, optional): The IDs of the chunks to export from Pinecone (e.g. from the index manifest). The
+                local backends export all their chunks.
+            batch_size (int, optional): The number of vectors fetched from Pinecone per request. Defaults to 100.
+
+        Returns:
+            tuple: The number of exported chunks and the size of the snapshot file in bytes.
+        """
+        from langchain_core.documents import Document
+
+        if self.vector_backend in ('local', 'snapshot'):
+            ids, documents, vectors = self.vector_store.ids, self.vector_store.documents, self.vector_store.vectors
+        else:
+            if not ids:
+                raise ValueError("No chunk IDs to export from Pinecone (the index manifest is empty)")
+            index = self.transport.get_pinecone_index(self.index_name)
+            exported, documents, vectors = [], [], []
+            for start in range(0, len(ids), batch_size):
+                fetched = index.fetch(ids=list(ids[start:start + batch_size]), namespace=self.namespace).vectors
+                for doc_id in ids[start:start + batch_size]:
+                    if doc_id not in fetched:
+                        continue
+                    metadata = dict(fetched[doc_id].metadata or {})
+                    text = metadata.pop('text', '')  # PineconeVectorStore's default text key
+                    exported.append(doc_id)
+                    documents.append(Document(page_content=text, metadata=metadata))
+                    vectors.append(fetched[doc_id].values)
+            ids, vectors = exported, np.asarray(vectors, dtype=np.float32)
+
+        size = write_snapshot(snapshot_path, ids, vectors, documents,
+                              embedding_model=self.parameters.get('embedding_model', 'embed-english-v3.0'),
+                              index_version=self.get_index_version())
+        return len(ids), size
+    
     def delete_all_documents(self):
         """Deletes all documents from the Pinecone index.
         Warning: This operation cannot be undone.
         """
-        pc = Pinecone(api_key=self.parameters['pinecone_api_key'])
-        index = pc.Index(self.index_name)
+        if self.lexical_index is not None:
+            self.lexical_index.delete(delete_all=True)
+            self.lexical_index.save()
+        
+        if self.vector_backend == 'local':
+            self.vector_store.delete(delete_all=True)
+            print(f"All documents deleted from local index '{self.parameters.get('local_index_path')}'.")
+            return
+        
+        index = self.transport.get_pinecone_index(self.index_name)
         
-        # Delete all vectors in the index
-        index.delete(delete_all=True)
+        # Delete all vectors in the index (in the tenant's namespace only, in multi-tenant serving)
+        index.delete(delete_all=True, namespace=self.namespace)
         print(f"All documents deleted from index '{self.index_name}'.")
@@ -0,0 +1,306 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from backend.metrics import stage
+
+
+MAX_SESSION_ID_LENGTH = 128
+
+
+def parse_session_id(value):
+    """Validates the optional session ID of a request.
+
+    Args:
+        value: The "session_id" field of the request body.
+
+    Returns:
+        str | None: The session ID, or None when the request is stateless.
+
+    Raises:
+        ValueError: If the session ID is not a non-empty string of at most 128 characters.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str) or not value.strip() or len(value) > MAX_SESSION_ID_LENGTH:
+        raise ValueError(f"Invalid session_id (expected a string of 1 to {MAX_SESSION_ID_LENGTH} characters)")
+    return value.strip()
+
+
+class InMemorySessionStore():
+    """In-Memory Session Store Class
+    This class keeps the conversation of each session in process memory: a rolling summary of the old turns and a
+    bounded deque of the recent ones, so appending a turn is O(1) and a session never grows past `max_turns`.
+    Sessions idle for longer than `ttl` seconds, and the least recently used ones beyond `max_sessions`, are evicted.
+    Suited to a single worker process; use SQLiteSessionStore to share sessions between workers.
+    """
+
+    def __init__(self, max_turns: int = 10, ttl: float = 1800, max_sessions: int = 10000):
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()  # Session ID -> [summary, turns, last access], least recently used first
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        """Evicts the idle and the least recently used sessions. Must be called with the lock held."""
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session[2] <= self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id: str):
+        """Returns the summary and the recent turns of a session.
+
+        Args:
+            session_id (str): The session ID.
+
+        Returns:
+            tuple: The summary (empty if none) and the recent turns (strings), oldest first.
+        """
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return "", []
+            session[2] = now
+            self._sessions.move_to_end(session_id)
+            return session[0], list(session[1])
+
+    def append(self, session_id: str, turn: str):
+        """Appends a turn to a session, creating it if needed.
+
+        Returns:
+            int: The number of recent turns of the session.
+        """
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = ["", deque(maxlen=self.max_turns), now]
+            session[1].append(turn)
+            session[2] = now
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+            return len(session[1])
+
+    def compact(self, session_id: str, summary: str, count: int):
+        """Replaces the summary of a session and drops its `count` oldest turns (the ones it now summarizes)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return
+            session[0] = summary
+            for _ in range(min(count, len(session[1]))):
+                session[1].popleft()
+
+    def delete(self, session_id: str):
+        """Forgets a session."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLiteSessionStore():
+    """SQLite Session Store Class
+    This class keeps the sessions in a SQLite file, so every worker process of a deployment (e.g. gunicorn workers on
+    one host) sees the same conversations. It has the same interface and bounds as InMemorySessionStore; another
+    shared backend (e.g. Redis) only needs to implement `get`, `append`, `compact` and `delete`.
+    """
+
+    def __init__(self, path: str, max_turns: int = 10, ttl: float = 1800, max_sessions: int = 10000):
+        self.path = path
+        self.max_turns = max_turns
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, summary TEXT NOT NULL, turns TEXT NOT NULL, "
+            "updated REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+
+    def _evict(self, now: float):
+        """Deletes the idle and the least recently used sessions. Must be called in a transaction."""
+        self._db.execute("DELETE FROM sessions WHERE updated < ?", (now - self.ttl,))
+        self._db.execute(
+            "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,)
+        )
+
+    def get(self, session_id: str):
+        """Returns the summary and the recent turns of a session (see InMemorySessionStore.get)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT summary, turns, updated FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None or time.time() - row[2] > self.ttl:
+            return "", []
+        return row[0], json.loads(row[1])
+
+    def append(self, session_id: str, turn: str):
+        """Appends a turn to a session, creating it if needed (see InMemorySessionStore.append)."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT summary, turns, updated FROM sessions WHERE id = ?", (session_id,)
+                ).fetchone()
+                if row is None or now - row[2] > self.ttl:
+                    summary, turns = "", []  # New or expired session
+                else:
+                    summary, turns = row[0], json.loads(row[1])
+                turns = (turns + [turn])[-self.max_turns:]
+                self._db.execute("INSERT OR REPLACE INTO sessions (id, summary, turns, updated) VALUES (?, ?, ?, ?)",
+                                 (session_id, summary, json.dumps(turns), now))
+                # Eviction is a table scan, so it runs every 100 writes rather than on every turn
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._evict(now)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return len(turns)
+
+    def compact(self, session_id: str, summary: str, count: int):
+        """Replaces the summary of a session and drops its `count` oldest turns (see InMemorySessionStore.compact)."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT turns FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE sessions SET summary = ?, turns = ? WHERE id = ?",
+                                     (summary, json.dumps(json.loads(row[0])[count:]), session_id))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def delete(self, session_id: str):
+        """Forgets a session."""
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions WHERE updated >= ?",
+                                    (time.time() - self.ttl,)).fetchone()[0]
+
+
+def create_session_store(parameters: dict[str, any]):
+    """Creates the session store selected by SESSION_BACKEND ('memory' or 'sqlite').
+
+    Args:
+        parameters (dict): The application parameters, as returned by `load_config()`.
+
+    Returns:
+        InMemorySessionStore | SQLiteSessionStore: The session store.
+    """
+    # Room for the turns waiting to be summarized, on top of the recent turns kept verbatim
+    max_turns = parameters.get('session_max_turns', 6)
+    if parameters.get('session_summary_enabled', True):
+        max_turns += 2 * parameters.get('session_summarize_every', 4)
+
+    if parameters.get('session_backend', 'memory') == 'sqlite':
+        return SQLiteSessionStore(
+            parameters.get('session_db_path', os.path.join('data', 'sessions.db')),
+            max_turns=max_turns,
+            ttl=parameters.get('session_ttl', 1800),
+            max_sessions=parameters.get('session_max_sessions', 10000)
+        )
+    return InMemorySessionStore(
+        max_turns=max_turns,
+        ttl=parameters.get('session_ttl', 1800),
+        max_sessions=parameters.get('session_max_sessions', 10000)
+    )
+
+
+class SessionMemory():
+    """Session Memory Class
+    This class gives each session a compact history for the prompt: a rolling summary of the old turns followed by
+    the last `max_turns` turns verbatim. Turns are stored already formatted, so nothing is re-stringified per request.
+    Once `summarize_every` turns have overflowed, they are folded into the summary by a background summarizer, off
+    the request path, so the prompt size stays flat as conversations grow.
+    """
+
+    def __init__(self, store, summarizer=None, max_turns: int = 6, summarize_every: int = 4,
+                 max_turn_chars: int = 2000):
+        self.store = store
+        self.summarizer = summarizer
+        self.max_turns = max_turns
+        self.summarize_every = summarize_every
+        self.max_turn_chars = max_turn_chars
+
+        self._summarizing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="session-summary") if summarizer else None
+
+    def history(self, session_id: str):
+        """Returns the history entries of a session for the prompt, oldest first.
+
+        Args:
+            session_id (str): The session ID.
+
+        Returns:
+            list: The summary entry (if any) followed by the recent turns.
+        """
+        summary, turns = self.store.get(session_id)
+        if self.summarizer is None:
+            turns = turns[-self.max_turns:]
+        entries = [f"Summary of the earlier conversation: {summary}"] if summary else []
+        return entries + turns
+
+    def record(self, session_id: str, question: str, answer: str):
+        """Records a question and its answer in a session, and schedules the summarization of the old turns."""
+        turn = f"User: {question[:self.max_turn_chars]}\nAssistant: {answer[:self.max_turn_chars]}"
+        count = self.store.append(session_id, turn)
+
+        overflow = count - self.max_turns
+        if self.summarizer is None or overflow < self.summarize_every:
+            return
+        with self._lock:
+            if session_id in self._summarizing:
+                return
+            self._summarizing.add(session_id)
+        self._executor.submit(self._summarize, session_id)
+
+    def _summarize(self, session_id: str):
+        try:
+            summary, turns = self.store.get(session_id)
+            old_turns = turns[:len(turns) - self.max_turns]
+            if not old_turns:
+                return
+            with stage('session_summary'):
+                new_summary = self.summarizer(summary, old_turns)
+            self.store.compact(session_id, new_summary, len(old_turns))
+        except Exception as e:
+            # The old turns stay in the store; the bounded deque drops them if summarization keeps failing
+            print(f"Error summarizing session: {str(e)}")
+        finally:
+            with self._lock:
+                self._summarizing.discard(session_id)
+
+    def delete(self, session_id: str):
+        """Forgets a session."""
+        self.store.delete(session_id)
+
+    def stats(self):
+        """Returns the number of live sessions and the backend in use."""
+        return {'sessions': len(self.store), 'backend': type(self.store).__name__}
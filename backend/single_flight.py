@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from backend.metrics import single_flight_calls
+
+
+class _Call():
+    """An in-flight computation and the event its waiters block on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight():
+    """Single Flight Class
+    This class coalesces identical concurrent calls (threaded serving): the first caller for a key runs the
+    computation, and the callers arriving with the same key while it is in flight wait for it and receive its
+    result (or its exception) instead of running their own. Nothing is cached once the computation returns.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args):
+        """Runs `function(*args)`, or waits for the identical call already in flight.
+
+        Args:
+            key: A hashable identifying identical calls.
+            function (callable): The computation.
+
+        Returns:
+            The result of the computation.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            single_flight_calls.inc('sync', 'coalesced')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        single_flight_calls.inc('sync', 'leader')
+        try:
+            call.result = function(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        """Returns the number of computations in flight."""
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight():
+    """Async Single Flight Class
+    This class is the async version of SingleFlight (ASGI serving): the computation runs as a task that every caller
+    with the same key awaits, shielded, so a caller that disconnects does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def do(self, key, function, *args):
+        """Awaits `function(*args)`, or the identical call already in flight.
+
+        Args:
+            key: A hashable identifying identical calls.
+            function (callable): The coroutine function of the computation.
+
+        Returns:
+            The result of the computation.
+        """
+        key = (asyncio.get_running_loop(), key)  # Tasks cannot be shared across event loops
+        task = self._tasks.get(key)
+        if task is None:
+            single_flight_calls.inc('async', 'leader')
+            task = asyncio.ensure_future(function(*args))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            single_flight_calls.inc('async', 'coalesced')
+        return await asyncio.shield(task)
+
+    def in_flight(self):
+        """Returns the number of computations in flight."""
+        return len(self._tasks)
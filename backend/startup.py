@@ -0,0 +1,109 @@
+import time
+import threading
+from contextlib import contextmanager
+
+
+class StartupReport():
+    """Startup Report Class
+    This class records how long each step of the application boot takes (imports, client creation, index check, ...)
+    so cold starts can be broken down. Steps recorded several times (e.g. one per chatbot) are summed.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Times the enclosed block under the given phase name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def report(self):
+        """Returns the recorded phases.
+
+        Returns:
+            dict: The duration of each phase in milliseconds, and the time elapsed since the process started booting.
+        """
+        with self._lock:
+            return {
+                'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+                'since_boot_ms': round((time.perf_counter() - self.started_at) * 1000, 1),
+            }
+
+    def print_report(self):
+        """Prints the recorded phases, slowest first."""
+        report = self.report()
+        print("Startup time report:")
+        for name, milliseconds in sorted(report['phases_ms'].items(), key=lambda item: -item[1]):
+            print(f"   {name:<32} {milliseconds:>9.1f} ms")
+        print(f"   {'total since boot':<32} {report['since_boot_ms']:>9.1f} ms")
+
+
+# Shared by the serving entry points and the backend classes
+startup_report = StartupReport()
+
+
+class ChatBotLoader():
+    """ChatBot Loader Class
+    This class defers the creation of the ChatBot (and therefore the heavy imports and the provider clients) until it
+    is first needed, or builds it in a background warmup thread, so the server can accept connections immediately.
+    STARTUP_MODE selects the behavior: 'eager' (build at startup), 'background' or 'lazy' (build on first request).
+    """
+
+    def __init__(self, parameters: dict[str, any]):
+        self.parameters = parameters
+        self._chatbot = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        """True once the ChatBot has been built."""
+        return self._chatbot is not None
+
+    def start(self):
+        """Builds the ChatBot according to the configured startup mode."""
+        mode = self.parameters.get('startup_mode', 'eager')
+        if mode == 'eager':
+            self.get()
+        elif mode == 'background':
+            threading.Thread(target=self._warmup, name="chatbot-warmup", daemon=True).start()
+
+    def _warmup(self):
+        try:
+            self.get()
+        except Exception as e:
+            # The next request retries and reports the error
+            print(f"Error warming up the chatbot: {str(e)}")
+
+    def get(self):
+        """Returns the ChatBot, building it on first use.
+
+        Returns:
+            ChatBot: The chatbot instance.
+        """
+        if self._chatbot is not None:
+            return self._chatbot
+
+        with self._lock:
+            if self._chatbot is None:
+                with startup_report.phase('import backend.chatbot'):
+                    from backend.chatbot import ChatBot
+                with startup_report.phase('ChatBot init'):
+                    self._chatbot = ChatBot(self.parameters)
+                startup_report.print_report()
+        return self._chatbot
+
+    def get_if_ready(self):
+        """Returns the ChatBot if it has already been built, without building it.
+
+        Returns:
+            ChatBot | None: The chatbot instance, or None.
+        """
+        return self._chatbot
@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from backend.metrics import stage
+
+
+TENANT_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+# Per-tenant settings a tenants file may override
+TENANT_SETTINGS = ('resume_owner_name', 'candidate_gender', 'resume_index_version', 'namespace')
+
+
+class UnknownTenantError(LookupError):
+    """Raised when a request names a tenant that is not configured."""
+
+
+def load_tenants(tenants_path: str):
+    """Loads the tenants file: a JSON object mapping each tenant ID to its settings, e.g.
+    {"jane-doe": {"resume_owner_name": "Jane Doe", "candidate_gender": "female"}}.
+
+    Args:
+        tenants_path (str): The path of the tenants file.
+
+    Returns:
+        dict: The settings of each tenant (empty if the file does not exist).
+
+    Raises:
+        ValueError: If a tenant ID or setting is invalid.
+    """
+    if not tenants_path or not os.path.exists(tenants_path):
+        return {}
+
+    with open(tenants_path, 'r', encoding='utf-8') as file:
+        tenants = json.load(file)
+
+    for tenant_id, settings in tenants.items():
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise ValueError(f"Invalid tenant ID '{tenant_id}' (lowercase letters, digits, '-' and '_' only)")
+        unknown = set(settings) - set(TENANT_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown setting(s) for tenant '{tenant_id}': {', '.join(sorted(unknown))}")
+    return tenants
+
+
+def tenant_parameters(parameters: dict[str, any], tenant_id: str, settings: dict):
+    """Derives the parameters of one tenant from the application parameters: its prompt settings, its Pinecone
+    namespace, and its own local index, lexical index, manifest and FAQ answers under TENANT_DATA_PATH.
+
+    Args:
+        parameters (dict): The application parameters, as returned by `load_config()`.
+        tenant_id (str): The tenant ID.
+        settings (dict): The tenant's settings, from the tenants file.
+
+    Returns:
+        dict: The tenant's parameters.
+    """
+    data_path = os.path.join(parameters.get('tenant_data_path', os.path.join('data', 'tenants')), tenant_id)
+    return {
+        **parameters,
+        'tenant': tenant_id,
+        'resume_owner_name': settings.get('resume_owner_name', parameters['resume_owner_name']),
+        'candidate_gender': settings.get('candidate_gender', parameters.get('candidate_gender', 'neutral')).lower(),
+        'resume_index_version': settings.get('resume_index_version'),
+        'pinecone_namespace': settings.get('namespace', tenant_id),
+        'local_index_path': os.path.join(data_path, 'local_index'),
+        'index_snapshot_path': os.path.join(data_path, 'index.snapshot'),
+        'lexical_index_path': os.path.join(data_path, 'lexical_index.json'),
+        'index_manifest_path': os.path.join(data_path, 'index_manifest.json'),
+        'faq_answers_path': os.path.join(data_path, 'faq_answers.json'),
+        'answer_cache_size': parameters.get('tenant_answer_cache_size', 128),
+    }
+
+
+class TenantRegistry():
+    """Tenant Registry Class
+    This class serves many resumes from one process. Each tenant gets a lightweight ChatBot (its prompt settings,
+    vector namespace, lexical index and a small answer cache) built on first request on top of the default ChatBot,
+    whose LLM clients, prompt template, embedder and session store are shared. At most `max_tenants` tenant
+    chatbots are kept in memory: the least recently used one is dropped when another tenant is loaded, and rebuilt
+    on its next request.
+    """
+
+    def __init__(self, parameters: dict[str, any], loader, max_tenants: int = 100):
+        self.parameters = parameters
+        self.loader = loader
+        self.max_tenants = max_tenants
+        self.tenants = load_tenants(parameters.get('tenants_path'))
+
+        self._chatbots = OrderedDict()  # Tenant ID -> ChatBot, least recently used first
+        self._building = {}             # Tenant ID -> lock held while its ChatBot is built
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def get_if_loaded(self, tenant_id: str):
+        """Returns the ChatBot of a tenant if it is in memory, without building it.
+
+        Returns:
+            ChatBot | None: The tenant's chatbot, or None.
+        """
+        with self._lock:
+            chatbot = self._chatbots.get(tenant_id)
+            if chatbot is not None:
+                self._chatbots.move_to_end(tenant_id)
+            return chatbot
+
+    def get(self, tenant_id: str):
+        """Returns the ChatBot of a tenant, building it if needed.
+
+        Args:
+            tenant_id (str): The tenant ID.
+
+        Returns:
+            ChatBot: The tenant's chatbot.
+
+        Raises:
+            UnknownTenantError: If the tenant is not configured.
+        """
+        with self._lock:
+            chatbot = self._chatbots.get(tenant_id)
+            if chatbot is not None:
+                self._chatbots.move_to_end(tenant_id)
+                return chatbot
+            if tenant_id not in self.tenants:
+                raise UnknownTenantError(f"Unknown tenant: {tenant_id}")
+            building = self._building.setdefault(tenant_id, threading.Lock())
+
+        # Only the requests of the same tenant wait for its chatbot to be built
+        with building:
+            with self._lock:
+                chatbot = self._chatbots.get(tenant_id)
+            if chatbot is not None:
+                return chatbot
+
+            from backend.chatbot import ChatBot
+            shared = self.loader.get()
+            with stage('tenant_load'):
+                chatbot = ChatBot(tenant_parameters(self.parameters, tenant_id, self.tenants[tenant_id]), shared=shared)
+
+            with self._lock:
+                self._chatbots[tenant_id] = chatbot
+                self._building.pop(tenant_id, None)
+                self.loads += 1
+                while len(self._chatbots) > self.max_tenants:
+                    # Requests still holding the evicted chatbot finish normally
+                    self._chatbots.popitem(last=False)
+                    self.evictions += 1
+        return chatbot
+
+    def stats(self):
+        """Returns the number of configured and loaded tenants, and the loads and evictions so far."""
+        with self._lock:
+            return {
+                'configured': len(self.tenants),
+                'loaded': len(self._chatbots),
+                'max_loaded': self.max_tenants,
+                'loads': self.loads,
+                'evictions': self.evictions,
+            }
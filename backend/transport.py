@@ -0,0 +1,121 @@
+import threading
+import functools
+import httpx
+
+
+class HttpTransport():
+    """HTTP Transport Class
+    This class owns the pooled HTTP clients shared by every outbound client of the application (LLM, embeddings),
+    so TLS connections are kept alive and reused across requests instead of being re-established per call.
+    It also holds the shared Pinecone client, which uses its own urllib3 connection pool.
+    Connection limits, keep-alive, HTTP/2 and the per-stage timeouts come from `load_config()`.
+    """
+
+    def __init__(self, parameters: dict[str, any]):
+        self.parameters = parameters
+
+        limits = httpx.Limits(
+            max_connections=parameters.get('http_max_connections', 100),
+            max_keepalive_connections=parameters.get('http_max_keepalive_connections', 20),
+            keepalive_expiry=parameters.get('http_keepalive_expiry', 60.0)
+        )
+
+        # HTTP/2 needs the optional h2 package (pip install httpx[http2])
+        self.http2 = parameters.get('http2', True)
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("HTTP/2 disabled: the 'h2' package is not installed.")
+                self.http2 = False
+
+        self.client = httpx.Client(limits=limits, http2=self.http2, timeout=self.timeout('default'))
+        self.async_client = httpx.AsyncClient(limits=limits, http2=self.http2, timeout=self.timeout('default'))
+
+        self._pinecone = None
+        self._pinecone_indexes = {}
+        self._lock = threading.Lock()
+
+    def timeout(self, stage: str):
+        """Returns the timeout of an outbound stage.
+
+        Args:
+            stage (str): 'llm', 'embedding', 'vector_store' or 'default'.
+
+        Returns:
+            httpx.Timeout: The connect timeout shared by all stages, with the stage's read timeout.
+        """
+        read_timeouts = {
+            'llm': self.parameters.get('llm_timeout', 60.0),
+            'embedding': self.parameters.get('embedding_timeout', 10.0),
+            'vector_store': self.parameters.get('vector_store_timeout', 10.0),
+        }
+        return httpx.Timeout(
+            read_timeouts.get(stage, 30.0),
+            connect=self.parameters.get('http_connect_timeout', 5.0)
+        )
+
+    def get_pinecone(self):
+        """Returns the shared Pinecone client, creating it on first use.
+
+        Returns:
+            Pinecone: The Pinecone client.
+        """
+        with self._lock:
+            if self._pinecone is None:
+                from pinecone import Pinecone
+                self._pinecone = Pinecone(
+                    api_key=self.parameters['pinecone_api_key'],
+                    pool_threads=self.parameters.get('pinecone_pool_threads', 4)
+                )
+            return self._pinecone
+
+    def get_pinecone_index(self, index_name: str):
+        """Returns the shared client of a Pinecone index, whose queries use the 'vector_store' timeout.
+
+        Args:
+            index_name (str): The name of the Pinecone index.
+
+        Returns:
+            Index: The Pinecone index client.
+        """
+        pc = self.get_pinecone()
+        with self._lock:
+            if index_name not in self._pinecone_indexes:
+                index = pc.Index(index_name)
+                # PineconeVectorStore does not forward timeouts, so bind the stage timeout to the query method
+                index.query = functools.partial(
+                    index.query,
+                    _request_timeout=(self.parameters.get('http_connect_timeout', 5.0),
+                                      self.parameters.get('vector_store_timeout', 10.0))
+                )
+                self._pinecone_indexes[index_name] = index
+            return self._pinecone_indexes[index_name]
+
+    def close(self):
+        """Closes the pooled connections of the sync client."""
+        self.client.close()
+
+    async def aclose(self):
+        """Closes the pooled connections of the async client."""
+        await self.async_client.aclose()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport(parameters: dict[str, any]):
+    """Returns the process-wide HttpTransport, creating it from the parameters on first use.
+
+    Args:
+        parameters (dict): The application parameters, as returned by `load_config()`.
+
+    Returns:
+        HttpTransport: The shared transport.
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = HttpTransport(parameters)
+        return _transport
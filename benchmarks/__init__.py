@@ -0,0 +1,2 @@
+"""Offline latency benchmarks: local stand-ins for the LLM, the embedder and the vector store, and a load generator
+for the API. Run with `python -m benchmarks.run --help`."""
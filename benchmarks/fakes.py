@@ -0,0 +1,177 @@
+import re
+import time
+import zlib
+import random
+import asyncio
+import numpy as np
+from backend.local_vector_store import LocalVectorStore
+
+
+class FakeEmbeddings():
+    """Fake Embeddings Class
+    This class stands in for CohereEmbeddings without any network call. Texts are embedded deterministically by
+    hashing their words into a fixed number of dimensions, so texts sharing words get similar vectors and retrieval
+    stays meaningful. Each call can sleep for a configurable delay to simulate the provider's round-trip.
+    """
+
+    def __init__(self, dimension: int = 1024, delay: float = 0.0, timings=None):
+        self.dimension = dimension
+        self.delay = delay
+        self.timings = timings
+
+    def _vector(self, text: str):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = zlib.crc32(word.encode('utf-8'))
+            vector[digest % self.dimension] += 1.0 if digest & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed(self, texts: list[str], *, input_type: str = None) -> list[list[float]]:
+        """Embeds texts in one simulated call."""
+        start = time.perf_counter()
+        if self.delay:
+            time.sleep(self.delay)
+        vectors = [self._vector(text) for text in texts]
+        if self.timings is not None:
+            self.timings.record('embedding', time.perf_counter() - start)
+        return vectors
+
+    async def aembed(self, texts: list[str], *, input_type: str = None) -> list[list[float]]:
+        """Async version of `embed`."""
+        start = time.perf_counter()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        vectors = [self._vector(text) for text in texts]
+        if self.timings is not None:
+            self.timings.record('embedding', time.perf_counter() - start)
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embeds a list of document texts."""
+        return self.embed(texts, input_type='search_document')
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embeds a query."""
+        return self.embed([text], input_type='search_query')[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Async version of `embed_documents`."""
+        return await self.aembed(texts, input_type='search_document')
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Async version of `embed_query`."""
+        return (await self.aembed([text], input_type='search_query'))[0]
+
+
+class InMemoryVectorStore(LocalVectorStore):
+    """In-Memory Vector Store Class
+    This class is a LocalVectorStore that never touches the disk and can sleep for a configurable delay on every
+    search to simulate a remote vector database such as Pinecone.
+    """
+
+    def __init__(self, embedding, delay: float = 0.0, timings=None):
+        super().__init__(embedding, index_path=None)
+        self.delay = delay
+        self.timings = timings
+
+    def save(self):
+        """Nothing to persist."""
+
+    def similarity_search_by_vector_with_score(self, embedding, k: int = 4, filter: dict = None):
+        start = time.perf_counter()
+        if self.delay:
+            time.sleep(self.delay)
+        results = super().similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+        if self.timings is not None:
+            self.timings.record('vector_search', time.perf_counter() - start)
+        return results
+
+    def similarity_search_by_vectors(self, embeddings, k: int = 4):
+        start = time.perf_counter()
+        if self.delay:
+            time.sleep(self.delay)
+        results = super().similarity_search_by_vectors(embeddings, k=k)
+        if self.timings is not None:
+            self.timings.record('vector_search', time.perf_counter() - start)
+        return results
+
+    async def asimilarity_search_by_vector_with_score(self, embedding, k: int = 4, filter: dict = None):
+        start = time.perf_counter()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        results = super().similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+        if self.timings is not None:
+            self.timings.record('vector_search', time.perf_counter() - start)
+        return results
+
+    def max_marginal_relevance_search_by_vector(self, embedding, k: int = 4, fetch_k: int = 20,
+                                                lambda_mult: float = 0.5, filter: dict = None, **kwargs):
+        start = time.perf_counter()
+        if self.delay:
+            time.sleep(self.delay)
+        results = super().max_marginal_relevance_search_by_vector(embedding, k=k, fetch_k=fetch_k,
+                                                                  lambda_mult=lambda_mult, filter=filter)
+        if self.timings is not None:
+            self.timings.record('vector_search', time.perf_counter() - start)
+        return results
+
+    async def amax_marginal_relevance_search_by_vector(self, embedding, k: int = 4, fetch_k: int = 20,
+                                                       lambda_mult: float = 0.5, filter: dict = None, **kwargs):
+        start = time.perf_counter()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        results = super().max_marginal_relevance_search_by_vector(embedding, k=k, fetch_k=fetch_k,
+                                                                  lambda_mult=lambda_mult, filter=filter)
+        if self.timings is not None:
+            self.timings.record('vector_search', time.perf_counter() - start)
+        return results
+
+
+SKILLS = [
+    'Python', 'SQL', 'PySpark', 'Kubernetes', 'Docker', 'AWS', 'Azure', 'GCP', 'Terraform', 'Airflow', 'dbt',
+    'TensorFlow', 'PyTorch', 'scikit-learn', 'pandas', 'FastAPI', 'Flask', 'React', 'TypeScript', 'Java', 'Scala',
+    'Kafka', 'PostgreSQL', 'MongoDB', 'Redis', 'Elasticsearch', 'LangChain', 'MLflow', 'Tableau', 'Power BI',
+]
+ROLES = ['Data Scientist', 'Data Engineer', 'Machine Learning Engineer', 'Software Engineer', 'Tech Lead', 'Analyst']
+COMPANIES = ['Acme Corp', 'Globex', 'Initech', 'Umbrella Analytics', 'Stark Industries', 'Wayne Enterprises']
+SCHOOLS = ['Ecole Polytechnique', 'Sorbonne University', 'MIT', 'ETH Zurich', 'University of Toronto']
+
+
+def synthetic_resume_chunks(count: int, seed: int = 0):
+    """Generates resume-like chunks (experience, education, skills and projects) to fill a benchmark index.
+
+    Args:
+        count (int): The number of chunks.
+        seed (int, optional): The random seed, so every run indexes the same corpus. Defaults to 0.
+
+    Returns:
+        list: The chunks' texts.
+    """
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(count):
+        skills = ", ".join(rng.sample(SKILLS, 5))
+        kind = i % 4
+        if kind == 0:
+            text = (f"Experience: {rng.choice(ROLES)} at {rng.choice(COMPANIES)} from {2010 + i % 12} to "
+                    f"{2012 + i % 12}. Built data pipelines and models using {skills}. Led a team of "
+                    f"{rng.randint(2, 12)} people and reduced processing costs by {rng.randint(10, 60)}%.")
+        elif kind == 1:
+            text = (f"Education: Master's degree in Computer Science at {rng.choice(SCHOOLS)}, graduated in "
+                    f"{2005 + i % 15}. Coursework in statistics, distributed systems and machine learning.")
+        elif kind == 2:
+            text = f"Skills: {skills}. Languages: English, French. Certifications: cloud architecture and data."
+        else:
+            text = (f"Project: a recommendation engine serving {rng.randint(1, 50)} million users, written with "
+                    f"{skills}, deployed on {rng.choice(['AWS', 'GCP', 'Azure'])} with continuous delivery.")
+        chunks.append(text)
+    return chunks
+
+
+BENCHMARK_QUESTIONS = [
+    "What is the candidate's experience?",
+    "What programming languages does the candidate know?",
+    "Tell me about the candidate's education",
+    "What are the candidate's main skills?",
+] + [f"Does the candidate have experience with {skill}?" for skill in SKILLS]
@@ -0,0 +1,122 @@
+import json
+import time
+import uuid
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like a real provider
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if not self.path.endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+            return
+
+        stub = self.server.stub
+        tokens = stub.completion_tokens(request)
+        prompt_tokens = sum(len(str(message.get('content', '')).split()) for message in request.get('messages', []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = request.get('model', 'stub')
+
+        time.sleep(stub.first_token_delay)
+
+        if not request.get('stream'):
+            time.sleep(len(tokens) / stub.tokens_per_second)
+            self._send_json(200, {
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': "".join(tokens)},
+                    'finish_reason': 'stop',
+                }],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': len(tokens),
+                    'total_tokens': prompt_tokens + len(tokens),
+                },
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, token in enumerate(tokens + [None]):
+            if token is not None and i:
+                time.sleep(1 / stub.tokens_per_second)
+            event = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'delta': {'content': token} if token is not None else {},
+                    'finish_reason': None if token is not None else 'stop',
+                }],
+            }
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+
+class LLMStubServer():
+    """LLM Stub Server Class
+    This class runs a local OpenAI-compatible chat completions endpoint (plain and streamed) in a background thread,
+    so the ChatBot's real OpenAI client and pooled transport can be benchmarked without network or cost. Each answer
+    waits for a configurable time to first token, then emits a fixed number of tokens at a configurable rate.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, first_token_delay: float = 0.2,
+                 tokens_per_second: float = 400.0, max_tokens: int = 80):
+        self.first_token_delay = first_token_delay
+        self.tokens_per_second = tokens_per_second
+        self.max_tokens = max_tokens
+
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """The base URL to give to an OpenAI client (LLM_BASE_URL)."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def completion_tokens(self, request: dict):
+        """Returns the tokens of the answer to a chat completion request."""
+        count = min(self.max_tokens, request.get('max_tokens') or self.max_tokens)
+        return [f"token{i} " for i in range(count)]
+
+    def start(self):
+        """Starts serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving."""
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,74 @@
+import time
+import threading
+import httpx
+from benchmarks.stats import summarize
+
+
+def run_load(url: str, questions: list, concurrency: int = 8, requests: int = 200, timeout: float = 60.0):
+    """Sends questions to the `/ask` endpoint from several concurrent clients (closed loop: each client sends its
+    next question as soon as it gets an answer) and measures the end-to-end latency of every request.
+
+    Args:
+        url (str): The URL of the `/ask` endpoint.
+        questions (list): The questions, sent in a round-robin order.
+        concurrency (int, optional): The number of concurrent clients. Defaults to 8.
+        requests (int, optional): The total number of requests. Defaults to 200.
+        timeout (float, optional): The timeout of each request in seconds. Defaults to 60.
+
+    Returns:
+        dict: The number of requests, errors and cache hits, the wall-clock time, the throughput in requests per
+            second, and the latency summary (see `summarize`).
+    """
+    latencies = []
+    errors = []
+    cache_hits = 0
+    next_request = 0
+    lock = threading.Lock()
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    with httpx.Client(limits=limits, timeout=timeout) as client:
+
+        def worker():
+            nonlocal next_request, cache_hits
+            while True:
+                with lock:
+                    if next_request >= requests:
+                        return
+                    question = questions[next_request % len(questions)]
+                    next_request += 1
+
+                start = time.perf_counter()
+                try:
+                    response = client.post(url, json={'question': question})
+                    elapsed = time.perf_counter() - start
+                    result = response.json()
+                    error = None if response.status_code == 200 and result.get('status') == 'success' else \
+                        f"HTTP {response.status_code}: {result.get('error', result.get('answer'))}"
+                except Exception as e:
+                    elapsed = time.perf_counter() - start
+                    result, error = {}, str(e)
+
+                with lock:
+                    latencies.append(elapsed)
+                    if error:
+                        errors.append(error)
+                    elif result.get('cache_hit'):
+                        cache_hits += 1
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, name=f"load-{i}") for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_clock = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_samples': sorted(set(errors))[:5],
+        'cache_hits': cache_hits,
+        'seconds': round(wall_clock, 3),
+        'throughput_rps': round(len(latencies) / wall_clock, 2) if wall_clock else 0.0,
+        'latency': summarize(latencies),
+    }
@@ -0,0 +1,111 @@
+"""
+Recall and memory benchmark of the quantized local vector index.
+
+Builds a local index of synthetic embeddings (dense, clustered like the embeddings of resume chunks, 1024
+dimensions like Cohere's embed-english-v3.0), then answers the same queries with full-precision search and with
+each quantization mode (LOCAL_INDEX_QUANTIZATION) and re-score factor (LOCAL_INDEX_RESCORE_FACTOR). Reports the
+vector memory held per worker, the recall of the full-precision top k, and the search latency. A re-score factor
+of 1 shows the ranking of the codes alone.
+
+Usage:
+    python -m benchmarks.quantization
+    python -m benchmarks.quantization --chunks 100000 --k 3 --rescore-factors 1 2 4 8 16 --json quantization.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+from backend.local_vector_store import LocalVectorStore
+from benchmarks.stats import summarize
+
+
+def synthetic_embeddings(count: int, dimension: int, clusters: int, seed: int = 0):
+    """Returns `count` normalized vectors drawn around `clusters` topics, and queries that paraphrase some of them
+    (the vector of a chunk plus noise)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    noise = rng.standard_normal((count, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + 0.8 * noise
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_index(vectors, index_path: str):
+    """Writes a full-precision local index of the vectors."""
+    from langchain_core.documents import Document
+
+    store = LocalVectorStore(embedding=None, index_path=index_path)
+    documents = [Document(page_content=f"chunk {i}", metadata={'chunk_id': i}) for i in range(len(vectors))]
+    store.add_vectors(vectors, documents, ids=[str(i) for i in range(len(vectors))])
+
+
+def measure(store: LocalVectorStore, queries, exact_top: list, k: int):
+    """Returns the recall of the exact top k, the search latency and the vector memory of a store."""
+    recalls, durations = [], []
+    for query, expected in zip(queries, exact_top):
+        start = time.perf_counter()
+        results = store.similarity_search_by_vector_with_score(query, k=k)
+        durations.append(time.perf_counter() - start)
+        found = {doc.metadata['chunk_id'] for doc, _ in results}
+        recalls.append(len(found & expected) / k)
+    memory = store.memory_usage()
+    return {
+        'quantization': store.quantization or 'none',
+        'rescore_factor': store.rescore_factor if store.quantization else None,
+        'recall': round(float(np.mean(recalls)), 4),
+        'vector_mb': round(memory['vector_bytes'] / 2 ** 20, 2),
+        'memory_saved': round(1 - memory['vector_bytes'] / memory['full_precision_bytes'], 4),
+        'latency': summarize(durations),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Recall and memory of the quantized local vector index against full-precision search',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--chunks', type=int, default=20000, help='Number of indexed chunk vectors')
+    parser.add_argument('--dimension', type=int, default=1024, help='Embedding dimension')
+    parser.add_argument('--clusters', type=int, default=200, help='Number of topics the chunks are drawn around')
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries')
+    parser.add_argument('--k', type=int, default=3, help='Number of chunks retrieved per query')
+    parser.add_argument('--rescore-factors', type=int, nargs='+', default=[1, 2, 4, 8, 16], help='Re-score factors')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic embeddings')
+    parser.add_argument('--json', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.chunks, args.dimension, args.clusters, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    queries = vectors[rng.integers(0, args.chunks, args.queries)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+
+    index_path = tempfile.mkdtemp(prefix='quantization-')
+    build_index(vectors, index_path)
+    exact_top = [set(np.argsort(-(vectors @ query))[:args.k].tolist()) for query in queries]
+
+    results = [measure(LocalVectorStore(None, index_path), queries, exact_top, args.k)]
+    for quantization in ('int8', 'binary'):
+        for rescore_factor in args.rescore_factors:
+            store = LocalVectorStore(None, index_path, quantization=quantization, rescore_factor=rescore_factor)
+            results.append(measure(store, queries, exact_top, args.k))
+
+    print(f"\n📊 Quantized local index ({args.chunks} chunks x {args.dimension} dims, recall@{args.k} of "
+          f"{args.queries} queries)")
+    print(f"   {'quantization':<13} {'rescore':>7} {'recall':>8} {'memory MB':>10} {'saved':>7} {'p50 ms':>8} "
+          f"{'p95 ms':>8}")
+    for result in results:
+        print(f"   {result['quantization']:<13} {result['rescore_factor'] or '-':>7} {result['recall']:>8.4f} "
+              f"{result['vector_mb']:>10.2f} {result['memory_saved']:>7.1%} {result['latency']['p50_ms']:>8.2f} "
+              f"{result['latency']['p95_ms']:>8.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'config': vars(args), 'results': results}, file, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
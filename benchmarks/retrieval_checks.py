@@ -0,0 +1,110 @@
+"""
+Retrieval regression checks.
+
+Splits a sample resume with the resume splitter, indexes it with the deterministic embedder in the in-memory vector
+store and the lexical index, then checks which chunks the Retriever returns for questions that used to be routed to
+the wrong resume section, and that the chunks of a multi-page resume keep the metadata of their page. No network
+access or API key is needed.
+
+Usage:
+    python -m benchmarks.retrieval_checks
+"""
+
+import sys
+from backend.retriever import Retriever
+from backend.resume_splitter import ResumeSplitter
+from benchmarks.fakes import FakeEmbeddings, InMemoryVectorStore
+
+
+SAMPLE_RESUME = """Jane Doe
+Data Engineer - jane.doe@example.com
+
+Experience
+
+Acme Corp
+Senior Data Engineer
+Jan 2021 - Present
+- Built the batch pipelines of the analytics platform
+- Led a team of four engineers
+
+Globex
+Data Engineer
+2017 - 2020
+- Migrated the reporting warehouse to the cloud
+- Wrote the ingestion jobs of the billing data
+
+Education
+
+Université de Lyon
+MSc Computer Science
+2015 - 2017
+
+Skills
+
+Python, SQL, Airflow, Docker, Kubernetes, Spark
+"""
+
+# (question, text the returned chunks must contain, why)
+CHECKS = [
+    ("Do you have experience with Docker?", "Docker", "a skill asked in an experience question"),
+    ("What experience do you have with Airflow and SQL?", "Airflow", "skills asked in an experience question"),
+    ("Which technologies did you use at Globex?", "Globex", "a role asked in a technology question"),
+    ("Which degrees do you have?", "MSc Computer Science", "a question routed to the education section"),
+]
+
+
+def build_retriever(k: int = 3):
+    """Returns a Retriever over the sample resume, with the in-memory stand-ins of the embedder and vector store."""
+    from langchain_core.documents import Document
+
+    parameters = {
+        'pinecone_index_name': 'retrieval-checks',
+        'vector_backend': 'local',
+        'local_index_path': None,
+        'lexical_index_path': None,
+        'retrieval_k': k,
+    }
+    embeddings = FakeEmbeddings()
+    retriever = Retriever(parameters, embeddings=embeddings)
+    retriever.vector_store = InMemoryVectorStore(embeddings)
+
+    document = Document(page_content=SAMPLE_RESUME, metadata={'source': 'sample.txt'})
+    chunks = ResumeSplitter().split_documents([document])
+    for chunk_id, chunk in enumerate(chunks):
+        chunk.metadata['chunk_id'] = chunk_id
+    retriever.upload_docs_index(chunks, ids=[f"sample-{i}" for i in range(len(chunks))])
+    return retriever
+
+
+def check_pages():
+    """Returns whether every chunk of the sample resume, split into one page per section, has the page of its text."""
+    from langchain_core.documents import Document
+
+    boundaries = [0, SAMPLE_RESUME.index("Globex"), SAMPLE_RESUME.index("Education"), len(SAMPLE_RESUME)]
+    pages = [Document(page_content=SAMPLE_RESUME[start:end], metadata={'source': 'sample.pdf', 'page': page})
+             for page, (start, end) in enumerate(zip(boundaries, boundaries[1:]))]
+    chunks = ResumeSplitter().split_documents(pages)
+    # Each chunk's text without its repeated section heading starts on its page
+    return all(chunk.page_content.split("\n", 1)[-1].split("\n", 1)[0] in pages[chunk.metadata['page']].page_content
+               for chunk in chunks)
+
+
+def main():
+    k = 3
+    retriever = build_retriever(k)
+    failures = 0
+    for question, expected, reason in CHECKS:
+        results = retriever.search(question, k=k)
+        passed = len(results) == k and any(expected in doc.page_content for doc in results)
+        failures += not passed
+        sections = ", ".join(str(doc.metadata.get('section')) for doc in results)
+        print(f"{'ok  ' if passed else 'FAIL'} {question!r} ({reason}): {len(results)} chunk(s) [{sections}]")
+    paged = check_pages()
+    failures += not paged
+    print(f"{'ok  ' if paged else 'FAIL'} page metadata of the chunks of a multi-page resume")
+    print(f"\n{len(CHECKS) + 1 - failures}/{len(CHECKS) + 1} checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
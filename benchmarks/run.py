@@ -0,0 +1,262 @@
+"""
+Offline latency benchmark of the /ask endpoint.
+
+Starts a local OpenAI-compatible LLM stub, serves app.py (or asgi.py) in-process with a deterministic embedder and
+an in-memory vector store, then sends concurrent questions to /ask and reports the latency distribution, the
+throughput and a per-stage breakdown. No network access or API key is needed.
+
+The benchmark questions repeat, so by default the answer cache, the embedding cache and the lexical fast path (a
+confident BM25 match skips the embedding and the vector search) are off: every request embeds its question and
+searches the vector store. The report counts the requests served by each path.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --server asgi --concurrency 32 --requests 1000
+
+    # Warm paths, as in production:
+    python -m benchmarks.run --answer-cache --embedding-cache --lexical-fast-path
+
+    # Fail (exit code 1) if the p95 latency regresses above 400 ms:
+    python -m benchmarks.run --max-p95-ms 400 --json results.json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import tempfile
+import functools
+import threading
+from benchmarks.fakes import FakeEmbeddings, InMemoryVectorStore, synthetic_resume_chunks, BENCHMARK_QUESTIONS
+from benchmarks.llm_stub import LLMStubServer
+from benchmarks.load import run_load
+from benchmarks.stats import StageTimings
+
+
+def free_port():
+    """Returns a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def configure_environment(args, llm_base_url: str):
+    """Points the application configuration at the local stand-ins. Must run before app.py or asgi.py is imported,
+    as they load the configuration at import time."""
+    directory = tempfile.mkdtemp(prefix='benchmark-')
+    os.environ.update({
+        'LLM_API_KEY': 'benchmark',
+        'LLM_BASE_URL': llm_base_url,
+        'LLM_TEMPERATURE': '0',
+        'EMBEDDING_API_KEY': 'benchmark',
+        'EMBEDDING_CACHE_PATH': '',
+        'VECTOR_BACKEND': 'local',
+        'LOCAL_INDEX_PATH': os.path.join(directory, 'index'),
+        'LEXICAL_INDEX_PATH': os.path.join(directory, 'lexical_index.json'),
+        'FAQ_ANSWERS_PATH': '',
+        'CONVERSATION_LOG_PATH': os.path.join(directory, 'conversations.db'),
+        'ANSWER_CACHE_ENABLED': 'true' if args.answer_cache else 'false',
+        'EMBEDDING_CACHE_SIZE': '1024' if args.embedding_cache else '0',
+        # The confidence of a BM25 match is a share of the question's term weight, so it never reaches infinity
+        'HYBRID_LEXICAL_CONFIDENCE': '0.9' if args.lexical_fast_path else 'inf',
+        'STARTUP_MODE': 'eager',
+    })
+
+
+def time_llm_calls(chatbot, timings: StageTimings):
+    """Records the duration of the ChatBot's LLM calls (sync and async clients) under the 'llm' stage."""
+    completions = chatbot.client.chat.completions
+    create = completions.create
+
+    @functools.wraps(create)
+    def timed_create(*args, **kwargs):
+        with timings.span('llm'):
+            return create(*args, **kwargs)
+    completions.create = timed_create
+
+    async_completions = chatbot.async_client.chat.completions
+    acreate = async_completions.create
+
+    @functools.wraps(acreate)
+    async def timed_acreate(*args, **kwargs):
+        with timings.span('llm'):
+            return await acreate(*args, **kwargs)
+    async_completions.create = timed_acreate
+
+
+def install_fakes(chatbot, args, timings: StageTimings):
+    """Replaces the ChatBot's embedder and vector store with the local stand-ins and indexes a synthetic resume (in the
+    vector store and the lexical index)."""
+    embeddings = chatbot.retriever.embeddings  # The CachedEmbeddings wrapper is kept, as in production
+    fake_embeddings = FakeEmbeddings(delay=args.embed_delay_ms / 1000, timings=timings)
+    embeddings.embeddings = fake_embeddings
+
+    vector_store = InMemoryVectorStore(embeddings, delay=args.vector_delay_ms / 1000, timings=timings)
+    chunks = synthetic_resume_chunks(args.chunks, seed=args.seed)
+    from langchain_core.documents import Document
+    documents = [Document(page_content=text, metadata={'source': 'benchmark_resume.txt', 'chunk_id': i})
+                 for i, text in enumerate(chunks)]
+    vector_store.add_vectors([fake_embeddings._vector(text) for text in chunks], documents)
+    if chatbot.retriever.lexical_index is not None:
+        chatbot.retriever.lexical_index.add(documents, [f"benchmark-{i}" for i in range(len(documents))])
+
+    chatbot.vector_store = vector_store
+    chatbot.retriever.vector_store = vector_store
+    time_llm_calls(chatbot, timings)
+
+
+def start_server(server: str, port: int):
+    """Serves app.py (Flask, threaded) or asgi.py (uvicorn) on a background thread.
+
+    Returns:
+        tuple: The serving module and a function that stops the server.
+    """
+    if server == 'flask':
+        import app as module
+        from werkzeug.serving import make_server
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)  # No access log line per request
+        http_server = make_server('127.0.0.1', port, module.app, threaded=True)
+        threading.Thread(target=http_server.serve_forever, name="benchmark-flask", daemon=True).start()
+        return module, http_server.shutdown
+
+    import asgi as module
+    import uvicorn
+    http_server = uvicorn.Server(uvicorn.Config(module.app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=http_server.run, name="benchmark-uvicorn", daemon=True)
+    thread.start()
+    while not http_server.started:
+        time.sleep(0.01)
+
+    def stop():
+        http_server.should_exit = True
+        thread.join()
+    return module, stop
+
+
+def count_paths():
+    """Returns the number of answer cache hits and of retrievals by route (lexical fast path, hybrid, vector) so far.
+    A retrieval routed to a resume section that has too few chunks is topped up by a second one."""
+    from backend.metrics import answer_cache_lookups, retrievals
+    return {
+        'answer_cache': answer_cache_lookups.value('exact') + answer_cache_lookups.value('semantic'),
+        **{route: retrievals.value(route) for route in ['lexical', 'hybrid', 'vector']}
+    }
+
+
+def print_report(results: dict):
+    load = results['load']
+    latency = load['latency']
+    print(f"\n📊 Benchmark results ({results['config']['server']}, concurrency {results['config']['concurrency']})")
+    print(f"   requests        {load['requests']:>9}   errors {load['errors']}   cache hits {load['cache_hits']}")
+    print(f"   throughput      {load['throughput_rps']:>9.1f} req/s")
+    print(f"   latency (ms)    p50 {latency['p50_ms']:.1f}   p95 {latency['p95_ms']:.1f}   "
+          f"p99 {latency['p99_ms']:.1f}   mean {latency['mean_ms']:.1f}   max {latency['max_ms']:.1f}")
+    paths = results['paths']
+    print(f"   paths           answer cache {paths['answer_cache']}   lexical {paths['lexical']}   "
+          f"hybrid {paths['hybrid']}   vector {paths['vector']}")
+    for error in load['error_samples']:
+        print(f"   ❌ {error}")
+
+    print("\n⏱️  Per-stage breakdown (ms per call, and per request on average)")
+    print(f"   {'stage':<16} {'calls':>7} {'mean':>9} {'p95':>9} {'p99':>9} {'per req':>9}")
+    for stage, summary in results['stages'].items():
+        if stage == 'other':
+            print(f"   {stage:<16} {'-':>7} {'-':>9} {'-':>9} {'-':>9} {summary['per_request_ms']:>9.1f}")
+            continue
+        print(f"   {stage:<16} {summary['count']:>7} {summary['mean_ms']:>9.1f} {summary['p95_ms']:>9.1f} "
+              f"{summary['p99_ms']:>9.1f} {summary['per_request_ms']:>9.1f}")
+
+
+def check_gates(results: dict, args):
+    """Returns the list of the thresholds the run did not meet."""
+    latency = results['load']['latency']
+    failures = []
+    if args.max_p95_ms is not None and latency['p95_ms'] > args.max_p95_ms:
+        failures.append(f"p95 {latency['p95_ms']:.1f} ms > {args.max_p95_ms} ms")
+    if args.max_p99_ms is not None and latency['p99_ms'] > args.max_p99_ms:
+        failures.append(f"p99 {latency['p99_ms']:.1f} ms > {args.max_p99_ms} ms")
+    if args.min_throughput is not None and results['load']['throughput_rps'] < args.min_throughput:
+        failures.append(f"throughput {results['load']['throughput_rps']:.1f} req/s < {args.min_throughput} req/s")
+    if results['load']['errors']:
+        failures.append(f"{results['load']['errors']} request(s) failed")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Offline latency benchmark of the /ask endpoint with local LLM, embedder and vector store',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--server', choices=['flask', 'asgi'], default='flask', help='Serving mode to benchmark')
+    parser.add_argument('--concurrency', type=int, default=8, help='Number of concurrent clients')
+    parser.add_argument('--requests', type=int, default=200, help='Number of measured requests')
+    parser.add_argument('--warmup', type=int, default=20, help='Number of unmeasured requests sent first')
+    parser.add_argument('--chunks', type=int, default=200, help='Number of synthetic resume chunks indexed')
+    parser.add_argument('--llm-ttft-ms', type=float, default=150, help='LLM stub time to first token')
+    parser.add_argument('--llm-tokens-per-second', type=float, default=400, help='LLM stub generation rate')
+    parser.add_argument('--completion-tokens', type=int, default=80, help='Tokens in each LLM stub answer')
+    parser.add_argument('--embed-delay-ms', type=float, default=30, help='Simulated embedding round-trip')
+    parser.add_argument('--vector-delay-ms', type=float, default=20, help='Simulated vector search round-trip')
+    parser.add_argument('--answer-cache', action='store_true', help='Enable the answer cache (off by default)')
+    parser.add_argument('--embedding-cache', action='store_true', help='Enable the embedding cache (off by default)')
+    parser.add_argument('--lexical-fast-path', action='store_true',
+                        help='Answer confident BM25 matches without a vector search (off by default)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic resume')
+    parser.add_argument('--max-p95-ms', type=float, help='Fail if the p95 latency is above this value')
+    parser.add_argument('--max-p99-ms', type=float, help='Fail if the p99 latency is above this value')
+    parser.add_argument('--min-throughput', type=float, help='Fail if the throughput (req/s) is below this value')
+    parser.add_argument('--json', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    llm_stub = LLMStubServer(
+        first_token_delay=args.llm_ttft_ms / 1000,
+        tokens_per_second=args.llm_tokens_per_second,
+        max_tokens=args.completion_tokens
+    ).start()
+    configure_environment(args, llm_stub.base_url)
+
+    timings = StageTimings()
+    port = free_port()
+    module, stop_server = start_server(args.server, port)
+    try:
+        install_fakes(module.chatbot_loader.get(), args, timings)
+        url = f"http://127.0.0.1:{port}/ask"
+
+        if args.warmup:
+            run_load(url, BENCHMARK_QUESTIONS, concurrency=args.concurrency, requests=args.warmup)
+            timings.reset()
+
+        before = count_paths()
+        load = run_load(url, BENCHMARK_QUESTIONS, concurrency=args.concurrency, requests=args.requests)
+        paths = {path: count - before[path] for path, count in count_paths().items()}
+    finally:
+        stop_server()
+        llm_stub.stop()
+
+    summaries = timings.summary()
+    stages = {stage: summaries[stage] for stage in ['embedding', 'vector_search', 'llm'] if stage in summaries}
+    for summary in stages.values():
+        summary['per_request_ms'] = round(summary['total_s'] * 1000 / max(load['requests'], 1), 2)
+    # Whatever is not spent in a stand-in: HTTP, framework, JSON, caches, prompt formatting
+    stage_ms = sum(summary['per_request_ms'] for summary in stages.values())
+    stages['other'] = {'per_request_ms': round(load['latency']['mean_ms'] - stage_ms, 2)}
+
+    results = {'config': vars(args), 'load': load, 'paths': paths, 'stages': stages}
+    print_report(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+    failures = check_gates(results, args)
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
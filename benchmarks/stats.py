@@ -0,0 +1,66 @@
+import time
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+
+def summarize(values):
+    """Summarizes a list of durations in seconds.
+
+    Args:
+        values (list): The durations.
+
+    Returns:
+        dict: The count, mean, p50, p95, p99 and max, in milliseconds.
+    """
+    if not values:
+        return {'count': 0, 'mean_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+    milliseconds = np.asarray(values, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+    return {
+        'count': len(values),
+        'mean_ms': round(float(milliseconds.mean()), 2),
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'max_ms': round(float(milliseconds.max()), 2),
+    }
+
+
+class StageTimings():
+    """Stage Timings Class
+    This class collects the duration of every call to a stage of the answer path (embedding, vector search, LLM),
+    from any thread, so a benchmark run can be broken down per stage.
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        """Records one call to a stage."""
+        with self._lock:
+            self.durations.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def span(self, stage: str):
+        """Times the enclosed block as one call to the given stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def reset(self):
+        """Forgets every recorded call (e.g. after the warmup requests)."""
+        with self._lock:
+            self.durations = {}
+
+    def summary(self):
+        """Returns the summary of each stage (see `summarize`), with the total time spent in it."""
+        with self._lock:
+            durations = {stage: list(values) for stage, values in self.durations.items()}
+        return {
+            stage: dict(summarize(values), total_s=round(sum(values), 3))
+            for stage, values in durations.items()
+        }
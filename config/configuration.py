@@ -22,7 +22,75 @@ def load_config():
     - PINECONE_INDEX_NAME: Name of the Pinecone index
     - EMBEDDING_PROVIDER: Provider for embeddings (default: cohere)
     - EMBEDDING_API_KEY: API key for embeddings (if different from LLM)
+    - EMBEDDING_CACHE_SIZE: Number of embeddings kept in the in-memory LRU cache (default: 1024)
+    - EMBEDDING_CACHE_PATH: SQLite file persisting the embedding cache across restarts (optional)
+    - INDEX_MANIFEST_PATH: Local record of the indexed chunks, for incremental re-indexing (default: data/index_manifest.json)
+    - INGEST_LOAD_WORKERS / INGEST_EMBED_BATCH_SIZE / INGEST_EMBED_CONCURRENCY / INGEST_UPSERT_BATCH_SIZE /
+      INGEST_MAX_RETRIES: Tuning of the directory ingestion pipeline of index_resume.py
+    - PINECONE_CHECK_INDEX: Check (and create) the Pinecone index at startup (default: false)
+    - VECTOR_BACKEND: Vector store to use, 'pinecone' (default), 'local' (in-process NumPy index) or 'snapshot'
+      (read-only memory-mapped index snapshot, exported by index_resume.py --snapshot)
+    - LOCAL_INDEX_PATH: Directory of the local vector index (default: data/local_index)
+    - INDEX_SNAPSHOT_PATH: Index snapshot file opened with VECTOR_BACKEND=snapshot (default: data/index.snapshot)
+    - LOCAL_INDEX_QUANTIZATION: Vectors kept in memory by the local index: 'none' (float32, default), 'int8' or
+      'binary' (the float32 vectors are memory-mapped to re-score a shortlist)
+    - LOCAL_INDEX_RESCORE_FACTOR: Chunks re-scored exactly per chunk returned, with quantization (default: 4 for
+      int8, 16 for binary)
+    - HYBRID_SEARCH_ENABLED: Fuse a local BM25 ranking with the vector ranking (default: true)
+    - LEXICAL_INDEX_PATH: File of the local BM25 index, written by index_resume.py (default: data/lexical_index.json)
+    - HYBRID_LEXICAL_CONFIDENCE: Share of the question's term weight the best BM25 match must contain to skip the
+      embedding and vector search (default: 0.9, above 1 never skips)
+    - HYBRID_LEXICAL_MIN_TERMS: Distinct question terms the best BM25 match must contain to skip them (default: 2)
+    - HYBRID_CANDIDATES: Results of each ranking considered by the fusion (default: 10)
+    - HYBRID_RRF_K: Rank smoothing constant of the reciprocal rank fusion (default: 60)
+    - RETRIEVAL_K: Chunks retrieved per question (default: 3)
+    - RETRIEVAL_FETCH_K: Vector candidates fetched per question for the diversity (MMR) selection (default: 20)
+    - RETRIEVAL_MMR_LAMBDA: Relevance/diversity trade-off of the MMR selection, 1 for relevance only (default: 0.7)
+    - SECTION_ROUTING_ENABLED: Search only the chunks of the resume section a question is about (default: true)
     - RESUME_OWNER_NAME: Name of the resume owner
+    - TENANTS_PATH: JSON file of the tenants served on /t/<tenant>/... (default: config/tenants.json, optional)
+    - TENANT_DATA_PATH: Directory of the tenants' local indexes and manifests (default: data/tenants)
+    - MAX_LOADED_TENANTS: Tenants kept in memory, the least recently used unloaded first (default: 100)
+    - TENANT_ANSWER_CACHE_SIZE: Maximum number of cached answers per tenant (default: 128)
+    - HTTP_MAX_CONNECTIONS / HTTP_MAX_KEEPALIVE_CONNECTIONS / HTTP_KEEPALIVE_EXPIRY: Shared connection pool limits
+    - HTTP2: Use HTTP/2 when the h2 package is installed (default: true)
+    - HTTP_CONNECT_TIMEOUT / LLM_TIMEOUT / EMBEDDING_TIMEOUT / VECTOR_STORE_TIMEOUT: Per-stage timeouts in seconds
+    - PINECONE_POOL_THREADS: Size of the shared Pinecone client's thread pool (default: 4)
+    - STARTUP_MODE: When the chatbot is built, 'eager' (default), 'background' (warmup thread) or 'lazy' (first request)
+    - BATCH_MAX_QUESTIONS: Maximum number of questions accepted by /ask/batch (default: 20)
+    - BATCH_MAX_CONCURRENCY: Maximum number of concurrent LLM generations per batch (default: 4)
+    - LLM_MAX_CONCURRENCY / EMBEDDING_MAX_CONCURRENCY: Concurrent calls per process to each provider, 0 for no limit
+      (default: 16)
+    - ADMISSION_MAX_QUEUE: Requests waiting for a provider slot before new ones get HTTP 503 (default: 64)
+    - ADMISSION_QUEUE_TIMEOUT: Latency budget in seconds for waiting for a provider slot (default: 5)
+    - RATE_LIMIT_PER_MINUTE: Questions per minute allowed per client IP, 0 for no quota (default: 0)
+    - RATE_LIMIT_BURST: Questions a client may ask at once before the per-minute rate applies (default: 10)
+    - TRUST_PROXY_HEADERS: Identify clients by X-Forwarded-For, behind a reverse proxy only (default: false)
+    - RESUME_INDEX_VERSION: Version of the indexed resume, bump it to invalidate cached answers (optional)
+    - ANSWER_CACHE_ENABLED: Cache answers when LLM_TEMPERATURE is 0 (default: true)
+    - ANSWER_CACHE_SIZE: Maximum number of cached answers (default: 512)
+    - ANSWER_CACHE_TTL: Lifetime of a cached answer in seconds (default: 86400)
+    - ANSWER_CACHE_SIMILARITY_THRESHOLD: Cosine similarity above which a paraphrase reuses an answer (default: 0.95)
+    - FAQ_QUESTIONS_PATH: JSON list of frequent questions answered by index_resume.py (default: config/faq.json)
+    - FAQ_ANSWERS_PATH: Precomputed FAQ answers, loaded into the answer cache at startup (default: data/faq_answers.json)
+    - SINGLE_FLIGHT_ENABLED: Compute one answer for identical questions asked concurrently (default: true)
+    - METRICS_ENABLED: Expose the Prometheus /metrics route (default: true)
+    - PROMPT_MAX_TOKENS: Input token budget of each prompt (template, question, context and history, default: 3000)
+    - HISTORY_MAX_TOKENS: Tokens of conversation history kept in the prompt, oldest entries dropped first (default: 1000)
+    - CONTEXT_DEDUP_THRESHOLD: Word trigram overlap above which a retrieved passage is dropped as a duplicate (default: 0.8)
+    - SESSION_BACKEND: Store of the server-side conversation sessions, 'memory' (default) or 'sqlite'
+    - SESSION_DB_PATH: SQLite file of the sessions, shared by the worker processes (default: data/sessions.db)
+    - SESSION_TTL: Idle time in seconds after which a session is forgotten (default: 1800)
+    - SESSION_MAX_SESSIONS: Maximum number of sessions kept, least recently used evicted first (default: 10000)
+    - SESSION_MAX_TURNS: Recent turns of a session kept verbatim in the prompt (default: 6)
+    - SESSION_SUMMARY_ENABLED: Fold older turns into a rolling summary with the LLM, in the background (default: true)
+    - SESSION_SUMMARIZE_EVERY: Number of overflowing turns that triggers a summary update (default: 4)
+    - SESSION_MAX_TURN_CHARS: Characters of a question or answer stored per turn (default: 2000)
+    - CONVERSATION_LOG_ENABLED: Record every question and answer in a local SQLite database (default: true)
+    - CONVERSATION_LOG_PATH: Path of the conversation log database (default: data/conversations.db)
+    - CONVERSATION_LOG_QUEUE_SIZE: Records waiting to be written before new ones are dropped (default: 10000)
+    - CONVERSATION_LOG_BATCH_SIZE / CONVERSATION_LOG_FLUSH_INTERVAL: Records per write and maximum delay in seconds
+      before the waiting records are written (default: 100 / 2)
     """
     
     # LLM Configuration
@@ -60,22 +128,119 @@ def load_config():
         'embedding_provider': os.getenv('EMBEDDING_PROVIDER', 'cohere').lower(),
         'embedding_api_key': os.getenv('EMBEDDING_API_KEY', os.getenv('LLM_API_KEY')),
         'embedding_model': os.getenv('EMBEDDING_MODEL', 'embed-english-v3.0'),
+        'embedding_cache_size': int(os.getenv('EMBEDDING_CACHE_SIZE', '1024')),
+        'embedding_cache_path': os.getenv('EMBEDDING_CACHE_PATH') or None,
         
         # Pinecone Configuration
         'pinecone_api_key': os.getenv('PINECONE_API_KEY'),
         'pinecone_environment': os.getenv('PINECONE_ENVIRONMENT', 'us-east-1-aws'),
         'pinecone_index_name': os.getenv('PINECONE_INDEX_NAME', 'resume-chatbot'),
+        'pinecone_check_index': os.getenv('PINECONE_CHECK_INDEX', 'false').lower() == 'true',
+        
+        # Vector Store Configuration
+        'index_manifest_path': os.getenv('INDEX_MANIFEST_PATH', os.path.join('data', 'index_manifest.json')),
+        
+        # Ingestion Pipeline Configuration (index_resume.py --directory)
+        'ingest_load_workers': int(os.getenv('INGEST_LOAD_WORKERS', '0')) or None,  # Defaults to the CPU count
+        'ingest_embed_batch_size': int(os.getenv('INGEST_EMBED_BATCH_SIZE', '96')),
+        'ingest_embed_concurrency': int(os.getenv('INGEST_EMBED_CONCURRENCY', '4')),
+        'ingest_upsert_batch_size': int(os.getenv('INGEST_UPSERT_BATCH_SIZE', '100')),
+        'ingest_max_retries': int(os.getenv('INGEST_MAX_RETRIES', '3')),
+        
+        'vector_backend': os.getenv('VECTOR_BACKEND', 'pinecone').lower(),  # pinecone, local or snapshot
+        'local_index_path': os.getenv('LOCAL_INDEX_PATH', os.path.join('data', 'local_index')),
+        'index_snapshot_path': os.getenv('INDEX_SNAPSHOT_PATH', os.path.join('data', 'index.snapshot')),
+        'local_index_quantization': os.getenv('LOCAL_INDEX_QUANTIZATION', 'none').lower(),
+        'local_index_rescore_factor': int(os.getenv('LOCAL_INDEX_RESCORE_FACTOR', '0')) or None,  # Per quantization
+        
+        # Hybrid Retrieval Configuration
+        'hybrid_search_enabled': os.getenv('HYBRID_SEARCH_ENABLED', 'true').lower() == 'true',
+        'lexical_index_path': os.getenv('LEXICAL_INDEX_PATH', os.path.join('data', 'lexical_index.json')),
+        'hybrid_lexical_confidence': float(os.getenv('HYBRID_LEXICAL_CONFIDENCE', '0.9')),
+        'hybrid_lexical_min_terms': int(os.getenv('HYBRID_LEXICAL_MIN_TERMS', '2')),
+        'hybrid_candidates': int(os.getenv('HYBRID_CANDIDATES', '10')),
+        'hybrid_rrf_k': int(os.getenv('HYBRID_RRF_K', '60')),
+        'retrieval_k': int(os.getenv('RETRIEVAL_K', '3')),
+        'retrieval_fetch_k': int(os.getenv('RETRIEVAL_FETCH_K', '20')),
+        'retrieval_mmr_lambda': float(os.getenv('RETRIEVAL_MMR_LAMBDA', '0.7')),
+        'section_routing_enabled': os.getenv('SECTION_ROUTING_ENABLED', 'true').lower() == 'true',
+        
+        # HTTP Transport Configuration (shared by the LLM, embedding and vector store clients)
+        'http_max_connections': int(os.getenv('HTTP_MAX_CONNECTIONS', '100')),
+        'http_max_keepalive_connections': int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20')),
+        'http_keepalive_expiry': float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '60')),
+        'http2': os.getenv('HTTP2', 'true').lower() == 'true',
+        'http_connect_timeout': float(os.getenv('HTTP_CONNECT_TIMEOUT', '5')),
+        'llm_timeout': float(os.getenv('LLM_TIMEOUT', '60')),
+        'embedding_timeout': float(os.getenv('EMBEDDING_TIMEOUT', '10')),
+        'vector_store_timeout': float(os.getenv('VECTOR_STORE_TIMEOUT', '10')),
+        'pinecone_pool_threads': int(os.getenv('PINECONE_POOL_THREADS', '4')),
         
         # Application Configuration
         'resume_owner_name': os.getenv('RESUME_OWNER_NAME', 'The Candidate'),
         'candidate_gender': os.getenv('CANDIDATE_GENDER', 'neutral').lower(),  # male, female, or neutral
+        'resume_index_version': os.getenv('RESUME_INDEX_VERSION') or None,
+        'startup_mode': os.getenv('STARTUP_MODE', 'eager').lower(),  # eager, background or lazy
+        'metrics_enabled': os.getenv('METRICS_ENABLED', 'true').lower() == 'true',
+        
+        # Multi-Tenant Configuration
+        'tenants_path': os.getenv('TENANTS_PATH', os.path.join('config', 'tenants.json')),
+        'tenant_data_path': os.getenv('TENANT_DATA_PATH', os.path.join('data', 'tenants')),
+        'max_loaded_tenants': int(os.getenv('MAX_LOADED_TENANTS', '100')),
+        'tenant_answer_cache_size': int(os.getenv('TENANT_ANSWER_CACHE_SIZE', '128')),
+        
+        # Prompt Budget Configuration
+        'prompt_max_tokens': int(os.getenv('PROMPT_MAX_TOKENS', '3000')),
+        'history_max_tokens': int(os.getenv('HISTORY_MAX_TOKENS', '1000')),
+        'context_dedup_threshold': float(os.getenv('CONTEXT_DEDUP_THRESHOLD', '0.8')),
+        
+        # Session Memory Configuration
+        'session_backend': os.getenv('SESSION_BACKEND', 'memory').lower(),  # memory or sqlite
+        'session_db_path': os.getenv('SESSION_DB_PATH', os.path.join('data', 'sessions.db')),
+        'session_ttl': float(os.getenv('SESSION_TTL', '1800')),
+        'session_max_sessions': int(os.getenv('SESSION_MAX_SESSIONS', '10000')),
+        'session_max_turns': int(os.getenv('SESSION_MAX_TURNS', '6')),
+        'session_summary_enabled': os.getenv('SESSION_SUMMARY_ENABLED', 'true').lower() == 'true',
+        'session_summarize_every': int(os.getenv('SESSION_SUMMARIZE_EVERY', '4')),
+        'session_max_turn_chars': int(os.getenv('SESSION_MAX_TURN_CHARS', '2000')),
+        
+        # Conversation Log Configuration
+        'conversation_log_enabled': os.getenv('CONVERSATION_LOG_ENABLED', 'true').lower() == 'true',
+        'conversation_log_path': os.getenv('CONVERSATION_LOG_PATH', os.path.join('data', 'conversations.db')),
+        'conversation_log_queue_size': int(os.getenv('CONVERSATION_LOG_QUEUE_SIZE', '10000')),
+        'conversation_log_batch_size': int(os.getenv('CONVERSATION_LOG_BATCH_SIZE', '100')),
+        'conversation_log_flush_interval': float(os.getenv('CONVERSATION_LOG_FLUSH_INTERVAL', '2')),
+        
+        # Batch Configuration
+        'batch_max_questions': int(os.getenv('BATCH_MAX_QUESTIONS', '20')),
+        'batch_max_concurrency': int(os.getenv('BATCH_MAX_CONCURRENCY', '4')),
+        
+        # Admission Control Configuration
+        'llm_max_concurrency': int(os.getenv('LLM_MAX_CONCURRENCY', '16')),
+        'embedding_max_concurrency': int(os.getenv('EMBEDDING_MAX_CONCURRENCY', '16')),
+        'admission_max_queue': int(os.getenv('ADMISSION_MAX_QUEUE', '64')),
+        'admission_queue_timeout': float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '5')),
+        'rate_limit_per_minute': float(os.getenv('RATE_LIMIT_PER_MINUTE', '0')),
+        'rate_limit_burst': int(os.getenv('RATE_LIMIT_BURST', '10')),
+        'trust_proxy_headers': os.getenv('TRUST_PROXY_HEADERS', 'false').lower() == 'true',
+        
+        # Answer Cache Configuration
+        'answer_cache_enabled': os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true',
+        'answer_cache_size': int(os.getenv('ANSWER_CACHE_SIZE', '512')),
+        'answer_cache_ttl': float(os.getenv('ANSWER_CACHE_TTL', '86400')),
+        'answer_cache_similarity_threshold': float(os.getenv('ANSWER_CACHE_SIMILARITY_THRESHOLD', '0.95')),
+        'faq_questions_path': os.getenv('FAQ_QUESTIONS_PATH', os.path.join('config', 'faq.json')),
+        'faq_answers_path': os.getenv('FAQ_ANSWERS_PATH', os.path.join('data', 'faq_answers.json')),
+        'single_flight_enabled': os.getenv('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true',
         
         # Legacy compatibility (will be removed in future versions)
         'openai_api_key': os.getenv('LLM_API_KEY') if llm_provider == 'openai' else None,
     }
     
     # Validate required parameters
-    required_params = ['llm_api_key', 'pinecone_api_key', 'pinecone_index_name']
+    required_params = ['llm_api_key', 'pinecone_index_name']
+    if parameters['vector_backend'] == 'pinecone':
+        required_params.append('pinecone_api_key')
     missing_params = [param for param in required_params if not parameters.get(param)]
     
     if missing_params:
@@ -14,9 +14,30 @@ Usage:
 
     # To upload multiple files:
     python index_resume.py --directory path/to/resume_sections/
+
+    # To stream very large files page by page (bounded memory, uploads start immediately):
+    python index_resume.py --file path/to/publications.pdf --stream
+
+    # To index the resume of one tenant (see TENANTS_PATH) in its own namespace:
+    python index_resume.py --tenant jane-doe --file path/to/jane_doe.pdf
+
+    # To export the index into a snapshot file, opened by the API with VECTOR_BACKEND=snapshot:
+    python index_resume.py --file path/to/resume.pdf --snapshot data/index.snapshot
+    python index_resume.py --snapshot data/index.snapshot
+
+Re-indexing is incremental: chunk IDs are derived from the chunks' content and a local manifest
+(INDEX_MANIFEST_PATH) records what is already indexed, so only new or changed chunks are embedded
+and uploaded, and only stale chunks are deleted.
+
+After indexing, the frequent questions of FAQ_QUESTIONS_PATH are answered and saved to
+FAQ_ANSWERS_PATH, which the API loads into its answer cache at startup (use --skip-faq to skip).
+
+The chunks are also kept in a local BM25 index (LEXICAL_INDEX_PATH) for hybrid retrieval. Chunks
+indexed before it existed are added to it on the next run, without being embedded again.
 """
 
 import argparse
+import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -26,71 +47,135 @@ load_dotenv()
 
 from config.configuration import load_config
 from backend.retriever import Retriever
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from backend.index_manifest import IndexManifest
+from backend.tenants import load_tenants, tenant_parameters
+from backend.ingestion import IngestionPipeline, SUPPORTED_EXTENSIONS, load_and_split, diff_chunks, stream_chunks
 
 
-def index_file(file_path: str, retriever: Retriever, clear_index: bool = False):
-    """Index a single file into Pinecone."""
-    
-    file_path = Path(file_path)
+def index_file(file_path: str, retriever: Retriever, clear_index: bool = False, manifest: IndexManifest = None):
+    """Index a single file into Pinecone, uploading only the chunks that are not already indexed."""
     
-    if not file_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
+    print(f"\n📄 Loading and splitting document: {Path(file_path).name}")
+    source, chunks, ids, document_count = load_and_split(file_path)
+    print(f"✅ Loaded {document_count} document(s), created {len(chunks)} chunks")
     
-    # Determine file type and load accordingly
-    extension = file_path.suffix.lower()
-    
-    print(f"\n📄 Loading document: {file_path.name}")
+    # Clear index if requested
+    if clear_index:
+        print("\n⚠️  Clearing existing index...")
+        try:
+            retriever.delete_all_documents()
+            if manifest is not None:
+                manifest.clear()
+            print("✅ Index cleared")
+        except Exception as e:
+            print(f"⚠️  Could not clear index: {e}")
     
-    if extension == '.pdf':
-        documents = retriever.pdf_loader(str(file_path))
-    elif extension in ['.docx', '.doc']:
-        documents = retriever.docx_loader(str(file_path))
-    elif extension == '.txt':
-        documents = retriever.text_loader(str(file_path))
-    else:
-        raise ValueError(f"Unsupported file type: {extension}. Supported: .pdf, .docx, .txt")
+    # Compare with what is already indexed
+    new_positions, moved, stale, current = diff_chunks(source, chunks, ids, manifest)
+    print(f"🔎 {len(current) - len(new_positions)} unchanged, {len(new_positions)} new or changed, "
+          f"{len(stale)} stale chunk(s)")
     
-    print(f"✅ Loaded {len(documents)} document(s)")
+    # Upload to Pinecone, then remove stale chunks so the index is never empty
+    try:
+        if new_positions:
+            print("\n⬆️  Uploading to Pinecone...")
+            retriever.upload_docs_index([chunks[i] for i in new_positions], ids=[ids[i] for i in new_positions])
+        retriever.update_documents_metadata(moved)
+        retriever.delete_documents(stale)
+        retriever.backfill_lexical_index(chunks, ids)
+    except Exception as e:
+        print(f"❌ Error uploading to Pinecone: {e}")
+        raise
     
-    # Split documents into chunks for better retrieval
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-    )
+    if manifest is not None:
+        manifest.set_chunks(source, current)
+        manifest.save()
     
-    print("🔪 Splitting documents into chunks...")
-    chunks = text_splitter.split_documents(documents)
-    print(f"✅ Created {len(chunks)} chunks")
+    print(f"✅ Successfully indexed {len(new_positions)} new chunk(s) from {source}")
+    return ids
+
+
+def index_file_stream(file_path: str, retriever: Retriever, clear_index: bool = False,
+                      manifest: IndexManifest = None, batch_size: int = 96):
+    """Index a single file page by page: chunks are uploaded in batches while the rest of the file is still being
+    parsed, so memory use stays bounded on long documents."""
     
-    # Add metadata to chunks
-    for i, chunk in enumerate(chunks):
-        chunk.metadata['source'] = file_path.name
-        chunk.metadata['chunk_id'] = i
+    source = Path(file_path).name
+    print(f"\n📄 Streaming document: {source}")
     
     # Clear index if requested
     if clear_index:
         print("\n⚠️  Clearing existing index...")
         try:
             retriever.delete_all_documents()
+            if manifest is not None:
+                manifest.clear()
             print("✅ Index cleared")
         except Exception as e:
             print(f"⚠️  Could not clear index: {e}")
     
-    # Upload to Pinecone
-    print("\n⬆️  Uploading to Pinecone...")
+    indexed = manifest.get_chunks(source) if manifest is not None else {}
+    current = {}
+    moved = {}
+    batch, batch_ids = [], []
+    unchanged, unchanged_ids = [], []  # Already indexed, only added to the lexical index if missing from it
+    uploaded = 0
+    
+    def upload_batch():
+        retriever.upload_docs_index(batch, ids=batch_ids)
+        batch.clear()
+        batch_ids.clear()
+    
     try:
-        ids = retriever.upload_docs_index(chunks)
-        print(f"✅ Successfully indexed {len(ids)} chunks from {file_path.name}")
-        return ids
+        for chunk, doc_id in stream_chunks(file_path):
+            chunk_id = chunk.metadata['chunk_id']
+            current[doc_id] = chunk_id
+            if doc_id not in indexed:
+                batch.append(chunk)
+                batch_ids.append(doc_id)
+                uploaded += 1
+                if len(batch) >= batch_size:
+                    upload_batch()
+            else:
+                if indexed[doc_id] != chunk_id:
+                    moved[doc_id] = {'chunk_id': chunk_id}
+                if retriever.lexical_index is not None and doc_id not in retriever.lexical_index:
+                    unchanged.append(chunk)
+                    unchanged_ids.append(doc_id)
+        if batch:
+            upload_batch()
+        retriever.backfill_lexical_index(unchanged, unchanged_ids)
+        
+        # Remove stale chunks once the new ones are uploaded, so the index is never empty
+        stale = [doc_id for doc_id in indexed if doc_id not in current]
+        retriever.update_documents_metadata(moved)
+        retriever.delete_documents(stale)
     except Exception as e:
         print(f"❌ Error uploading to Pinecone: {e}")
         raise
+    
+    if manifest is not None:
+        manifest.set_chunks(source, current)
+        manifest.save()
+    
+    print(f"✅ {len(current)} chunks, {uploaded} new or changed uploaded, {len(stale)} stale removed from {source}")
+    return list(current)
 
 
-def index_directory(directory_path: str, retriever: Retriever, clear_index: bool = False):
-    """Index all supported files in a directory."""
+def prune_sources(sources: list, retriever: Retriever, manifest: IndexManifest):
+    """Delete the chunks of sources that are recorded in the manifest but no longer exist."""
+    
+    for source in sources:
+        stale = list(manifest.get_chunks(source))
+        print(f"\n🗑️  Removing {len(stale)} chunk(s) of deleted file {source}")
+        retriever.delete_documents(stale)
+        manifest.remove_source(source)
+        manifest.save()
+
+
+def index_directory(directory_path: str, retriever: Retriever, clear_index: bool = False,
+                    manifest: IndexManifest = None, prune: bool = False, stream: bool = False):
+    """Index all supported files in a directory (one after another, page by page, with stream=True)."""
     
     directory = Path(directory_path)
     
@@ -98,8 +183,7 @@ def index_directory(directory_path: str, retriever: Retriever, clear_index: bool
         raise NotADirectoryError(f"Directory not found: {directory}")
     
     # Find all supported files
-    supported_extensions = ['.pdf', '.docx', '.doc', '.txt']
-    files = [f for f in directory.iterdir() if f.suffix.lower() in supported_extensions]
+    files = [f for f in directory.iterdir() if f.suffix.lower() in SUPPORTED_EXTENSIONS]
     
     if not files:
         print(f"⚠️  No supported files found in {directory}")
@@ -109,20 +193,83 @@ def index_directory(directory_path: str, retriever: Retriever, clear_index: bool
     for f in files:
         print(f"  - {f.name}")
     
-    # Clear index only before the first file
-    first_file = True
-    
-    for file in files:
+    # Clear index before the first file
+    if clear_index:
+        print("\n⚠️  Clearing existing index...")
         try:
-            index_file(str(file), retriever, clear_index=(clear_index and first_file))
-            first_file = False
+            retriever.delete_all_documents()
+            if manifest is not None:
+                manifest.clear()
+            print("✅ Index cleared")
         except Exception as e:
-            print(f"❌ Error indexing {file.name}: {e}")
-            continue
+            print(f"⚠️  Could not clear index: {e}")
+    
+    parameters = retriever.parameters
+    if stream:
+        for file in files:
+            try:
+                index_file_stream(str(file), retriever, manifest=manifest,
+                                  batch_size=parameters.get('ingest_embed_batch_size', 96))
+            except Exception as e:
+                print(f"❌ Error indexing {file.name}: {e}")
+        if prune and manifest is not None:
+            names = {f.name for f in files}
+            prune_sources([source for source in manifest.sources if source not in names], retriever, manifest)
+        print(f"\n✅ Indexing complete!")
+        return
+    
+    # Load/split, embed and upload the files in a pipeline
+    pipeline = IngestionPipeline(
+        retriever,
+        manifest=manifest,
+        load_workers=parameters.get('ingest_load_workers'),
+        embed_batch_size=parameters.get('ingest_embed_batch_size', 96),
+        embed_concurrency=parameters.get('ingest_embed_concurrency', 4),
+        upsert_batch_size=parameters.get('ingest_upsert_batch_size', 100),
+        max_retries=parameters.get('ingest_max_retries', 3)
+    )
+    stats = pipeline.run(files)
+    
+    print(f"\n📊 {stats['files_indexed']} file(s) indexed, {stats['files_failed']} failed, "
+          f"{stats['chunks_uploaded']} chunk(s) uploaded in {stats['seconds']:.2f}s "
+          f"({stats['chunks_per_second']:.1f} chunks/s)")
+    for stage, seconds in stats['stage_seconds'].items():
+        print(f"   {stage:<12} {seconds:8.2f}s (cumulative across workers)")
+    
+    # Remove the chunks of files deleted from the directory
+    if prune and manifest is not None:
+        names = {f.name for f in files}
+        prune_sources([source for source in manifest.sources if source not in names], retriever, manifest)
     
     print(f"\n✅ Indexing complete!")
 
 
+def export_snapshot(snapshot_path: str, retriever: Retriever, manifest: IndexManifest):
+    """Export the indexed chunks and their vectors into a snapshot file, for deployments that start without any
+    network call (VECTOR_BACKEND=snapshot)."""
+    
+    print(f"\n📦 Exporting the index to snapshot {snapshot_path}...")
+    count, size = retriever.export_snapshot(snapshot_path, ids=manifest.chunk_ids())
+    print(f"✅ {count} chunk(s) exported ({size / 1024 / 1024:.1f} MB)")
+
+
+def precompute_faq(parameters: dict):
+    """Answer the frequent questions against the freshly indexed resume and save the answers for the API's warmup."""
+    
+    questions_path = parameters['faq_questions_path']
+    if not questions_path or not os.path.exists(questions_path):
+        print(f"\nℹ️  No FAQ questions file ({questions_path}), skipping FAQ answers")
+        return
+    with open(questions_path, 'r', encoding='utf-8') as file:
+        questions = json.load(file)
+    
+    print(f"\n💬 Precomputing answers to {len(questions)} frequent question(s)...")
+    from backend.chatbot import ChatBot
+    chatbot = ChatBot(dict(parameters, pinecone_check_index=False))
+    count = chatbot.precompute_faq(questions, parameters['faq_answers_path'])
+    print(f"✅ {count} FAQ answer(s) saved to {parameters['faq_answers_path']}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Index resume documents into Pinecone vector database',
@@ -132,10 +279,15 @@ Examples:
   python index_resume.py --file resume.pdf
   python index_resume.py --file resume.docx --clear
   python index_resume.py --directory ./resume_sections/
+  python index_resume.py --directory ./resume_sections/ --prune
+  python index_resume.py --file publications.pdf --stream
+  python index_resume.py --tenant jane-doe --file jane_doe.pdf
+  python index_resume.py --file resume.pdf --snapshot data/index.snapshot
+  python index_resume.py --snapshot data/index.snapshot
         """
     )
     
-    group = parser.add_mutually_exclusive_group(required=True)
+    group = parser.add_mutually_exclusive_group()
     group.add_argument('--file', type=str, help='Path to a single resume file (PDF, DOCX, or TXT)')
     group.add_argument('--directory', type=str, help='Path to directory containing resume files')
     
@@ -144,25 +296,65 @@ Examples:
         action='store_true',
         help='Clear the Pinecone index before uploading (WARNING: deletes all existing data)'
     )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Read, split and upload files page by page (bounded memory for very large documents)'
+    )
+    parser.add_argument(
+        '--tenant',
+        type=str,
+        help='Index the resume of a tenant of TENANTS_PATH (its own Pinecone namespace, local index and manifest)'
+    )
+    parser.add_argument(
+        '--skip-faq',
+        action='store_true',
+        help='Do not precompute the answers to the frequent questions (FAQ_QUESTIONS_PATH)'
+    )
+    parser.add_argument(
+        '--prune',
+        action='store_true',
+        help='With --directory, delete the chunks of previously indexed files that are no longer in the directory'
+    )
+    parser.add_argument(
+        '--snapshot',
+        type=str,
+        help='Export the index into a snapshot file after indexing (alone: export the current index)'
+    )
     
     args = parser.parse_args()
+    if not (args.file or args.directory or args.snapshot):
+        parser.error('one of the arguments --file --directory --snapshot is required')
     
     # Load configuration
     print("🔧 Loading configuration...")
     try:
         parameters = load_config()
+        if args.tenant:
+            tenants = load_tenants(parameters['tenants_path'])
+            if args.tenant not in tenants:
+                raise ValueError(f"Unknown tenant '{args.tenant}' (not in {parameters['tenants_path']})")
+            parameters = tenant_parameters(parameters, args.tenant, tenants[args.tenant])
         print(f"✅ Configuration loaded")
         print(f"   LLM Provider: {parameters['llm_provider']}")
         print(f"   Embedding Provider: {parameters['embedding_provider']}")
         print(f"   Pinecone Index: {parameters['pinecone_index_name']}")
+        if args.tenant:
+            print(f"   Tenant: {args.tenant} (namespace '{parameters['pinecone_namespace']}')")
     except Exception as e:
         print(f"❌ Configuration error: {e}")
         print("\n💡 Make sure you have created a .env file with the required variables.")
         print("   See .env.example for reference.")
         return 1
+    if parameters['vector_backend'] == 'snapshot':
+        print("❌ The snapshot backend is read-only: index with VECTOR_BACKEND=local or pinecone, "
+              "then export it with --snapshot")
+        return 1
     
     # Initialize retriever
     print("\n🔌 Connecting to Pinecone...")
+    # Make sure the index exists before uploading (the API skips this check at startup)
+    parameters['pinecone_check_index'] = True
     try:
         retriever = Retriever(parameters)
         print("✅ Connected to Pinecone")
@@ -170,12 +362,42 @@ Examples:
         print(f"❌ Failed to connect to Pinecone: {e}")
         return 1
     
+    # Local record of what is already indexed
+    index_identity = (parameters['local_index_path'] if parameters['vector_backend'] == 'local'
+                      else parameters['pinecone_index_name'])
+    if parameters['vector_backend'] != 'local' and parameters.get('pinecone_namespace'):
+        index_identity += f"/{parameters['pinecone_namespace']}"
+
+    manifest = IndexManifest(
+        parameters['index_manifest_path'],
+        index=f"{parameters['vector_backend']}:{index_identity}",
+        embedding_model=parameters['embedding_model']
+    )
+    
     # Index file(s)
     try:
-        if args.file:
-            index_file(args.file, retriever, args.clear)
+        if args.file and args.stream:
+            index_file_stream(args.file, retriever, args.clear, manifest=manifest,
+                              batch_size=parameters['ingest_embed_batch_size'])
+        elif args.file:
+            index_file(args.file, retriever, args.clear, manifest=manifest)
         elif args.directory:
-            index_directory(args.directory, retriever, args.clear)
+            index_directory(args.directory, retriever, args.clear, manifest=manifest, prune=args.prune,
+                            stream=args.stream)
+        
+        if args.snapshot:
+            export_snapshot(args.snapshot, retriever, manifest)
+        
+        if not (args.file or args.directory):
+            print("\n🎉 All done! Deploy the snapshot file with VECTOR_BACKEND=snapshot.")
+            return 0
+        
+        if not args.skip_faq:
+            try:
+                precompute_faq(parameters)
+            except Exception as e:
+                # The index is ready; the API simply answers these questions on first request
+                print(f"⚠️  Could not precompute FAQ answers: {e}")
         
         print("\n🎉 All done! Your resume is now indexed and ready to use.")
         print(f"   You can now run: python app.py")